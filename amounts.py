@@ -0,0 +1,66 @@
+from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Union
+
+# Суммы в целых копейках.
+# В записях сумма остаётся строкой ("100.0", как её сохраняет validate_summ), а итоги, колоночное хранение,
+# отчёты, индексы и база SQLite работают с целым числом копеек: сложение точное и не требует разбора float.
+# Строки старого формата (str(float), в том числе с экспонентой или более чем двумя знаками после точки)
+# читаются и округляются до копейки (половина - вверх по модулю).
+
+KOPECK = Decimal('0.01')
+# До этого значения (в рублях) сумма с не более чем двумя знаками после точки переводится в копейки
+# через float без потери точности: ошибка округления float * 100 меньше половины копейки.
+FAST_PATH_LIMIT = 1e13
+
+
+def to_kopecks(amount: Union[str, int, float]) -> int:
+    if isinstance(amount, str) and len(amount.partition('.')[2]) <= 2 and 'e' not in amount and 'E' not in amount:
+        number = float(amount)
+        if -FAST_PATH_LIMIT < number < FAST_PATH_LIMIT:
+            return round(number * 100)
+    return _rounded_kopecks(amount, ROUND_HALF_UP)
+
+
+# Граница диапазона сумм (в рублях) в копейках: нижняя округляется вверх, верхняя - вниз,
+# чтобы диапазон не расширялся при округлении.
+def bound_to_kopecks(amount: Union[str, int, float], upper: bool) -> int:
+    return _rounded_kopecks(amount, ROUND_FLOOR if upper else ROUND_CEILING)
+
+
+def _rounded_kopecks(amount: Union[str, int, float], rounding: str) -> int:
+    return decimal_to_kopecks(parse_amount(amount), rounding)
+
+
+# Сумма в рублях как Decimal, без округления. TypeError - не строка и не число, ValueError - не число.
+def parse_amount(amount: Union[str, int, float]) -> Decimal:
+    if isinstance(amount, bool) or not isinstance(amount, (str, int, float)):
+        raise TypeError(f"Некорректная сумма: {amount!r}")
+    try:
+        value = Decimal(amount.strip() if isinstance(amount, str) else str(amount))
+    except InvalidOperation:
+        raise ValueError(f"Некорректная сумма: {amount!r}")
+    if not value.is_finite():
+        raise ValueError(f"Некорректная сумма: {amount!r}")
+    return value
+
+
+# Сумма в целых копейках с округлением rounding. Слишком большие для Decimal суммы - ValueError.
+def decimal_to_kopecks(value: Decimal, rounding: str = ROUND_HALF_UP) -> int:
+    try:
+        return int(value.quantize(KOPECK, rounding=rounding) * 100)
+    except InvalidOperation:
+        raise ValueError(f"Некорректная сумма: {value}")
+
+
+# Строка суммы в формате записей: рубли, точка и копейки без лишнего нуля ("100.0", "100.5", "100.25").
+def format_kopecks(kopecks: int) -> str:
+    sign = '-' if kopecks < 0 else ''
+    rubles, rest = divmod(abs(kopecks), 100)
+    if rest % 10 == 0:
+        return f"{sign}{rubles}.{rest // 10}"
+    return f"{sign}{rubles}.{rest:02d}"
+
+
+# Каноническая запись суммы: округление до копейки и формат format_kopecks.
+def normalize_amount(amount: Union[str, int, float]) -> str:
+    return format_kopecks(to_kopecks(amount))
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Wallet
+from server import WalletClient, WalletServer
+
+# Нагрузочная проверка HTTP API: несколько клиентов с постоянными соединениями одновременно отправляют
+# смесь запросов (баланс, поиск, добавление). Выводятся запросы в секунду и задержки p50/p99.
+# Без --url сервер запускается в этом же процессе на временном файле.
+#
+#   python benchmarks/load_test.py --clients 50 --requests 200 --writes 0.2 --backend journal
+#   python benchmarks/load_test.py --url 127.0.0.1:8080
+
+
+# Запросы одного клиента: каждый writes-й по счёту - добавление, остальные поочерёдно баланс и поиск.
+async def client_loop(host: str, port: int, number: int, requests: int, writes: float, latencies: list) -> None:
+    client = WalletClient(host, port)
+    write_every = round(1 / writes) if writes else 0
+    search = "/entries?" + urlencode({"Категория": "Расход", "limit": 20})
+    try:
+        for index in range(requests):
+            if write_every and index % write_every == 0:
+                request = ("POST", "/entries", {"Дата": "01-01-2024", "Категория": "Расход", "Сумма": "1", "Описание": f"клиент {number}"})
+            elif index % 2:
+                request = ("GET", search, None)
+            else:
+                request = ("GET", "/balance", None)
+            started = time.perf_counter()
+            status, _ = await client.request(*request)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                raise RuntimeError(f"Ответ {status} на {request[0]} {request[1]}")
+    finally:
+        await client.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(host: str, port: int, clients: int, requests: int, writes: float):
+    latencies: list = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(host, port, number, requests, writes, latencies) for number in range(clients)))
+    return time.perf_counter() - started, latencies
+
+
+async def run_local(file_path: str, backend: str, clients: int, requests: int, writes: float):
+    server = WalletServer(Wallet(file_path, backend=backend))
+    await server.start(port=0)
+    try:
+        elapsed, latencies = await run(*server.address, clients, requests, writes)
+    finally:
+        await server.close()
+    return elapsed, latencies, server.flushes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочная проверка HTTP API кошелька.")
+    parser.add_argument("--url", help="Адрес работающего сервера host:port; без него сервер запускается локально.")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на клиента.")
+    parser.add_argument("--writes", type=float, default=0.2, help="Доля запросов на добавление.")
+    parser.add_argument("--backend", default="journal", choices=("json", "journal", "sqlite"))
+    args = parser.parse_args()
+
+    flushes = None
+    if args.url:
+        host, _, port = args.url.rpartition(':')
+        elapsed, latencies = asyncio.run(run(host, int(port), args.clients, args.requests, args.writes))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, {"json": 'data.json', "journal": 'data.jsonl', "sqlite": 'data.db'}[args.backend])
+            elapsed, latencies, flushes = asyncio.run(run_local(file_path, args.backend, args.clients, args.requests, args.writes))
+
+    total = len(latencies)
+    print(f"Клиентов: {args.clients}, запросов: {total}, доля добавлений: {args.writes}")
+    print(f"Время: {elapsed:.2f} с, {total / elapsed:.0f} запросов/с")
+    print(f"Задержка p50: {percentile(latencies, 0.5) * 1000:.2f} мс, p99: {percentile(latencies, 0.99) * 1000:.2f} мс")
+    if flushes is not None:
+        print(f"Сохранений на диск: {flushes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel
+from totals import Totals
+from wallet_bench import generate_entries
+
+# Ускорение поиска без индекса и полного пересчёта итогов в нескольких процессах (модуль parallel)
+# по сравнению с перебором в одном процессе. Результаты параллельного перебора сверяются с последовательным.
+# Время включает запуск процессов; ускорение близко к числу процессов, пока их не больше числа ядер.
+#
+#   python benchmarks/parallel_bench.py --sizes 1000000 --workers 1 2 4 8
+
+
+def serial_search(data, criteria):
+    return [entry_id for entry_id, entry in data.items()
+            if all(key in entry and entry[key] == value for key, value in criteria.items())]
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Параллельный поиск и пересчёт итогов.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if parallel.CONTEXT is None:
+        sys.exit("Параллельный перебор недоступен: нет fork.")
+    print(f"Ядер: {parallel.default_workers()}")
+    print(f"{'Записей':>9}  {'Операция':<10}{'Процессов':>10}{'Время, мс':>12}{'Ускорение':>11}")
+    for size in args.sizes:
+        data = generate_entries(size)
+        criteria = {"Описание": "Кафе", "Категория": "Расход"}
+        operations = {
+            "search": (lambda: serial_search(data, criteria),
+                       lambda workers: parallel.search(data, criteria, workers)),
+            "totals": (lambda: Totals.from_entries(data.values()).balance_kopecks(),
+                       lambda workers: parallel.totals(data, workers).balance_kopecks()),
+        }
+        for name, (serial, parallel_run) in operations.items():
+            expected = serial()
+            serial_time = best_time(serial, args.repeat)
+            print(f"{size:>9}  {name:<10}{1:>10}{serial_time * 1000:>12.1f}{1:>10.2f}x")
+            for workers in args.workers:
+                if workers < 2:
+                    continue
+                assert parallel_run(workers) == expected
+                elapsed = best_time(lambda: parallel_run(workers), args.repeat)
+                print(f"{size:>9}  {name:<10}{workers:>10}{elapsed * 1000:>12.1f}{serial_time / elapsed:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wallet_bench import generate_entries
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Сравнение форматов файла кошелька: прежний (json с отступом 4), компактный json и компактный orjson.
+# Для каждого - время кодирования, время разбора и размер файла.
+#
+#   python benchmarks/serialization_bench.py --sizes 10000 100000 1000000
+
+
+def formats():
+    yield ("json, отступ 4 (прежний)",
+           lambda data: json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8'), json.loads)
+    yield ("json, компактный",
+           lambda data: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), json.loads)
+    if orjson is not None:
+        yield "orjson, компактный", orjson.dumps, orjson.loads
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение форматов сериализации файла кошелька.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Записей':>9}  {'Формат':<26}{'Запись, мс':>12}{'Чтение, мс':>12}{'Размер, КиБ':>14}")
+    for size in args.sizes:
+        data = generate_entries(size)
+        for name, encode, decode in formats():
+            content = encode(data)
+            assert decode(content) == data
+            encode_time = best_time(lambda: encode(data), args.repeat)
+            decode_time = best_time(lambda: decode(content), args.repeat)
+            print(f"{size:>9}  {name:<26}{encode_time * 1000:>12.1f}{decode_time * 1000:>12.1f}{len(content) / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Wallet
+
+# Нагрузочная проверка одновременной записи: N процессов параллельно добавляют записи в один кошелёк.
+# В конце проверяется, что ни одна запись не потеряна, ID уникальны и итоги совпадают с записями.
+#
+#   python benchmarks/stress_writers.py --writers 8 --entries 200 --backend journal
+
+
+def writer(file_path: str, backend: str, writer_number: int, count: int) -> None:
+    wallet = Wallet(file_path, backend=backend)
+    for number in range(count):
+        wallet.add_entry({
+            "Дата": "01-01-2024",
+            "Категория": "Доход",
+            "Сумма": "1.0",
+            "Описание": f"процесс {writer_number}, запись {number}",
+        })
+
+
+# Запуск writers процессов по entries добавлений. Возвращает (время в секундах, список ошибок).
+def run(file_path: str, backend: str, writers: int, entries: int):
+
+    Wallet(file_path, backend=backend)
+    processes = [Process(target=writer, args=(file_path, backend, number, entries)) for number in range(writers)]
+
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    errors = []
+    if any(process.exitcode != 0 for process in processes):
+        errors.append("Один из процессов завершился с ошибкой.")
+
+    data = Wallet(file_path, backend=backend).load_entries()
+    expected = writers * entries
+    if len(data) != expected:
+        errors.append(f"Потеряны записи: ожидалось {expected}, найдено {len(data)}.")
+    if sorted(data, key=int) != [str(number) for number in range(1, expected + 1)]:
+        errors.append("ID записей не образуют последовательность 1..N.")
+    descriptions = {entry["Описание"] for entry in data.values()}
+    if len(descriptions) != len(data):
+        errors.append("Одна запись перезаписала другую.")
+    if Wallet(file_path, backend=backend).verify_balance() != (0, 0):
+        errors.append("Итоги не совпадают с записями.")
+
+    return elapsed, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Параллельная запись в один кошелёк.")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--entries", type=int, default=100, help="Добавлений на процесс.")
+    parser.add_argument("--backend", default="journal", choices=("json", "journal"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'data.json' if args.backend == "json" else 'data.jsonl')
+        elapsed, errors = run(file_path, args.backend, args.writers, args.entries)
+
+    total = args.writers * args.entries
+    print(f"Хранилище: {args.backend}, процессов: {args.writers}, записей: {total}")
+    print(f"Время: {elapsed:.2f} с, {total / elapsed:.0f} записей/с")
+    if errors:
+        print("\n".join(errors))
+        sys.exit(1)
+    print("Потерянных или перезаписанных записей нет.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+from statistics import median
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Wallet
+from storage import JournalStorage, JsonStorage, ShardedStorage, import_json_to_sqlite
+
+# Замеры операций Wallet на синтетических кошельках разного размера.
+# Для каждой операции - медиана времени по нескольким повторам и пик памяти (tracemalloc) за один вызов.
+# Результаты пишутся в JSON; с --baseline сравниваются с сохранёнными результатами,
+# и операции, ставшие медленнее (или потребляющие больше памяти) сверх порога, помечаются как регрессии.
+#
+#   python benchmarks/wallet_bench.py --sizes 1000 10000 100000 --output benchmarks/baseline.json
+#   python benchmarks/wallet_bench.py --sizes 1000 10000 100000 --baseline benchmarks/baseline.json
+#   python benchmarks/wallet_bench.py --sizes 1000000 --backends json journal sqlite --repeat 3
+
+SIZES = (1000, 10000, 100000, 1000000)
+FILE_NAMES = {"json": 'data.json', "journal": 'data.jsonl', "sqlite": 'data.db', "sharded": 'data'}
+INCOME_DESCRIPTIONS = ("Зарплата", "Премия", "Подработка", "Проценты по вкладу", "Возврат долга")
+EXPENSE_DESCRIPTIONS = ("Продукты", "Кафе", "Транспорт", "Аренда", "Связь", "Аптека", "Одежда", "Подарки", "Кино")
+
+
+# Синтетические записи: даты за несколько лет подряд, около 20% доходов (крупные суммы),
+# остальное - расходы с суммами от десятков до тысяч, описания из небольшого набора.
+def generate_entries(count: int, seed: int = 0) -> Dict[str, Dict[str, str]]:
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    span = max(count // 50, 365)
+    data = {}
+    for number in range(1, count + 1):
+        day = start + timedelta(days=rng.randrange(span))
+        if rng.random() < 0.2:
+            category = "Доход"
+            amount = round(rng.uniform(5000, 150000), 2)
+            description = rng.choice(INCOME_DESCRIPTIONS)
+        else:
+            category = "Расход"
+            amount = round(rng.lognormvariate(6, 1.2), 2)
+            description = rng.choice(EXPENSE_DESCRIPTIONS)
+        data[str(number)] = {
+            "Дата": day.strftime('%d-%m-%Y'),
+            "Категория": category,
+            "Сумма": str(float(amount)),
+            "Описание": description,
+        }
+    return data
+
+
+# Файл кошелька нужного формата с готовыми записями (без add_entry, чтобы подготовка не занимала часы).
+def write_wallet(directory: str, backend: str, data: Dict[str, Dict[str, str]]) -> str:
+    file_path = os.path.join(directory, FILE_NAMES[backend])
+    if backend == "journal":
+        JournalStorage.write_snapshot(file_path, data)
+    elif backend == "sqlite":
+        json_path = os.path.join(directory, 'source.json')
+        JsonStorage(json_path).save(data)
+        import_json_to_sqlite(json_path, file_path)
+    elif backend == "sharded":
+        storage = ShardedStorage(file_path)
+        storage.initialize()
+        storage.save(data)
+    else:
+        JsonStorage(file_path).save(data)
+    return file_path
+
+
+def measure(function: Callable, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": median(timings), "peak_bytes": peak}
+
+
+# Замеры всех операций для одного размера и формата хранилища.
+def bench_wallet(backend: str, size: int, repeat: int, seed: int = 0) -> List[Dict]:
+    data = generate_entries(size, seed)
+    some_entry = data[str(size // 2 or 1)]
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = write_wallet(directory, backend, data)
+        del data
+
+        wallet = Wallet(file_path, backend=backend)
+        wallet.get_balance()
+        wallet.search_entry(Категория="Расход")
+        wallet.search_entry(text="")
+        counter = iter(range(1, 1 << 30))
+
+        operations = [
+            ("load", lambda: Wallet(file_path, backend=backend).load_entries()),
+            ("get_balance_cold", lambda: Wallet(file_path, backend=backend).get_balance()),
+            ("get_balance", wallet.get_balance),
+            ("search_indexed", lambda: wallet.search_entry(Категория=some_entry["Категория"], Дата=some_entry["Дата"])),
+            ("search_scan", lambda: wallet.search_entry(Описание=some_entry["Описание"])),
+            ("search_text", lambda: wallet.search_entry(text=some_entry["Описание"][:5], Дата=some_entry["Дата"])),
+            ("add_entry", lambda: wallet.add_entry(dict(some_entry, Описание=f"замер {next(counter)}"))),
+            ("edit_entry", lambda: wallet.edit_entry(str(size // 2 or 1), Сумма=f"{next(counter)}.0")),
+        ]
+        results = []
+        for name, function in operations:
+            result = measure(function, repeat)
+            results.append({"backend": backend, "size": size, "operation": name, **result})
+            print(f"{backend:<8}{size:>9}  {name:<18}{result['seconds'] * 1000:>12.3f} мс{result['peak_bytes'] / 1024:>14.0f} КиБ",
+                  flush=True)
+        if backend == "sqlite":
+            wallet.storage.close()
+    return results
+
+
+def result_key(result: Dict) -> tuple:
+    return result["backend"], result["size"], result["operation"]
+
+
+# Сравнение с базовыми результатами. Возвращает описания регрессий: время или пик памяти больше базового
+# более чем в (1 + threshold) раз. Очень быстрые операции (до min_seconds) по времени не сравниваются:
+# их разброс больше самого значения.
+def compare(results: List[Dict], baseline: List[Dict], threshold: float = 0.25,
+            min_seconds: float = 1e-4) -> List[str]:
+    base = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = base.get(result_key(result))
+        if old is None:
+            continue
+        name = "{} {} {}".format(*result_key(result))
+        if max(result["seconds"], old["seconds"]) >= min_seconds and result["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append(f"{name}: время {old['seconds'] * 1000:.3f} -> {result['seconds'] * 1000:.3f} мс")
+        if old["peak_bytes"] and result["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append(f"{name}: память {old['peak_bytes']} -> {result['peak_bytes']} байт")
+    return regressions
+
+
+def load_results(path: str) -> List[Dict]:
+    with open(path, 'r') as file:
+        return json.load(file)["results"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры операций Wallet на кошельках разного размера.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Число записей в кошельке.")
+    parser.add_argument("--backends", nargs="+", default=["json"], choices=sorted(FILE_NAMES), help="Форматы хранилища.")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов каждой операции.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Файл для результатов в формате JSON.")
+    parser.add_argument("--baseline", help="Файл с базовыми результатами для сравнения.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустимое ухудшение (0.25 - на 25%%).")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in args.backends:
+        for size in args.sizes:
+            results.extend(bench_wallet(backend, size, args.repeat, args.seed))
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4, ensure_ascii=False)
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        if regressions:
+            print("Регрессии относительно базовых результатов:")
+            print("\n".join(regressions))
+            return 1
+        print("Регрессий относительно базовых результатов нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
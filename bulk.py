@@ -0,0 +1,82 @@
+import os
+import csv
+from typing import Dict, Iterable, Iterator, Tuple
+
+from validation import validate_entry
+from serialization import JSONDecodeError, dumps, loads
+
+# Пакетная загрузка и выгрузка записей.
+# CSV - первая строка с названиями полей (Дата,Категория,Сумма,Описание);
+# JSON Lines - по одному объекту записи в строке.
+# При выгрузке добавляется поле ID; при загрузке оно игнорируется.
+
+FIELDS = ("Дата", "Категория", "Сумма", "Описание")
+# Размер буфера записи при выгрузке.
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+# Потоковое чтение записей из файла .csv или .jsonl с проверкой каждой записи.
+# При ошибке выбрасывается ValueError с номером строки файла.
+def read_entries(file_path: str) -> Iterator[Dict[str, str]]:
+
+    if _file_format(file_path) == 'csv':
+        rows = _read_csv(file_path)
+    else:
+        rows = _read_jsonl(file_path)
+
+    for line_number, row in rows:
+        try:
+            yield validate_entry(row)
+        except ValueError as e:
+            raise ValueError(f"Строка {line_number}: {e}")
+
+
+def _read_csv(file_path: str) -> Iterator:
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _read_jsonl(file_path: str) -> Iterator:
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = loads(line)
+            except JSONDecodeError:
+                raise ValueError(f"Строка {line_number}: некорректный JSON.")
+            if not isinstance(row, dict):
+                raise ValueError(f"Строка {line_number}: ожидается объект записи.")
+            yield line_number, row
+
+
+# Потоковая выгрузка пар (ID, запись) в файл .csv или .jsonl через буферизованную запись.
+# Записи не накапливаются в памяти. Возвращает количество выгруженных записей.
+def write_entries(file_path: str, entries: Iterable[Tuple[str, Dict[str, str]]]) -> int:
+
+    file_format = _file_format(file_path)
+    count = 0
+    with open(file_path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as file:
+        if file_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(("ID", *FIELDS))
+            for entry_id, entry in entries:
+                writer.writerow((entry_id, *(entry.get(field, "") for field in FIELDS)))
+                count += 1
+        else:
+            for entry_id, entry in entries:
+                file.write(dumps({"ID": entry_id, **entry}).decode('utf-8'))
+                file.write('\n')
+                count += 1
+    return count
+
+
+def _file_format(file_path: str) -> str:
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Неподдерживаемый формат файла: {file_path}. Ожидается .csv или .jsonl")
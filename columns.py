@@ -0,0 +1,239 @@
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from amounts import format_kopecks, to_kopecks
+from indexes import date_ordinal
+
+Entries = Dict[str, Dict[str, str]]
+
+FIELDS = ("Дата", "Категория", "Сумма", "Описание")
+CATEGORIES = ("Доход", "Расход")
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+# Код для категорий, отличных от "Доход" и "Расход" (исходная строка хранится отдельно).
+OTHER_CATEGORY = len(CATEGORIES)
+
+
+# Таблица для bytes.translate: байт кода категории -> 1, остальные -> 0.
+def _category_mask_table(code: int) -> bytes:
+    table = bytearray(256)
+    table[code] = 1
+    return bytes(table)
+
+
+CATEGORY_MASKS = [_category_mask_table(code) for code in range(OTHER_CATEGORY + 1)]
+
+
+# Колоночное хранение записей в памяти.
+# Вместо словаря из четырёх строк на запись каждое поле хранится отдельным компактным столбцом:
+#   Сумма     - array('q') в целых копейках, суммы разбираются один раз при загрузке;
+#   Дата      - array('i') с номером дня и ссылка на строку из общего пула (исходное написание сохраняется);
+#   Категория - bytearray с кодом категории;
+#   Описание  - ссылки на строки из общего пула.
+# ID, если это возрастающие целые числа (обычный случай), хранятся в array('q').
+# Запись в виде словаря собирается по запросу. Записи нестандартного вида (другие поля, нестроковые значения)
+# хранятся целиком, чтобы чтение было без потерь.
+class EntryColumns(MutableMapping):
+
+    def __init__(self, data: Optional[Entries] = None):
+        self.clear()
+        if data:
+            for entry_id, entry in data.items():
+                self[entry_id] = entry
+
+    def clear(self) -> None:
+        self._int_ids = array('q')
+        # Если ID не являются возрастающими целыми числами, используются список строк и словарь позиций.
+        self._str_ids: Optional[List[str]] = None
+        self._positions: Optional[Dict[str, int]] = None
+
+        self.amounts = array('q')
+        self.dates = array('i')
+        self.categories = bytearray()
+        self._date_strings: List[str] = []
+        self._descriptions: List[str] = []
+
+        # Исключения, хранимые по номеру строки: исходная строка суммы, если format_kopecks её не воспроизводит,
+        # названия прочих категорий и записи нестандартного вида целиком.
+        self._raw_amounts: Dict[int, str] = {}
+        self._other_categories: Dict[int, str] = {}
+        self._irregular: Dict[int, Dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def _id_at(self, position: int) -> str:
+        if self._str_ids is not None:
+            return self._str_ids[position]
+        return str(self._int_ids[position])
+
+    def _position(self, entry_id: str) -> Optional[int]:
+        if self._positions is not None:
+            return self._positions.get(entry_id)
+        if not _is_canonical_int(entry_id):
+            return None
+        number = int(entry_id)
+        position = bisect_left(self._int_ids, number)
+        if position < len(self._int_ids) and self._int_ids[position] == number:
+            return position
+        return None
+
+    def _append_id(self, entry_id: str) -> None:
+        if self._str_ids is None:
+            if _is_canonical_int(entry_id) and (not self._int_ids or int(entry_id) > self._int_ids[-1]):
+                self._int_ids.append(int(entry_id))
+                return
+            self._str_ids = [str(number) for number in self._int_ids]
+            self._positions = {entry_id: position for position, entry_id in enumerate(self._str_ids)}
+            self._int_ids = array('q')
+        self._positions[entry_id] = len(self._str_ids)
+        self._str_ids.append(entry_id)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._str_ids is not None:
+            return iter(list(self._str_ids))
+        return map(str, self._int_ids)
+
+    def __contains__(self, entry_id: object) -> bool:
+        return isinstance(entry_id, str) and self._position(entry_id) is not None
+
+    def __getitem__(self, entry_id: str) -> Dict[str, str]:
+        position = self._position(entry_id) if isinstance(entry_id, str) else None
+        if position is None:
+            raise KeyError(entry_id)
+        return self.row(position)
+
+    # Запись в виде словаря по номеру строки.
+    def row(self, position: int) -> Dict[str, str]:
+        irregular = self._irregular.get(position)
+        if irregular is not None:
+            return dict(irregular)
+        return {
+            "Дата": self._date_strings[position],
+            "Категория": self._category_at(position),
+            "Сумма": self._amount_string_at(position),
+            "Описание": self._descriptions[position],
+        }
+
+    def _category_at(self, position: int) -> str:
+        code = self.categories[position]
+        if code == OTHER_CATEGORY:
+            return self._other_categories[position]
+        return CATEGORIES[code]
+
+    def _amount_string_at(self, position: int) -> str:
+        raw = self._raw_amounts.get(position)
+        return raw if raw is not None else format_kopecks(self.amounts[position])
+
+    def __setitem__(self, entry_id: str, entry: Dict[str, str]) -> None:
+        position = self._position(entry_id)
+        if position is None:
+            self._append_id(entry_id)
+            self.amounts.append(0)
+            self.dates.append(0)
+            self.categories.append(OTHER_CATEGORY)
+            self._date_strings.append("")
+            self._descriptions.append("")
+            position = len(self.amounts) - 1
+        self._set_row(position, entry)
+
+    def _set_row(self, position: int, entry: Dict[str, str]) -> None:
+        self._raw_amounts.pop(position, None)
+        self._other_categories.pop(position, None)
+        self._irregular.pop(position, None)
+
+        if tuple(entry) != FIELDS or not all(isinstance(value, str) for value in entry.values()):
+            self._irregular[position] = dict(entry)
+
+        date_str = entry.get("Дата")
+        self._date_strings[position] = sys.intern(date_str) if isinstance(date_str, str) else ""
+        try:
+            self.dates[position] = date_ordinal(date_str)
+        except (AttributeError, TypeError, ValueError):
+            self.dates[position] = 0
+
+        category = entry.get("Категория")
+        code = CATEGORY_CODES.get(category, OTHER_CATEGORY) if isinstance(category, str) else OTHER_CATEGORY
+        self.categories[position] = code
+        if code == OTHER_CATEGORY and isinstance(category, str):
+            self._other_categories[position] = category
+
+        amount = entry.get("Сумма")
+        try:
+            self.amounts[position] = to_kopecks(amount)
+        except (TypeError, ValueError, OverflowError):
+            self.amounts[position] = 0
+            self._irregular[position] = dict(entry)
+        else:
+            if isinstance(amount, str) and format_kopecks(self.amounts[position]) != amount:
+                self._raw_amounts[position] = amount
+
+        description = entry.get("Описание")
+        self._descriptions[position] = sys.intern(description) if isinstance(description, str) else ""
+
+    def __delitem__(self, entry_id: str) -> None:
+        if entry_id not in self:
+            raise KeyError(entry_id)
+        remaining = [(other_id, self[other_id]) for other_id in self if other_id != entry_id]
+        self.clear()
+        for other_id, entry in remaining:
+            self[other_id] = entry
+
+    # Суммы доходов и расходов в копейках по столбцам: маски категорий строятся bytes.translate,
+    # суммирование - sum(compress(...)) целых чисел, без разбора строк и создания словарей.
+    def sums(self) -> Tuple[int, int]:
+        income = sum(compress(self.amounts, self.categories.translate(CATEGORY_MASKS[CATEGORY_CODES["Доход"]])))
+        expense = sum(compress(self.amounts, self.categories.translate(CATEGORY_MASKS[CATEGORY_CODES["Расход"]])))
+        return income, expense
+
+    # Поиск по точному совпадению полей (семантика search_entry) по столбцам.
+    # Категория отбирается маской, остальные условия проверяются по значениям столбцов.
+    def search(self, criteria: Dict[str, str]) -> Iterator[Tuple[str, Dict[str, str]]]:
+
+        positions = range(len(self))
+        category = criteria.get("Категория")
+        if category in CATEGORY_CODES:
+            positions = compress(positions, self.categories.translate(CATEGORY_MASKS[CATEGORY_CODES[category]]))
+
+        checks = self._column_checks(criteria)
+        irregular = self._irregular
+        if checks is None:
+            positions = sorted(irregular)
+        for position in positions:
+            if position in irregular:
+                entry = irregular[position]
+                if not all(key in entry and entry[key] == value for key, value in criteria.items()):
+                    continue
+            elif checks is None or not all(check(position) for check in checks):
+                continue
+            yield self._id_at(position), self.row(position)
+
+    # Проверки условий для записей стандартного вида. None - условие, которому такие записи не удовлетворяют никогда.
+    def _column_checks(self, criteria: Dict[str, str]) -> Optional[list]:
+        checks = []
+        for key, value in criteria.items():
+            if key == "Дата":
+                checks.append(lambda position, value=value: self._date_strings[position] == value)
+            elif key == "Описание":
+                checks.append(lambda position, value=value: self._descriptions[position] == value)
+            elif key == "Категория":
+                checks.append(lambda position, value=value: self._category_at(position) == value)
+            elif key == "Сумма":
+                try:
+                    number = to_kopecks(value)
+                except (TypeError, ValueError):
+                    return None
+                checks.append(
+                    lambda position, value=value, number=number:
+                        self.amounts[position] == number and self._amount_string_at(position) == value
+                )
+            else:
+                return None
+        return checks
+
+
+def _is_canonical_int(entry_id: str) -> bool:
+    return entry_id.isascii() and entry_id.isdigit() and str(int(entry_id)) == entry_id
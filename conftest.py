@@ -0,0 +1,26 @@
+import pytest
+from main import Wallet
+
+
+# Хранилища и имена их файлов данных для тестов, повторяемых на каждом хранилище.
+BACKENDS = [("json", 'data.json'), ("journal", 'data.jsonl'), ("sqlite", 'data.db'), ("sharded", 'data')]
+# Хранилища, записи которых Wallet держит в памяти (без собственных запросов).
+IN_MEMORY_BACKENDS = BACKENDS[:2]
+
+
+def entry(date="01-01-2024", amount="10.0", category="Расход", description=""):
+    return {"Дата": date, "Категория": category, "Сумма": amount, "Описание": description}
+
+
+# Тип хранилища и путь к файлу данных в tmp_path.
+@pytest.fixture(params=BACKENDS)
+def backend_path(request, tmp_path):
+    backend, name = request.param
+    return backend, str(tmp_path / name)
+
+
+# Пустой кошелёк на каждом хранилище.
+@pytest.fixture
+def wallet(backend_path):
+    backend, file_path = backend_path
+    return Wallet(file_path, backend=backend)
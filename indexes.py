@@ -0,0 +1,252 @@
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from amounts import to_kopecks
+
+Entries = Dict[str, Dict[str, str]]
+
+
+# Порядковый номер дня для даты в формате дд-мм-гггг.
+# Строки дат в таком формате не сортируются как строки, а номера дней - сортируются.
+def date_ordinal(value: str) -> int:
+    day, month, year = value.split('-')
+    return date(int(year), int(month), int(day)).toordinal()
+
+
+WORD = re.compile(r"\w+")
+
+
+# Слова текста для полнотекстового поиска: без учёта регистра (в том числе кириллицы), "ё" совпадает с "е".
+# Каждое слово выдаётся один раз, в порядке появления.
+def tokenize(text: str) -> List[str]:
+    return list(dict.fromkeys(WORD.findall(text.casefold().replace('ё', 'е'))))
+
+
+# Есть ли в тексте все слова запроса (слова запроса уже разобраны tokenize), каждое - как начало слова текста.
+def contains_words(query: List[str], text: str) -> bool:
+    if not isinstance(text, str):
+        return False
+    words = tokenize(text)
+    return all(any(word.startswith(token) for word in words) for token in query)
+
+
+# Порядок ID в результатах поиска: числовые ID - по возрастанию (порядок добавления), остальные - после них.
+def id_order(entry_id: str) -> Tuple[int, int, str]:
+    return (0, int(entry_id), '') if entry_id.isascii() and entry_id.isdigit() else (1, 0, entry_id)
+
+
+# Позиция для entry_id в части ids[low:high], упорядоченной по id_order (двоичный поиск).
+# Новые записи получают наибольший ID, поэтому чаще всего позиция - в конце, и она проверяется первой.
+def id_position(ids: List[str], entry_id: str, low: int = 0, high: Optional[int] = None) -> int:
+    if high is None:
+        high = len(ids)
+    key = id_order(entry_id)
+    if low == high or id_order(ids[high - 1]) < key:
+        return high
+    while low < high:
+        middle = (low + high) // 2
+        if id_order(ids[middle]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+# Хэш-индекс: значение поля -> ID записей с этим значением.
+# ID хранятся в порядке ID (для файлов, записанных программой, это порядок добавления и порядок записей в файле):
+# запись, изменённая после загрузки, остаётся на своём месте, и страницы результатов (limit/offset)
+# совпадают со страницами после повторной загрузки.
+class HashIndex:
+
+    def __init__(self, field: str):
+        self.field = field
+        self._postings: Dict[str, List[str]] = {}
+
+    def build(self, data: Entries) -> None:
+        field = self.field
+        for entry_id, entry in data.items():
+            if field in entry:
+                self._postings.setdefault(entry[field], []).append(entry_id)
+
+    def add(self, entry_id: str, entry: Dict[str, str]) -> None:
+        if self.field in entry:
+            posting = self._postings.setdefault(entry[self.field], [])
+            posting.insert(id_position(posting, entry_id), entry_id)
+
+    def remove(self, entry_id: str, entry: Dict[str, str]) -> None:
+        posting = self._postings.get(entry.get(self.field))
+        if posting is not None:
+            position = id_position(posting, entry_id)
+            if position == len(posting) or posting[position] != entry_id:
+                # Файл, записанный не в порядке ID: запись ищется перебором.
+                position = posting.index(entry_id) if entry_id in posting else None
+            if position is not None:
+                del posting[position]
+            if not posting:
+                del self._postings[entry[self.field]]
+
+    def lookup(self, value: str) -> List[str]:
+        return self._postings.get(value, [])
+
+
+# Сортированный индекс: записи упорядочены по ключу, вычисленному из значения поля (например, float для суммы),
+# записи с равными ключами - по ID, как в HashIndex. Ключи и ID хранятся в двух параллельных списках, поиск - двоичный.
+# Записи, значение поля которых не удалось преобразовать в ключ, хранятся отдельно.
+class SortedIndex:
+
+    def __init__(self, field: str, key: Callable[[str], float]):
+        self.field = field
+        self.key = key
+        self._keys: List[float] = []
+        self._ids: List[str] = []
+        self._unkeyed: Dict[str, None] = {}
+        # Ключ каждой проиндексированной записи: значение разбирается один раз, при добавлении в индекс.
+        self.key_by_id: Dict[str, float] = {}
+
+    def _key_of(self, value: str) -> Optional[float]:
+        try:
+            key = self.key(value)
+        except (TypeError, ValueError):
+            return None
+        # NaN не сравнима ни с чем и сломала бы порядок списка.
+        return key if key == key else None
+
+    def build(self, data: Entries) -> None:
+        keyed = []
+        for entry_id, entry in data.items():
+            if self.field not in entry:
+                continue
+            key = self._key_of(entry[self.field])
+            if key is None:
+                self._unkeyed[entry_id] = None
+            else:
+                keyed.append((key, entry_id))
+        keyed.sort(key=lambda item: item[0])
+        self._keys = [key for key, _ in keyed]
+        self._ids = [entry_id for _, entry_id in keyed]
+        self.key_by_id = {entry_id: key for key, entry_id in keyed}
+
+    def add(self, entry_id: str, entry: Dict[str, str]) -> None:
+        if self.field not in entry:
+            return
+        key = self._key_of(entry[self.field])
+        if key is None:
+            self._unkeyed[entry_id] = None
+            return
+        position = id_position(self._ids, entry_id, bisect_left(self._keys, key), bisect_right(self._keys, key))
+        self._keys.insert(position, key)
+        self._ids.insert(position, entry_id)
+        self.key_by_id[entry_id] = key
+
+    def remove(self, entry_id: str, entry: Dict[str, str]) -> None:
+        if self.field not in entry:
+            return
+        key = self._key_of(entry[self.field])
+        if key is None:
+            self._unkeyed.pop(entry_id, None)
+            return
+        start, end = bisect_left(self._keys, key), bisect_right(self._keys, key)
+        position = id_position(self._ids, entry_id, start, end)
+        if position == end or self._ids[position] != entry_id:
+            position = next((place for place in range(start, end) if self._ids[place] == entry_id), None)
+        if position is not None:
+            del self._keys[position]
+            del self._ids[position]
+            del self.key_by_id[entry_id]
+
+    # ID записей с ключом в диапазоне [low, high]; None - граница не задана.
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> List[str]:
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return self._ids[start:end]
+
+    # Кандидаты на точное совпадение: записи с тем же ключом.
+    # Строковое равенство (например, "20.0" и "20") проверяется вызывающим кодом.
+    def lookup(self, value: str) -> List[str]:
+        key = self._key_of(value)
+        if key is None:
+            return sorted(self._unkeyed, key=id_order)
+        return self.range(key, key)
+
+
+# Вторичные индексы по полям записей и поиск по ним.
+class EntryIndexes:
+
+    def __init__(self, data: Entries):
+        self.hash_indexes: Dict[str, HashIndex] = {
+            "Категория": HashIndex("Категория"),
+            "Дата": HashIndex("Дата"),
+        }
+        self.sorted_indexes: Dict[str, SortedIndex] = {
+            "Сумма": SortedIndex("Сумма", to_kopecks),
+        }
+        # Дата дополнительно индексируется по номеру дня - для поиска по диапазону дат.
+        self.date_index = SortedIndex("Дата", date_ordinal)
+        for index in self.hash_indexes.values():
+            index.build(data)
+        for index in (*self.sorted_indexes.values(), self.date_index):
+            index.build(data)
+
+    def _all(self) -> tuple:
+        return (*self.hash_indexes.values(), *self.sorted_indexes.values(), self.date_index)
+
+    def add(self, entry_id: str, entry: Dict[str, str]) -> None:
+        for index in self._all():
+            index.add(entry_id, entry)
+
+    def update(self, entry_id: str, old_entry: Dict[str, str], new_entry: Dict[str, str]) -> None:
+        for index in self._all():
+            if old_entry.get(index.field) != new_entry.get(index.field):
+                index.remove(entry_id, old_entry)
+                index.add(entry_id, new_entry)
+
+    # Кандидаты для поиска по точному совпадению полей: самый короткий из списков индексов по полям запроса.
+    # Остальные условия (в том числе по непроиндексированным полям) проверяются на каждой записи-кандидате,
+    # что равносильно пересечению списков, начиная с самого короткого.
+    # None - ни одно из полей запроса не проиндексировано.
+    def candidates(self, criteria: Dict[str, str]) -> Optional[Iterable[str]]:
+        smallest = None
+        for key, value in criteria.items():
+            if key in self.hash_indexes:
+                posting = self.hash_indexes[key].lookup(value)
+            elif key in self.sorted_indexes:
+                posting = self.sorted_indexes[key].lookup(value)
+            else:
+                continue
+            if smallest is None or len(posting) < len(smallest):
+                smallest = posting
+        return smallest
+
+    # ID записей, попадающих в диапазоны дат (номера дней) и сумм (в копейках), в порядке дат.
+    # Из двух диапазонов по индексу выбирается более узкий, второй проверяется по уже разобранным ключам.
+    def range_candidates(self, date_from: Optional[int] = None, date_to: Optional[int] = None,
+                         min_sum: Optional[int] = None, max_sum: Optional[int] = None) -> List[str]:
+        dates = self.date_index
+        sums = self.sorted_indexes["Сумма"]
+        by_date = dates.range(date_from, date_to)
+
+        if min_sum is None and max_sum is None:
+            return by_date
+
+        by_sum = sums.range(min_sum, max_sum)
+        if date_from is None and date_to is None:
+            selected = [entry_id for entry_id in by_sum if entry_id in dates.key_by_id]
+        elif len(by_sum) < len(by_date):
+            selected = [
+                entry_id for entry_id in by_sum
+                if entry_id in dates.key_by_id
+                and (date_from is None or dates.key_by_id[entry_id] >= date_from)
+                and (date_to is None or dates.key_by_id[entry_id] <= date_to)
+            ]
+        else:
+            return [
+                entry_id for entry_id in by_date
+                if entry_id in sums.key_by_id
+                and (min_sum is None or sums.key_by_id[entry_id] >= min_sum)
+                and (max_sum is None or sums.key_by_id[entry_id] <= max_sum)
+            ]
+
+        selected.sort(key=dates.key_by_id.__getitem__)
+        return selected
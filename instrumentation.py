@@ -0,0 +1,114 @@
+import threading
+from time import perf_counter
+from functools import wraps
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+# Замеры внутри кошелька: время и число вызовов методов Wallet, байты прочитанные и записанные хранилищем,
+# число просмотренных при поиске записей и время по этапам:
+#   io_read  - чтение файла с диска;
+#   parse    - разбор прочитанного (JSON);
+#   io_write - сохранение изменений (для JSON-файла - вместе с сериализацией) и fsync;
+#   compute  - остальное время методов Wallet (поиск, итоги, индексы).
+# Замеры включаются параметром Wallet(instrument=True); без него используется NULL_STATS, вызовы которого
+# ничего не делают, а методы Wallet не оборачиваются.
+
+PHASES = ("io_read", "parse", "io_write")
+
+
+class Stats:
+
+    enabled = True
+
+    def __init__(self):
+        self.reset()
+        # Глубина вложенных вызовов методов в каждом потоке: общее время считается только по внешним вызовам.
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.phases: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.total: float = 0
+
+    def add(self, name: str, value: int) -> None:
+        self.counters[name] += value
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] += perf_counter() - started
+
+    # Перебор с подсчётом выданных элементов в счётчике name.
+    def counted(self, name: str, items: Iterable) -> Iterator:
+        counters = self.counters
+        for item in items:
+            counters[name] += 1
+            yield item
+
+    # Обёртка метода: число вызовов и время. Для ленивых методов (iter_entries) учитывается только создание перебора.
+    def timed(self, name: str, function: Callable) -> Callable:
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            local = self._local
+            depth = getattr(local, 'depth', 0)
+            local.depth = depth + 1
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                local.depth = depth
+                self.calls[name] += 1
+                self.seconds[name] += elapsed
+                if depth == 0:
+                    self.total += elapsed
+
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Any]:
+        phases = {phase: self.phases.get(phase, 0.0) for phase in PHASES}
+        phases["compute"] = max(self.total - sum(phases.values()), 0.0)
+        return {
+            "enabled": True,
+            "calls": dict(self.calls),
+            "seconds": dict(self.seconds),
+            "phases": phases,
+            "bytes_read": self.counters.get("bytes_read", 0),
+            "bytes_written": self.counters.get("bytes_written", 0),
+            "entries_scanned": self.counters.get("entries_scanned", 0),
+        }
+
+
+# Выключенные замеры: те же методы без действий.
+class NullStats:
+
+    enabled = False
+    _timer = nullcontext()
+
+    def add(self, name: str, value: int) -> None:
+        pass
+
+    def timer(self, phase: str):
+        return self._timer
+
+    def counted(self, name: str, items: Iterable) -> Iterable:
+        return items
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        return function
+
+    def reset(self) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"enabled": False}
+
+
+NULL_STATS = NullStats()
@@ -1,44 +1,80 @@
-import os
+import sys
 import json
-from typing import Dict, List, Tuple
-from datetime import datetime
+import pstats
+import asyncio
+import cProfile
+import argparse
+import threading
+from itertools import islice
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from storage import (
+    STORAGE_BACKENDS,
+    EntryNotFoundError,
+    JournalStorage,
+    Storage,
+    convert_amounts,
+    create_storage,
+    import_json_to_journal,
+    import_json_to_shards,
+    import_json_to_sqlite,
+)
+from totals import Totals
+from textindex import TextIndex
+import parallel
+from amounts import bound_to_kopecks
+from indexes import EntryIndexes, date_ordinal, id_order
+from validation import (
+    CATEGORY_ERROR,
+    EMPTY_DATE_ERROR,
+    SUMM_ERROR,
+    SUMM_ROUNDED_MESSAGE,
+    summ_rounded,
+    validate_category,
+    validate_date,
+    validate_summ,
+)
+from bulk import read_entries, write_entries
+from columns import EntryColumns
+from instrumentation import NULL_STATS, Stats
 
 # Функция, обрабатывающая корректный ввод даты.
-def get_date_input(prompt: str = None, error_message: str = "Дата не может быть пустой.") -> str:
+def get_date_input(prompt: str = None, error_message: str = EMPTY_DATE_ERROR) -> str:
     while True:
         date_str = input(prompt)
         if date_str:
             try:
-                datetime.strptime(date_str, '%d-%m-%Y')
-                return date_str
+                return validate_date(date_str)
             except ValueError as e:
-                if (f"time data '{date_str}' does not match format '%d-%m-%Y'") in str(e):
-                    print("Дата должна быть в формате дд-мм-гггг")
+                print(e)
         else:
             print(error_message)
 
 # Функция, обрабатывающая корректный ввод категории.
-def get_category_input(prompt: str = None, error_message: str = "Некорректная категория. Введите 'Доход' или 'Расход'.") -> str:
+def get_category_input(prompt: str = None, error_message: str = CATEGORY_ERROR) -> str:
     while True:
-        category = input(prompt)
-        if category in ("Доход", "Расход"):
-            return category
-        else:
+        try:
+            return validate_category(input(prompt))
+        except ValueError:
             print(error_message)
 
 # Функция, обрабатывающая корректный ввод суммы.
-def get_summ_input(prompt: str = None, error_message: str = "Значение должно быть числом") -> str:
+# Если сумма округлена до копеек, пользователь видит сохраняемое значение.
+def get_summ_input(prompt: str = None, error_message: str = SUMM_ERROR) -> str:
     while True:
+        value = input(prompt)
         try:
-            value = float(input(prompt))
-            if value < 0:
-                raise ValueError("Значение не может быть отрицательным.")
-            return str(value)
+            summ = validate_summ(value)
         except ValueError as e:
-            if "could not convert string to float" in str(e):
+            if str(e) == SUMM_ERROR:
                 print(error_message)
             else:
                 print(e)
+            continue
+        if summ_rounded(value, summ):
+            print(SUMM_ROUNDED_MESSAGE.format(summ))
+        return summ
 
 # Функция для получения словаря с данными добавляемой записи.
 # Применяется для метода add_entry
@@ -75,11 +111,15 @@ def get_id_and_kwargs_for_edit_entry() -> Tuple[str, Dict[str, str]]:
 
     return entry_id, new_values
     
+# Поле поиска по словам в описании в интерактивном меню.
+TEXT_SEARCH_FIELD = "Текст"
+
+
 # Функция для получния пар ключ-значение, представляющих поля и их значения для поиска записей.
 # Применяется для search_entry
 def get_kwargs_for_search_entry() -> Dict[str, str]:
     
-    keys_for_search: List[str] = input("Введите поле для поиска, или несколько полей через пробел (например: Дата, Категория): ").strip().split(' ')
+    keys_for_search: List[str] = input("Введите поле для поиска, или несколько полей через пробел (например: Дата, Категория; Текст - слова в описании): ").strip().split(' ')
     kwargs: Dict[str, str] = {}
 
     input_functions = {
@@ -89,36 +129,393 @@ def get_kwargs_for_search_entry() -> Dict[str, str]:
     }
 
     for key in keys_for_search:
+        # Поле "Текст" - поиск по словам в описании (iter_entries(text=...)).
+        if key == TEXT_SEARCH_FIELD:
+            kwargs["text"] = input("Введите слова для поиска в описании: ")
+            continue
         input_function = input_functions.get(key, input)  # Если для поля нет специальной функции, используется input
         value_for_key_for_search = input_function(f"Введите значение для поля '{key}' поиска: ")
         kwargs[key] = value_for_key_for_search
 
     return kwargs
     
-# Вывод словаря записей. 
-# Применяется для вывода результатов search_entry
-def print_results(results: Dict[str, Dict[str, str]]) -> None:
-    print('\n')
-    for entry_id, entry_data in results.items():
-        print(f"{entry_id}: ")
-        for key, value in entry_data.items():
-            print(f"    {key}: {value}")
-        print(" ")
+REPORT_PERIODS = {"день": "day", "месяц": "month", "год": "year"}
+
+
+# Вывод записей: словаря или потока пар (ID, запись).
+# Применяется для вывода результатов search_entry и iter_entries; каждая запись выводится одним вызовом write.
+def print_results(results: Union[Dict[str, Dict[str, str]], Iterable[Tuple[str, Dict[str, str]]]]) -> None:
+    if isinstance(results, dict):
+        results = results.items()
+    write = sys.stdout.write
+    write('\n\n')
+    for entry_id, entry_data in results:
+        fields = ''.join(f"    {key}: {value}\n" for key, value in entry_data.items())
+        write(f"{entry_id}: \n{fields} \n")
+
+
+# Методы Wallet, для которых при instrument=True считаются вызовы и время.
+INSTRUMENTED_METHODS = (
+    "load_entries", "add_entry", "add_entries", "edit_entry", "search_entry", "iter_entries", "search_range",
+    "get_balance", "get_balance_kopecks", "verify_balance", "period_report", "running_balance", "flush",
+)
 
 
 class Wallet:
 
-    def __init__(self, file_path):
+    # backend - формат хранения: "json" (по умолчанию), "journal", "sqlite" или "sharded" (каталог с файлом на месяц).
+    # В SQLite и каталоге по месяцам баланс, поиск и изменения выполняет хранилище, записи в память не загружаются.
+    # columnar=True - записи хранятся в памяти по столбцам (columns.EntryColumns): в несколько раз меньше памяти,
+    # баланс и поиск считаются по столбцам. Записи в виде словарей по-прежнему доступны по запросу.
+    # flush_interval (секунды) и flush_every (число изменений) включают отложенную запись: изменения копятся
+    # в памяти и сохраняются одной записью в файл через flush_interval после первого изменения или
+    # по достижении flush_every изменений. Чтение сразу видит несохранённые изменения. См. flush() и batch().
+    # instrument=True включает замеры времени и объёмов чтения и записи, см. stats().
+    # pretty=True - файл JSON записывается с отступами (по умолчанию - компактно).
+    # workers - число процессов для поиска без подходящего индекса и полного пересчёта итогов на больших кошельках
+    # (см. модуль parallel); None или 1 - в одном процессе.
+    def __init__(self, file_path: str, backend: str = "json", columnar: bool = False,
+                 flush_interval: Optional[float] = None, flush_every: Optional[int] = None,
+                 instrument: bool = False, pretty: bool = False, workers: Optional[int] = None):
         self.file_path = file_path
+        self.columnar = columnar
+        self.workers = workers
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.storage: Storage = create_storage(file_path, backend)
+        if columnar:
+            self.storage.entries_factory = EntryColumns
+        if pretty:
+            self.storage.pretty = True
         self.initialize_file()
 
+        # Замеры: без instrument методы не оборачиваются, а хранилище пишет замеры в NULL_STATS.
+        self._stats = Stats() if instrument else NULL_STATS
+        self.storage.stats = self._stats
+        for name in INSTRUMENTED_METHODS if instrument else ():
+            setattr(self, name, self._stats.timed(name, getattr(self, name)))
+
+        # Загруженные записи и отпечаток файла, из которого они прочитаны.
+        # Пока файл на диске не изменился, все методы работают с записями в памяти.
+        self._data: Optional[Dict[str, Dict[str, str]]] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+        # Итоги доходов и расходов для загруженных записей (None - ещё не посчитаны).
+        self._totals: Optional[Totals] = None
+        # Вторичные индексы для поиска; строятся при первом поиске.
+        self._indexes: Optional[EntryIndexes] = None
+        # Полнотекстовый индекс по описанию; читается из файла-спутника или строится при первом поиске по тексту.
+        self._text_index: Optional[TextIndex] = None
+        # Индекс изменён после сохранения в файл-спутник; сохраняется в flush().
+        self._text_index_changed: bool = False
+        # Наибольший числовой ID среди загруженных записей (None - ещё не найден).
+        self._last_id: Optional[int] = None
+        # Защищает состояние в памяти при работе с одним кошельком из нескольких потоков.
+        # Изменения держат её, пока меняют записи в памяти, но не во время записи файла (см. _released):
+        # чтение из других потоков не ждёт диска. Изменения одно за другим выполняются под _write_mutex.
+        # Между процессами изменения согласуются блокировкой файла (storage.lock).
+        self._mutex = threading.RLock()
+        self._write_mutex = threading.RLock()
+        # Записи в памяти уже изменены, а файл ещё записывается.
+        self._saving: bool = False
+
+        # Несохранённые изменения в формате журнала (для SQLite - открытая транзакция и число изменений в ней).
+        self._pending: List[Dict] = []
+        self._pending_count: int = 0
+        # Глубина вложенных блоков batch() и таймер сохранения по flush_interval.
+        self._batch_depth: int = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        # Накоплено flush_every изменений: flush() выполняется после завершения изменения.
+        self._flush_due: bool = False
+        # Записи, добавленные при отложенной записи и получившие при сохранении другой ID, потому что файл
+        # тем временем изменил другой процесс: выданный ID -> окончательный. Очищает вызывающий код.
+        self.renumbered: Dict[str, str] = {}
+
     def initialize_file(self):
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as file:
-                file.write('{}')
-        elif os.path.getsize(self.file_path) == 0:
-            with open(self.file_path, 'w') as file:
-                file.write('{}')
+        self.storage.initialize()
+
+    # Замеры с момента создания кошелька (или с прошлого сброса): число вызовов и время методов, время по этапам
+    # (чтение, разбор, запись, вычисления), прочитанные и записанные байты, просмотренные при поиске записи.
+    # Без instrument=True - {"enabled": False}.
+    def stats(self, reset: bool = False) -> Dict:
+        with self._mutex:
+            snapshot = self._stats.snapshot()
+            if reset:
+                self._stats.reset()
+            return snapshot
+
+    # Получение записей: из памяти, если файл не менялся с последней загрузки, иначе - повторное чтение файла.
+    # Файл читается под разделяемой блокировкой, чтобы не прочитать его во время чужой записи.
+    # Пока есть несохранённые изменения, записи всегда берутся из памяти.
+    def load_entries(self) -> Dict[str, Dict[str, str]]:
+
+        with self._mutex:
+            if self._ahead_of_file():
+                self.cache_hits += 1
+                return self._data
+
+            signature = self.storage.signature()
+            if self._data is not None and signature == self._signature:
+                self.cache_hits += 1
+                return self._data
+
+            self.cache_misses += 1
+            with self.storage.lock():
+                signature = self.storage.signature()
+                data = self.storage.load()
+            if self.columnar and not isinstance(data, EntryColumns):
+                data = EntryColumns(data)
+            self._data = data
+            self._signature = signature
+            self._totals = Totals.load(self.file_path, signature)
+            self._indexes = None
+            self._text_index = None
+            self._text_index_changed = False
+            self._last_id = None
+            return self._data
+
+    # Записи в памяти новее файла: есть несохранённые изменения или идёт запись файла.
+    # Пока это так, записи берутся из памяти, а итоги и индексы не сохраняются с отпечатком файла.
+    def _ahead_of_file(self) -> bool:
+        return bool(self._pending) or self._saving
+
+    # Сброс кэша: следующее обращение перечитает файл целиком.
+    def invalidate_cache(self) -> None:
+        self.storage.forget()
+        self._data = None
+        self._signature = None
+        self._totals = None
+        self._indexes = None
+        self._text_index = None
+        self._text_index_changed = False
+        self._last_id = None
+
+    # Запоминание отпечатка файла после собственной записи, чтобы она не считалась внешним изменением.
+    # Итоги сохраняются с тем же отпечатком. Полнотекстовый индекс (если он загружен) обновлён в памяти;
+    # его файл-спутник перезаписывался бы целиком при каждом изменении, поэтому он удаляется
+    # и записывается заново при flush() (в том числе при выходе из блока with).
+    def _remember_signature(self) -> None:
+        self._signature = self.storage.signature()
+        if self._totals is not None:
+            self._totals.save(self.file_path, self._signature)
+        if self._text_index is not None and not self._text_index_changed:
+            self._text_index_changed = True
+            TextIndex.discard(self.file_path)
+
+    # Сохранение изменённого полнотекстового индекса с отпечатком сохранённого файла данных.
+    def _save_text_index(self) -> None:
+        if self._text_index_changed and not self._ahead_of_file():
+            self._text_index.save(self.file_path, self._signature)
+            self._text_index_changed = False
+
+    # Индексы для загруженных записей; строятся при первом обращении.
+    def _get_indexes(self) -> EntryIndexes:
+        data = self.load_entries()
+        if self._indexes is None:
+            self._indexes = EntryIndexes(data)
+        return self._indexes
+
+    # Полнотекстовый индекс для загруженных записей: из файла-спутника, если он записан для этой версии файла,
+    # иначе - построенный по записям. Пока есть несохранённые изменения, построенный индекс сохраняется в flush().
+    def _get_text_index(self) -> TextIndex:
+        data = self.load_entries()
+        if self._text_index is None:
+            if not self._ahead_of_file():
+                self._text_index = TextIndex.load(self.file_path, self._signature)
+            if self._text_index is None:
+                self._text_index = TextIndex.from_entries(data)
+                self._text_index_changed = True
+                self._save_text_index()
+        return self._text_index
+
+    # Итоги для загруженных записей; при отсутствии сохранённых итогов считаются полным проходом.
+    def _get_totals(self) -> Totals:
+        data = self.load_entries()
+        if self._totals is None:
+            self._totals = self._count_totals(data)
+            if not self._ahead_of_file():
+                self._totals.save(self.file_path, self._signature)
+        return self._totals
+
+    # Изменение кошелька: исключительная блокировка файла на всё время изменения.
+    # Если сохранение не удалось, состояние в памяти сбрасывается и будет перечитано из файла.
+    # Несохранённые изменения при этом не сбрасываются, поэтому изменения проверяют записи (в том числе
+    # подсчитывают суммы в итогах) до того, как изменить записи в памяти: ошибка проверки не оставляет
+    # в памяти изменения, которого нет в очереди на запись.
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._write_mutex:
+            with self._mutex, self.storage.lock(exclusive=True):
+                try:
+                    yield
+                except BaseException:
+                    if not self._pending:
+                        self.invalidate_cache()
+                    raise
+            self._flush_if_due()
+
+    # Запись файла без блокировки состояния в памяти: записи в памяти уже изменены, и чтение из других потоков
+    # получает их, не дожидаясь записи. Другие изменения ждут _write_mutex и блокировку файла.
+    @contextmanager
+    def _released(self) -> Iterator[None]:
+        self._saving = True
+        self._mutex.release()
+        try:
+            yield
+        finally:
+            self._mutex.acquire()
+            self._saving = False
+
+    def _buffering(self) -> bool:
+        return self.flush_interval is not None or self.flush_every is not None or self._batch_depth > 0
+
+    # Сохранение изменения: сразу (write) или, при отложенной записи, добавлением records в очередь.
+    def _save(self, records: List[Dict], write) -> None:
+        if not self._buffering():
+            with self._released():
+                write()
+            self._remember_signature()
+            return
+        self._pending.extend(records)
+        self._buffered(len(records))
+
+    # Изменение в хранилище с запросами: при отложенной записи выполняется внутри открытой транзакции.
+    # Хранилище с запросами одно на все потоки (соединение SQLite, манифест каталога), поэтому чтение ждёт изменений.
+    def _query(self, operation, count: int = 1):
+        with self._mutex:
+            if not self._buffering():
+                return operation()
+            self.storage.begin()
+            result = operation()
+            self._buffered(count)
+        self._flush_if_due()
+        return result
+
+    # Учёт несохранённых изменений: сохранение по числу изменений (после завершения изменения) или запуск таймера.
+    def _buffered(self, count: int) -> None:
+        self._pending_count += count
+        if self.flush_every is not None and self._pending_count >= self.flush_every:
+            self._flush_due = True
+        elif self.flush_interval is not None and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_if_due(self) -> None:
+        if self._flush_due:
+            self.flush()
+
+    # Сохранение накопленных изменений одной записью в файл (одним COMMIT для SQLite).
+    # Если файл тем временем изменил другой процесс, он перечитывается и изменения применяются заново;
+    # добавленные записи в этом случае получают следующие свободные ID.
+    # При ошибке записи изменения остаются в очереди и будут сохранены следующим вызовом flush().
+    # Здесь же сохраняется полнотекстовый индекс, изменённый с прошлого сохранения.
+    def flush(self) -> None:
+
+        with self._write_mutex, self._mutex:
+            self._flush_due = False
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if self.storage.queryable:
+                self.renumbered.update(self.storage.commit())
+                self._pending_count = 0
+                return
+
+            if not self._pending:
+                self._save_text_index()
+                return
+            with self.storage.lock(exclusive=True):
+                records = self._pending
+                if self.storage.signature() != self._signature:
+                    records = self._replay(records)
+                with self._released():
+                    self.storage.write_batch(self._data, records)
+                self._pending = []
+                self._pending_count = 0
+                self._remember_signature()
+            self._save_text_index()
+
+    # Повторное применение несохранённых изменений к перечитанному файлу. Возвращает операции с окончательными ID.
+    def _replay(self, records: List[Dict]) -> List[Dict]:
+        self._pending = []
+        try:
+            self.invalidate_cache()
+            data = self.load_entries()
+            totals = self._get_totals()
+            new_ids: Dict[str, str] = {}
+            replayed: List[Dict] = []
+            for record in records:
+                if record["op"] == "add":
+                    entry_id = self._allocate_id(data)
+                    new_ids[record["id"]] = entry_id
+                    data[entry_id] = record["entry"]
+                    totals.add(record["entry"])
+                    replayed.append({"op": "add", "id": entry_id, "entry": record["entry"]})
+                else:
+                    entry_id = new_ids.get(record["id"], record["id"])
+                    old_entry = data[entry_id]
+                    entry = dict(old_entry)
+                    entry.update(record["fields"])
+                    data[entry_id] = entry
+                    totals.remove(old_entry)
+                    totals.add(entry)
+                    replayed.append({"op": "edit", "id": entry_id, "fields": record["fields"]})
+        except BaseException:
+            self._pending = records
+            raise
+        self._pending = replayed
+        self.renumbered.update((old_id, entry_id) for old_id, entry_id in new_ids.items() if old_id != entry_id)
+        return replayed
+
+    # Отложенная запись на время блока: все изменения внутри сохраняются одной записью в файл при выходе.
+    @contextmanager
+    def batch(self) -> Iterator["Wallet"]:
+        with self._mutex:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._mutex:
+                self._batch_depth -= 1
+                finished = not self._buffering()
+            if finished:
+                self.flush()
+
+    def __enter__(self) -> "Wallet":
+        return self
+
+    # При выходе из блока with несохранённые изменения записываются.
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    # Чтение из нескольких потоков: пока блок выполняется, записи в памяти этого процесса не изменяются.
+    # Нужно при ленивом переборе (iter_entries), если параллельно идут изменения, например в HTTP-сервере.
+    # Запись файла другим потоком блок не ждёт: изменение к этому времени уже видно в памяти.
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        with self._mutex:
+            yield
+
+    # Выделение следующего ID: на единицу больше наибольшего числового ID.
+    # Вызывается под исключительной блокировкой после перечитывания файла, поэтому ID не повторяются
+    # даже при одновременной записи из нескольких процессов.
+    def _allocate_id(self, data: Dict[str, Dict[str, str]]) -> str:
+        if self._last_id is None:
+            self._last_id = max((int(entry_id) for entry_id in data if entry_id.isdigit()), default=0)
+        self._last_id += 1
+        return str(self._last_id)
+
+    # Подсчёт итогов полным проходом (для колоночного хранения - по столбцам, для больших кошельков - в нескольких процессах).
+    def _count_totals(self, data: Dict[str, Dict[str, str]]) -> Totals:
+        if isinstance(data, EntryColumns):
+            return Totals(*data.sums())
+        if parallel.enabled(data, self.workers):
+            return parallel.totals(data, self.workers)
+        return Totals.from_entries(data.values())
 
     # 1. Вывод баланса: Показать текущий баланс, а также отдельно доходы и расходы.
     def show_balance(self) -> None:
@@ -129,129 +526,470 @@ class Wallet:
         print(f"Сумма расходов: {total_expense}")
 
     # 2. Добавление новой записи о доходе или расходе.
+    # Изменения выполняются под исключительной блокировкой файла: записи перечитываются, если файл
+    # изменил другой процесс, затем новая версия атомарно сохраняется.
     def add_entry(self, entry_data: Dict[str, str]) -> None:
 
-        with open(self.file_path, 'r+') as file:
-            try:
-                data: Dict[str, Dict[str, str]] = json.load(file)
-            except json.JSONDecodeError:
-                raise ValueError("Некорректный формат файла JSON.")
+        if self.storage.queryable:
+            self._query(lambda: self.storage.insert([entry_data]))
+            return
 
-            entry_id = str(len(data) + 1)
+        with self._writing():
+            data: Dict[str, Dict[str, str]] = self.load_entries()
+
+            totals = self._get_totals()
+
+            totals.add(entry_data)
+            entry_id = self._allocate_id(data)
             data[entry_id] = entry_data
+            if self._indexes is not None:
+                self._indexes.add(entry_id, entry_data)
+            if self._text_index is not None:
+                self._text_index.add(entry_id, entry_data)
 
-            file.seek(0)
-            json.dump(data, file, indent=4, ensure_ascii=False)
+            self._save([{"op": "add", "id": entry_id, "entry": entry_data}],
+                       lambda: self.storage.add(data, entry_id, entry_data))
             
+    # Пакетное добавление записей: ID назначаются подряд, все записи сохраняются одной записью в файл.
+    # Записи не проверяются (как и в add_entry); для проверки используется bulk.read_entries.
+    # Возвращает список ID добавленных записей.
+    def add_entries(self, entries: Iterable[Dict[str, str]]) -> List[str]:
+
+        # Входные данные читаются до блокировки, чтобы не задерживать другие процессы на время разбора файла.
+        entries = list(entries)
+        if not entries:
+            return []
+
+        if self.storage.queryable:
+            return self._query(lambda: self.storage.insert(entries), len(entries))
+
+        with self._writing():
+            data: Dict[str, Dict[str, str]] = self.load_entries()
+            totals = self._get_totals()
+
+            # Итоги добавляемых записей считаются заранее: запись с некорректной суммой прерывает
+            # добавление до изменения записей в памяти.
+            totals.merge(Totals.from_entries(entries))
+
+            added: List[Tuple[str, Dict[str, str]]] = []
+            for entry_data in entries:
+                entry_id = self._allocate_id(data)
+                data[entry_id] = entry_data
+                added.append((entry_id, entry_data))
+                if self._indexes is not None:
+                    self._indexes.add(entry_id, entry_data)
+                if self._text_index is not None:
+                    self._text_index.add(entry_id, entry_data)
+
+            self._save([{"op": "add", "id": entry_id, "entry": entry_data} for entry_id, entry_data in added],
+                       lambda: self.storage.add_many(data, added))
+            return [entry_id for entry_id, _ in added]
+
     # 3. Редактирование записи: Изменение существующей записи.
     def edit_entry(self, entry_id: str, **kwargs: Dict[str, str]) -> None:
 
-        with open(self.file_path, 'r+') as file:
-            try:
-                data: Dict[str, Dict[str, str]] = json.load(file)
-            except json.JSONDecodeError:
-                raise ValueError("Некорректный формат файла JSON.")
-            
+        if self.storage.queryable:
+            self._query(lambda: self.storage.update(entry_id, kwargs))
+            return
+
+        with self._writing():
+            data: Dict[str, Dict[str, str]] = self.load_entries()
+
             if entry_id not in data:
-                raise ValueError(f"Запись с ID {entry_id} не найдена.")
-    
-            entry: Dict[str, str] = data[entry_id]
+                raise EntryNotFoundError(entry_id)
 
-            for key, value in kwargs.items():
-                if key in entry:
-                    entry[key] = value
-                else:
+            old_entry: Dict[str, str] = data[entry_id]
+
+            for key in kwargs:
+                if key not in old_entry:
                     raise ValueError(f"Поле '{key}' не найдено в записи.")
-            
-            file.seek(0)
-            file.truncate()
 
-            json.dump(data, file, indent=4, ensure_ascii=False)
-    
+            totals = self._get_totals()
+            entry = dict(old_entry)
+            entry.update(kwargs)
+            totals.add(entry)
+            totals.remove(old_entry)
+            data[entry_id] = entry
+            if self._indexes is not None:
+                self._indexes.update(entry_id, old_entry, entry)
+            if self._text_index is not None:
+                self._text_index.update(entry_id, old_entry, entry)
+
+            self._save([{"op": "edit", "id": entry_id, "fields": kwargs}],
+                       lambda: self.storage.edit(data, entry_id, kwargs))
+
     # 4. Поиск по записям: Поиск записей по категории, дате, сумме или описанию.
     # Поиск доступен как по одному полю, так и по нескольким полям (проверяется совпадение сразу нескольких полей)
+    # Если среди полей есть проиндексированные (Категория, Дата, Сумма), проверяются только записи
+    # из самого короткого списка индекса, иначе - все записи. При колоночном хранении поиск идёт по столбцам.
+    # text - поиск по словам описания (см. textindex.TextIndex), сочетается с условиями по полям:
+    # search_entry(text="покупки", Категория="Расход").
     def search_entry(self, **kwargs: Dict[str, str]) -> Dict[str, Dict[str, str]]:
-        
-        with open(self.file_path, 'r') as file:
-            try:
-                data: Dict[str, Dict[str, str]] = json.load(file)
-            except json.JSONDecodeError:
-                raise ValueError("Некорректный формат файла JSON.")
+        with self.reading():
+            return dict(self.iter_entries(**kwargs))
+
+    # Ленивый поиск: пары (ID, запись) выдаются по одной, без построения словаря результатов.
+    # offset - сколько найденных записей пропустить, limit - сколько выдать (None - все).
+    # Во время перебора кошелёк нельзя изменять: если изменения идут из других потоков, перебор выполняется
+    # в блоке reading(). Остальные методы чтения держат блокировку сами.
+    def iter_entries(self, limit: Optional[int] = None, offset: int = 0, text: Optional[str] = None,
+                     **kwargs: Dict[str, str]) -> Iterator[Tuple[str, Dict[str, str]]]:
+
+        if self.storage.queryable:
+            return self.storage.search(kwargs, limit, offset, text)
+
+        data: Dict[str, Dict[str, str]] = self.load_entries()
+        stop = None if limit is None else offset + limit
+
+        if text is not None:
+            # Записи с нужными словами в описании. Если по условиям полей список индекса короче,
+            # перебирается он, а совпадение слов проверяется по множеству найденных ID.
+            matches = self._get_text_index().matches(text)
+            candidates = None if isinstance(data, EntryColumns) else self._get_indexes().candidates(kwargs)
+            if candidates is None or len(candidates) >= len(matches):
+                candidates = sorted(matches, key=id_order)
+            else:
+                candidates = [entry_id for entry_id in candidates if entry_id in matches]
+        elif isinstance(data, EntryColumns):
+            return islice(data.search(kwargs), offset, stop)
+        else:
+            candidates = self._get_indexes().candidates(kwargs)
+            if candidates is None and parallel.enabled(data, self.workers):
+                # Ни одно поле запроса не проиндексировано: записи проверяются в нескольких процессах.
+                self._stats.add("entries_scanned", len(data))
+                matches = ((entry_id, data[entry_id]) for entry_id in parallel.search(data, kwargs, self.workers))
+                return islice(matches, offset, stop)
+        if candidates is None:
+            candidates = data
+        if self._stats.enabled:
+            candidates = self._stats.counted("entries_scanned", candidates)
+
+        matches = (
+            (entry_id, data[entry_id]) for entry_id in candidates
+            if self._matches(data[entry_id], kwargs)
+        )
+        return islice(matches, offset, stop)
+
+    @staticmethod
+    def _matches(entry: Dict[str, str], criteria: Dict[str, str]) -> bool:
+        for key, value in criteria.items():
+            if key in entry and value == entry[key]:
+                continue
+            else:
+                return False
+        return True
 
-            results: Dict[str, Dict[str, str]] = {}
+    # Поиск по диапазонам: даты в формате дд-мм-гггг (включительно), суммы в рублях (включительно) и, при необходимости, категория.
+    # Любую границу можно не указывать. Результаты упорядочены по дате.
+    def search_range(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                     min_sum: Optional[float] = None, max_sum: Optional[float] = None,
+                     category: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+
+        try:
+            ordinal_from = date_ordinal(date_from) if date_from else None
+            ordinal_to = date_ordinal(date_to) if date_to else None
+        except ValueError:
+            raise ValueError("Дата должна быть в формате дд-мм-гггг")
+        # Суммы сравниваются в копейках; граница с долями копейки округляется внутрь диапазона.
+        min_sum = None if min_sum is None else bound_to_kopecks(min_sum, upper=False)
+        max_sum = None if max_sum is None else bound_to_kopecks(max_sum, upper=True)
+
+        if self.storage.queryable:
+            return dict(self.storage.search_range(ordinal_from, ordinal_to, min_sum, max_sum, category))
+
+        with self.reading():
+            data: Dict[str, Dict[str, str]] = self.load_entries()
+            candidates = self._get_indexes().range_candidates(ordinal_from, ordinal_to, min_sum, max_sum)
+            if self._stats.enabled:
+                candidates = self._stats.counted("entries_scanned", candidates)
 
-            for entry_id, entry in data.items():
-                match_all_criteria = True
-                for key, value in kwargs.items():
-                    if key in entry and value == entry[key]:
-                        continue
-                    else:
-                        match_all_criteria = False
-                        break
-                if match_all_criteria:
+            results: Dict[str, Dict[str, str]] = {}
+            for entry_id in candidates:
+                entry = data[entry_id]
+                if category is None or entry.get("Категория") == category:
                     results[entry_id] = entry
 
             return results
-            
-    # Функция для получения кортежа с тремя элементами: общий баланс, сумма доходов, сумма расходов.
-    # Применяется для метода show_balance
+
+    # Доходы, расходы и баланс по периодам ("day", "month", "year").
+    # Считаются векторно в модуле reports (требуется NumPy); быстрее всего - при колоночном хранении.
+    def period_report(self, period: str = "month") -> List[Tuple[str, float, float, float]]:
+        import reports
+        with self.reading():
+            return reports.period_report(self.load_entries(), period)
+
+    # Баланс нарастающим итогом на конец каждого дня, в котором есть записи.
+    def running_balance(self) -> List[Tuple[str, float]]:
+        import reports
+        with self.reading():
+            return reports.running_balance(self.load_entries())
+
+    # Итоги поддерживаются при каждом изменении, поэтому баланс не требует прохода по записям.
+    # Если файл не загружен, итоги берутся из файла-спутника, когда он соответствует файлу данных.
     def get_balance(self) -> Tuple[float, float, float]:
+        return tuple(kopecks / 100 for kopecks in self.get_balance_kopecks())
 
-        total_income: float = 0
-        total_expense: float = 0
+    # Баланс, доходы и расходы в целых копейках - точные значения для сверки.
+    def get_balance_kopecks(self) -> Tuple[int, int, int]:
 
-        with open(self.file_path, 'r') as file:
-            try:
-                data: Dict[str, Dict[str, str]] = json.load(file)
-            except json.JSONDecodeError:
-                raise ValueError("Некорректный формат файла JSON.")
-            
-            for entry in data.values():
-                if entry["Категория"] == "Доход":
-                    total_income += float(entry["Сумма"])
-                elif entry["Категория"] == "Расход":
-                    total_expense += float(entry["Сумма"])
-        
-        total_balance: float = total_income - total_expense
-        return total_balance, total_income, total_expense
-    
-    
-def main():
+        if self.storage.queryable:
+            return self.storage.balance()
+
+        with self.reading():
+            signature = self.storage.signature()
+            if not self._ahead_of_file() and (self._data is None or signature != self._signature):
+                totals = Totals.load(self.file_path, signature)
+                if totals is not None:
+                    return totals.balance_kopecks()
+
+            return self._get_totals().balance_kopecks()
+
+    # Проверка итогов: пересчёт полным проходом по записям и сравнение с хранимыми значениями.
+    # Возвращает расхождение (хранимое минус фактическое) для доходов и расходов; итоги заменяются пересчитанными.
+    # В хранилище с запросами итоги сверяет само хранилище (для SQLite они считаются агрегатом, расхождения нет).
+    def verify_balance(self) -> Tuple[float, float]:
+
+        if self.storage.queryable:
+            self.flush()
+            income_drift, expense_drift = self.storage.verify_totals()
+            return income_drift / 100, expense_drift / 100
 
-    file_path = 'data.json'
-    wallet = Wallet(file_path)
+        # Итоги в файле-спутнике относятся к сохранённым записям, поэтому сначала сохраняются отложенные изменения.
+        self.flush()
+        with self.reading():
+            stored = self._get_totals()
+            actual = self._count_totals(self.load_entries())
+            drift = ((stored.income_kopecks - actual.income_kopecks) / 100,
+                     (stored.expense_kopecks - actual.expense_kopecks) / 100)
 
+            self._totals = actual
+            actual.save(self.file_path, self._signature)
+            return drift
+
+
+# Вывод отчёта по периодам.
+def print_report(rows: List[Tuple[str, float, float, float]]) -> None:
+    lines = [f"{'Период':<12}{'Доходы':>16}{'Расходы':>16}{'Баланс':>16}"]
+    for period, income, expense, balance in rows:
+        lines.append(f"{period:<12}{income:>16.2f}{expense:>16.2f}{balance:>16.2f}")
+    print('\n'.join(lines))
+
+
+# Вывод баланса нарастающим итогом.
+def print_running_balance(rows: List[Tuple[str, float]]) -> None:
+    print('\n'.join(f"{day:<12}{balance:>16.2f}" for day, balance in rows))
+
+
+# Функция для получения периода отчёта.
+# Применяется для пункта меню "Отчёт по периодам"
+def get_period_input(prompt: str = None, error_message: str = "Некорректный период. Введите 'день', 'месяц' или 'год'.") -> str:
     while True:
+        period = REPORT_PERIODS.get(input(prompt).strip().lower())
+        if period:
+            return period
+        print(error_message)
+
+
+# Условие отбора вида "Поле=Значение" для подкоманд командной строки.
+def parse_condition(condition: str) -> Tuple[str, str]:
+    key, separator, value = condition.partition('=')
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"Условие должно иметь вид Поле=Значение: {condition}")
+    return key, value
+
+
+# Разбор аргументов командной строки.
+# Без подкоманды запускается интерактивное меню.
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Учёт личных доходов и расходов.")
+    parser.add_argument("--file", default="data.json", help="Путь к файлу данных.")
+    parser.add_argument("--backend", default="json", choices=sorted(STORAGE_BACKENDS), help="Формат хранилища.")
+    parser.add_argument("--flush-interval", type=float, metavar="МС",
+                        help="Отложенная запись: сохранять изменения не чаще, чем раз в указанное число миллисекунд.")
+    parser.add_argument("--flush-every", type=int, metavar="N",
+                        help="Отложенная запись: сохранять изменения после каждых N изменений.")
+    parser.add_argument("--pretty", action="store_true", help="Записывать файл JSON с отступами.")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="Число процессов для поиска без индекса и пересчёта итогов (0 - по числу ядер).")
+    parser.add_argument("--profile", metavar="ФАЙЛ",
+                        help="Профилировать сеанс (cProfile): сохранить профиль в файл и вывести сводку и замеры кошелька.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    compact_parser = subparsers.add_parser("compact", help="Сжать журнал в один снимок.")
+    compact_parser.add_argument("journal", help="Путь к файлу журнала.")
+
+    subparsers.add_parser("verify", help="Пересчитать итоги и сообщить о расхождениях.")
+
+    import_parser = subparsers.add_parser("import", help="Загрузить записи из файла CSV или JSON Lines.")
+    import_parser.add_argument("source", help="Путь к файлу .csv или .jsonl.")
+
+    export_parser = subparsers.add_parser("export", help="Выгрузить записи в файл CSV или JSON Lines.")
+    export_parser.add_argument("target", help="Путь к файлу .csv или .jsonl.")
+    export_parser.add_argument("--where", action="append", default=[], type=parse_condition, metavar="ПОЛЕ=ЗНАЧЕНИЕ",
+                               help="Условие отбора записей; можно указать несколько.")
+    export_parser.add_argument("--text", help="Отбор по словам в описании.")
+
+    report_parser = subparsers.add_parser("report", help="Доходы, расходы и баланс по периодам.")
+    report_parser.add_argument("--period", default="month", choices=("day", "month", "year"), help="Период группировки.")
+    report_parser.add_argument("--running", action="store_true", help="Баланс нарастающим итогом по дням.")
+    report_parser.add_argument("--columnar", action="store_true", help="Загрузить записи в колоночном виде.")
+
+    migrate_parser = subparsers.add_parser("migrate", help="Перенести data.json в журнал, базу SQLite или каталог по месяцам.")
+    migrate_parser.add_argument("source", help="Путь к исходному JSON-файлу.")
+    migrate_parser.add_argument("target", help="Путь к создаваемому файлу журнала, базы или каталогу.")
+    migrate_parser.add_argument("--to", default="journal", choices=("journal", "sqlite", "sharded"), help="Формат назначения.")
+
+    subparsers.add_parser("convert-amounts", help="Округлить суммы в записях до копеек (для файлов прежнего формата).")
+
+    serve_parser = subparsers.add_parser("serve", help="Запустить HTTP API кошелька.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Адрес для подключений.")
+    serve_parser.add_argument("--port", type=int, default=8080, help="Порт.")
+
+    return parser.parse_args(argv)
+
+
+# Кошелёк с параметрами отложенной записи и параллельного перебора из командной строки.
+def open_wallet(args: argparse.Namespace) -> Wallet:
+    flush_interval = None if args.flush_interval is None else args.flush_interval / 1000
+    return Wallet(args.file, backend=args.backend, flush_interval=flush_interval, flush_every=args.flush_every,
+                  instrument=args.profile is not None, pretty=args.pretty, workers=get_workers(args))
+
+
+def get_workers(args: argparse.Namespace) -> Optional[int]:
+    return parallel.default_workers() if args.workers == 0 else args.workers
+
+
+# Ошибки в данных и файлах подкоманды (некорректная строка при загрузке, неподдерживаемый формат, нет файла)
+# выводятся в stderr одной строкой, и программа завершается с кодом 1.
+@contextmanager
+def reported_errors() -> Iterator[None]:
+    try:
+        yield
+    except (ValueError, OSError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_command(args: argparse.Namespace) -> None:
+
+    if args.command == "compact":
+        JournalStorage(args.journal).compact()
+        print(f"Журнал {args.journal} сжат.")
+
+    elif args.command == "verify":
+        income_drift, expense_drift = Wallet(args.file, backend=args.backend, workers=get_workers(args)).verify_balance()
+        if income_drift or expense_drift:
+            print(f"Расхождение доходов: {income_drift}")
+            print(f"Расхождение расходов: {expense_drift}")
+        else:
+            print("Итоги совпадают с записями.")
+
+    elif args.command == "import":
+        entry_ids = Wallet(args.file, backend=args.backend, pretty=args.pretty).add_entries(read_entries(args.source))
+        print(f"Загружено записей: {len(entry_ids)}")
+
+    elif args.command == "export":
+        criteria = dict(args.where)
+        wallet = Wallet(args.file, backend=args.backend, workers=get_workers(args))
+        count = write_entries(args.target, wallet.iter_entries(text=args.text, **criteria))
+        print(f"Выгружено записей: {count}")
+
+    elif args.command == "report":
+        wallet = Wallet(args.file, backend=args.backend, columnar=args.columnar)
+        if args.running:
+            print_running_balance(wallet.running_balance())
+        else:
+            print_report(wallet.period_report(args.period))
 
-        print("\n")
-        print("1. Показать баланс")
-        print("2. Добавить запись")
-        print("3. Редактировать запись")
-        print("4. Поиск записей")
-        print("5. Выйти")
-        print("\n")
+    elif args.command == "migrate":
+        if args.to == "sqlite":
+            count = import_json_to_sqlite(args.source, args.target)
+        elif args.to == "sharded":
+            count = import_json_to_shards(args.source, args.target)
+        else:
+            count = import_json_to_journal(args.source, args.target)
+        print(f"Перенесено записей: {count}")
 
-        choice = input("Выберите действие: ")
+    elif args.command == "convert-amounts":
+        count = convert_amounts(args.file, args.backend)
+        print(f"Преобразовано записей: {count}")
 
-        if choice == "1":
-            wallet.show_balance()
+    elif args.command == "serve":
+        from server import serve
+        try:
+            asyncio.run(serve(open_wallet(args), args.host, args.port))
+        except KeyboardInterrupt:
+            print("Сервер остановлен.")
+
+
+# Сколько строк профиля выводится после сеанса с --profile.
+PROFILE_LINES = 25
+
+
+def main(argv: Optional[List[str]] = None):
+
+    args = parse_args(argv)
+    if args.profile is None:
+        run_session(args)
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run_session, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_LINES)
+
+
+# Выполнение подкоманды или интерактивное меню.
+def run_session(args: argparse.Namespace) -> None:
+
+    if args.command:
+        with reported_errors():
+            run_command(args)
+        return
+
+    # При любом выходе из меню (в том числе по Ctrl+C) несохранённые изменения записываются.
+    with open_wallet(args) as wallet:
+        while True:
+
+            print("\n")
+            print("1. Показать баланс")
+            print("2. Добавить запись")
+            print("3. Редактировать запись")
+            print("4. Поиск записей")
+            print("5. Выйти")
+            print("6. Отчёт по периодам")
+            print("\n")
+
+            choice = input("Выберите действие: ")
+
+            if choice == "1":
+                wallet.show_balance()
             
-        elif choice == "2":
-            wallet.add_entry(get_entry_data_for_add_entry())
+            elif choice == "2":
+                wallet.add_entry(get_entry_data_for_add_entry())
 
-        elif choice == "3":
-            entry_id, kwargs = get_id_and_kwargs_for_edit_entry()
-            wallet.edit_entry(entry_id, **kwargs)
+            elif choice == "3":
+                entry_id, kwargs = get_id_and_kwargs_for_edit_entry()
+                wallet.edit_entry(entry_id, **kwargs)
 
-        elif choice == "4":
-            kwargs = get_kwargs_for_search_entry()
-            print_results(wallet.search_entry(**kwargs))
+            elif choice == "4":
+                kwargs = get_kwargs_for_search_entry()
+                print_results(wallet.iter_entries(**kwargs))
             
-        elif choice == "5":
-            break
+            elif choice == "5":
+                break
 
-        else:
-            print("Неверный выбор. Пожалуйста, выберите действие из списка.")
+            # Пункт 6 добавлен после "Выйти", чтобы прежний номер выхода не изменился.
+            elif choice == "6":
+                print_report(wallet.period_report(get_period_input("Введите период (день/месяц/год): ")))
+
+            else:
+                print("Неверный выбор. Пожалуйста, выберите действие из списка.")
+
+    if args.profile is not None:
+        print(json.dumps(wallet.stats(), indent=4, ensure_ascii=False), file=sys.stderr)
 
 
 if __name__ == "__main__":
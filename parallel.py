@@ -0,0 +1,95 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from totals import Totals
+
+Entries = Dict[str, Dict[str, str]]
+
+# Параллельный перебор записей в нескольких процессах (ProcessPoolExecutor): поиск по условиям, которые не покрывает
+# ни один индекс, и полный пересчёт итогов. Записи делятся на равные части по порядку; каждый процесс проверяет
+# или суммирует свою часть, результаты объединяются в исходном порядке - так же, как при переборе в одном процессе.
+# Процессы создаются через fork и получают записи из памяти родителя без копирования и сериализации;
+# обратно передаются только ID найденных записей или суммы. Где fork недоступен (Windows), перебор идёт в одном процессе.
+# Fork процесса с несколькими потоками небезопасен (дочерний процесс может унаследовать чужую захваченную блокировку),
+# поэтому процессы запускаются только из единственного потока процесса: в HTTP-сервере и при работающем таймере
+# отложенной записи перебор идёт в одном процессе.
+
+# Наименьшее число записей для параллельного перебора. Значение по умолчанию, а не измеренная точка окупаемости:
+# на каждый запрос создаётся пул процессов, и на машине с одним ядром параллельный перебор 1 млн записей
+# был вдвое медленнее последовательного. Подбирается по benchmarks/parallel_bench.py на целевой машине.
+MIN_ENTRIES = 50000
+
+try:
+    CONTEXT = multiprocessing.get_context("fork")
+except ValueError:
+    CONTEXT = None
+
+# Записи и их ID для процессов-исполнителей: задаются перед созданием пула и наследуются при fork.
+# Запуск возможен только из единственного потока (см. enabled), поэтому _shared не нужна блокировка.
+_shared: Dict[str, object] = {}
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# Стоит ли перебирать записи параллельно: задано больше одного процесса, доступен fork, записей достаточно много
+# и в процессе нет других потоков. Колоночное хранение (columns.EntryColumns) считается по столбцам в одном процессе.
+def enabled(data: Entries, workers: Optional[int]) -> bool:
+    return (workers is not None and workers > 1 and CONTEXT is not None
+            and type(data) is dict and len(data) >= MIN_ENTRIES and threading.active_count() == 1)
+
+
+# Границы частей [start, stop) для count записей.
+def split(count: int, parts: int) -> List[Tuple[int, int]]:
+    size, rest = divmod(count, parts)
+    bounds = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < rest else 0)
+        if stop > start:
+            bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _run(function: Callable, data: Entries, workers: int, *args) -> list:
+    ids = list(data)
+    _shared["data"], _shared["ids"] = data, ids
+    try:
+        with ProcessPoolExecutor(workers, mp_context=CONTEXT) as pool:
+            return list(pool.map(function, [(start, stop, *args) for start, stop in split(len(ids), workers)]))
+    finally:
+        _shared.clear()
+
+
+def _search_part(task: Tuple[int, int, Dict[str, str]]) -> List[str]:
+    start, stop, criteria = task
+    data = _shared["data"]
+    found = []
+    for entry_id in _shared["ids"][start:stop]:
+        entry = data[entry_id]
+        if all(key in entry and entry[key] == value for key, value in criteria.items()):
+            found.append(entry_id)
+    return found
+
+
+def _totals_part(task: Tuple[int, int]) -> Tuple[int, int]:
+    start, stop = task
+    data = _shared["data"]
+    totals = Totals.from_entries(data[entry_id] for entry_id in _shared["ids"][start:stop])
+    return totals.income_kopecks, totals.expense_kopecks
+
+
+# ID записей, у которых совпадают все поля criteria (семантика search_entry), в порядке записей.
+def search(data: Entries, criteria: Dict[str, str], workers: int) -> List[str]:
+    return [entry_id for part in _run(_search_part, data, workers, criteria) for entry_id in part]
+
+
+# Итоги доходов и расходов полным проходом по записям; ошибка разбора суммы передаётся как при переборе в одном процессе.
+def totals(data: Entries, workers: int) -> Totals:
+    parts = _run(_totals_part, data, workers)
+    return Totals(sum(income for income, _ in parts), sum(expense for _, expense in parts))
@@ -0,0 +1,112 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from amounts import to_kopecks
+from columns import CATEGORY_CODES, EntryColumns
+from indexes import date_ordinal
+
+Entries = Dict[str, Dict[str, str]]
+
+# Отчёты по доходам и расходам: данные один раз переводятся в массивы NumPy,
+# группировка и суммирование выполняются векторно (bincount по номеру периода, cumsum) без сортировки.
+# Суммы складываются в копейках: целые значения в float64 складываются точно, пока итог меньше 2**53 копеек.
+
+PERIODS = ("day", "month", "year")
+INCOME = CATEGORY_CODES["Доход"]
+EXPENSE = CATEGORY_CODES["Расход"]
+# Номер дня 1970-01-01: от него отсчитываются даты в datetime64.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+# Столбцы для отчёта: суммы в копейках, номера дней и коды категорий.
+# Для колоночного хранения массивы создаются без копирования поверх array/bytearray.
+# Записи без корректной даты в отчёт не попадают.
+def load_arrays(data: Entries) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+    if isinstance(data, EntryColumns):
+        amounts = np.frombuffer(data.amounts, dtype=np.int64)
+        ordinals = np.frombuffer(data.dates, dtype=np.int32)
+        categories = np.frombuffer(data.categories, dtype=np.uint8)
+    else:
+        count = len(data)
+        amounts = np.zeros(count, dtype=np.int64)
+        ordinals = np.zeros(count, dtype=np.int32)
+        categories = np.full(count, len(CATEGORY_CODES), dtype=np.uint8)
+        for position, entry in enumerate(data.values()):
+            try:
+                amounts[position] = to_kopecks(entry["Сумма"])
+                ordinals[position] = date_ordinal(entry["Дата"])
+            except (KeyError, TypeError, ValueError, OverflowError):
+                continue
+            categories[position] = CATEGORY_CODES.get(entry.get("Категория"), len(CATEGORY_CODES))
+
+    valid = ordinals > 0
+    if valid.all():
+        return amounts, ordinals, categories
+    return amounts[valid], ordinals[valid], categories[valid]
+
+
+# Номер периода (дня, месяца или года от 1970 года) для каждого номера дня.
+def _period_keys(ordinals: np.ndarray, period: str) -> np.ndarray:
+    if period not in PERIODS:
+        raise ValueError(f"Неизвестный период: {period}. Допустимые значения: {', '.join(PERIODS)}")
+    days = (ordinals.astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+    unit = {"day": 'D', "month": 'M', "year": 'Y'}[period]
+    return days.astype(f'datetime64[{unit}]').astype(np.int64)
+
+
+# Суммы весов по группам: номера групп сдвигаются к нулю и суммируются bincount.
+# Возвращает номера непустых групп по возрастанию и суммы для каждого из наборов весов.
+def _group_sums(keys: np.ndarray, *weights: np.ndarray) -> Tuple[np.ndarray, ...]:
+    if len(keys) == 0:
+        return (keys, *(np.zeros(0) for _ in weights))
+    offset = keys.min()
+    positions = keys - offset
+    present = np.flatnonzero(np.bincount(positions))
+    return (present + offset, *(np.bincount(positions, weights=weight)[present] for weight in weights))
+
+
+def _period_label(key: int, period: str) -> str:
+    unit = {"day": 'D', "month": 'M', "year": 'Y'}[period]
+    value = np.datetime64(int(key), unit).astype('datetime64[D]').astype(date)
+    if period == "day":
+        return value.strftime('%d-%m-%Y')
+    if period == "month":
+        return value.strftime('%m-%Y')
+    return value.strftime('%Y')
+
+
+# Доходы, расходы и баланс по периодам (день, месяц, год) в порядке возрастания дат.
+# Возвращает список кортежей: период, сумма доходов, сумма расходов, баланс.
+def period_report(data: Entries, period: str = "month") -> List[Tuple[str, float, float, float]]:
+
+    amounts, ordinals, categories = load_arrays(data)
+    # Сначала суммы по дням (один проход bincount по всем записям), затем дни сворачиваются в периоды.
+    days, income, expense = _group_sums(
+        ordinals.astype(np.int64),
+        np.where(categories == INCOME, amounts, 0),
+        np.where(categories == EXPENSE, amounts, 0),
+    )
+    groups, income, expense = _group_sums(_period_keys(days, period), income, expense)
+    balance = income - expense
+
+    return [
+        (_period_label(key, period), float(income_sum) / 100, float(expense_sum) / 100, float(balance_sum) / 100)
+        for key, income_sum, expense_sum, balance_sum in zip(groups, income, expense, balance)
+    ]
+
+
+# Баланс нарастающим итогом по дням: для каждого дня с записями - баланс на конец дня.
+def running_balance(data: Entries) -> List[Tuple[str, float]]:
+
+    amounts, ordinals, categories = load_arrays(data)
+    signed = np.where(categories == INCOME, amounts, np.where(categories == EXPENSE, -amounts, 0))
+    days, daily = _group_sums(ordinals.astype(np.int64), signed)
+    totals = np.cumsum(daily)
+
+    return [
+        (date.fromordinal(int(day)).strftime('%d-%m-%Y'), float(total) / 100)
+        for day, total in zip(days, totals)
+    ]
@@ -0,0 +1,30 @@
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен: используется стандартный модуль json
+    orjson = None
+
+# Кодирование и разбор JSON для файлов кошелька, журнала, итогов и HTTP API.
+# Если установлен orjson, используется он (в несколько раз быстрее), иначе - стандартный json.
+# Результат одинаков: UTF-8 без экранирования кириллицы, компактная запись без пробелов.
+# Запись с отступами (pretty) всегда выполняется модулем json с отступом 4, как в исходном формате data.json.
+
+BACKEND = "orjson" if orjson is not None else "json"
+# Ошибка разбора; orjson.JSONDecodeError - её подкласс.
+JSONDecodeError = json.JSONDecodeError
+
+
+def dumps(value: Any, pretty: bool = False) -> bytes:
+    if pretty:
+        return json.dumps(value, indent=4, ensure_ascii=False).encode('utf-8')
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
@@ -0,0 +1,317 @@
+import asyncio
+import traceback
+from urllib.parse import parse_qsl, urlsplit
+from typing import Any, Dict, List, Optional, Tuple
+
+from storage import EntryNotFoundError
+from validation import validate_entry, validate_fields
+from serialization import JSONDecodeError, dumps, loads
+
+# HTTP API кошелька на asyncio (только стандартная библиотека).
+#
+#   GET   /balance                          -> {"balance": ..., "income": ..., "expense": ...}
+#   GET   /entries?Категория=Расход&limit=10&offset=0 -> {"entries": {ID: запись}}
+#   GET   /entries?text=покупки&Категория=Расход       -> поиск по словам в описании вместе с условиями по полям
+#   POST  /entries     {запись}             -> 201 {"id": ID}
+#   PATCH /entries/ID  {поле: значение}     -> {"id": ID}
+#   GET   /stats                            -> замеры кошелька (Wallet.stats)
+#
+# Сервер держит в памяти один экземпляр Wallet. Чтение выполняется в пуле потоков и не ждёт записи на диск
+# других запросов (см. Wallet.reading); в хранилищах sqlite и sharded соединение и манифест общие для всех потоков,
+# и чтение ждёт завершения изменения. Все изменения проходят через одну задачу-писателя: запросы, накопившиеся в очереди,
+# пока шло предыдущее сохранение, применяются вместе внутри Wallet.batch() и сохраняются одной записью в файл
+# (одной транзакцией SQLite); подряд идущие добавления передаются одним вызовом add_entries.
+# Ошибки проверки возвращаются с кодом 400 и телом {"error": текст}, изменение несуществующей записи - с кодом 404,
+# прочие ошибки - с кодом 500. Строка запроса читается как UTF-8, в том числе незакодированные символы в параметрах.
+
+MAX_BODY_SIZE = 1 << 20
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WalletServer:
+
+    def __init__(self, wallet):
+        self.wallet = wallet
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Число сохранений, выполненных задачей-писателем (для проверки группировки).
+        self.flushes: int = 0
+
+    # Запуск сервера; port=0 - свободный порт, выбранный системой (см. address).
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        # При отложенной записи (Wallet с flush_interval/flush_every) сохраняется всё принятое.
+        await asyncio.get_running_loop().run_in_executor(None, self.wallet.flush)
+
+    # Задача-писатель: забирает из очереди все накопившиеся изменения и применяет их одним заходом в потоке.
+    async def _writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            results = await loop.run_in_executor(None, self._apply, [operation for operation, _ in batch])
+            self.flushes += 1
+            for (_, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    # Применение группы изменений с одним сохранением в конце. Возвращает для каждого изменения пару
+    # (успех, результат или исключение). ID добавленных записей - окончательные, после сохранения.
+    # Если сохранение не удалось, ошибка возвращается всем изменениям группы: они остаются в очереди Wallet
+    # и будут сохранены следующим flush(), но подтвердить их клиентам нельзя.
+    def _apply(self, operations: List[Tuple[str, Any]]) -> List[Tuple[bool, Any]]:
+        self.wallet.renumbered.clear()
+        try:
+            with self.wallet.batch():
+                results = self._apply_all(operations)
+        except Exception as e:
+            return [(False, e) for _ in operations]
+        renumbered = self.wallet.renumbered
+        return [
+            (ok, renumbered.get(value, value) if ok and kind == "add" else value)
+            for (kind, _), (ok, value) in zip(operations, results)
+        ]
+
+    def _apply_all(self, operations: List[Tuple[str, Any]]) -> List[Tuple[bool, Any]]:
+        results: List[Tuple[bool, Any]] = []
+        position = 0
+        while position < len(operations):
+            kind, payload = operations[position]
+            if kind == "add":
+                group = [payload]
+                while position + len(group) < len(operations) and operations[position + len(group)][0] == "add":
+                    group.append(operations[position + len(group)][1])
+                try:
+                    results.extend((True, entry_id) for entry_id in self.wallet.add_entries(group))
+                except Exception as e:
+                    results.extend((False, e) for _ in group)
+                position += len(group)
+            else:
+                entry_id, fields = payload
+                try:
+                    self.wallet.edit_entry(entry_id, **fields)
+                    results.append((True, entry_id))
+                except Exception as e:
+                    results.append((False, e))
+                position += 1
+        return results
+
+    async def _submit(self, kind: str, payload: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((kind, payload), future))
+        return await future
+
+    async def _read(self, function, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, self._locked, function, *args)
+
+    def _locked(self, function, *args) -> Any:
+        with self.wallet.reading():
+            return function(*args)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    await write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except EntryNotFoundError as e:
+                    status, payload = 404, {"error": str(e)}
+                except ValueError as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception:
+                    traceback.print_exc()
+                    status, payload = 500, {"error": "Внутренняя ошибка сервера."}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Выбор обработчика по методу и пути. Возвращает код ответа и тело.
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts == ["balance"]:
+            if method != "GET":
+                raise HttpError(405, "Метод не поддерживается.")
+            balance, income, expense = await self._read(self.wallet.get_balance)
+            return 200, {"balance": balance, "income": income, "expense": expense}
+
+        if parts == ["stats"]:
+            if method != "GET":
+                raise HttpError(405, "Метод не поддерживается.")
+            return 200, await self._read(self.wallet.stats)
+
+        if parts == ["entries"]:
+            if method == "GET":
+                criteria = dict(parse_qsl(url.query, keep_blank_values=True, errors='strict'))
+                limit = parse_int(criteria.pop("limit", None), "limit")
+                offset = parse_int(criteria.pop("offset", None), "offset") or 0
+                entries = await self._read(self._search, criteria, limit, offset)
+                return 200, {"entries": entries}
+            if method == "POST":
+                entry = validate_entry(parse_json(body))
+                return 201, {"id": await self._submit("add", entry)}
+            raise HttpError(405, "Метод не поддерживается.")
+
+        if len(parts) == 2 and parts[0] == "entries":
+            if method != "PATCH":
+                raise HttpError(405, "Метод не поддерживается.")
+            fields = validate_fields(parse_json(body))
+            return 200, {"id": await self._submit("edit", (parts[1], fields))}
+
+        raise HttpError(404, "Ресурс не найден.")
+
+    def _search(self, criteria: Dict[str, str], limit: Optional[int], offset: int) -> Dict[str, Dict[str, str]]:
+        return dict(self.wallet.iter_entries(limit=limit, offset=offset, **criteria))
+
+
+def parse_int(value: Optional[str], name: str) -> Optional[int]:
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValueError(f"Параметр {name} должен быть неотрицательным целым числом.")
+    return int(value)
+
+
+# Тело запроса: JSON-объект.
+def parse_json(body: bytes) -> Dict[str, Any]:
+    try:
+        value = loads(body or b'null')
+    except (UnicodeDecodeError, JSONDecodeError):
+        raise ValueError("Тело запроса должно быть в формате JSON.")
+    if not isinstance(value, dict):
+        raise ValueError("Тело запроса должно быть JSON-объектом.")
+    return value
+
+
+# Чтение одного запроса HTTP/1.1. None - клиент закрыл соединение.
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode('utf-8').split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "Некорректная строка запроса.")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Некорректный заголовок Content-Length.")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Слишком большое тело запроса.")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool = True) -> None:
+    body = dumps(payload)
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+
+# Клиент с постоянным соединением; используется в тестах и нагрузочном скрипте.
+class WalletClient:
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b'' if payload is None else dumps(payload)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n\r\n"
+        self._writer.write(head.encode('utf-8') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, loads(await self._reader.readexactly(length))
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+
+# Запуск сервера до прерывания (подкоманда serve).
+async def serve(wallet, host: str = "127.0.0.1", port: int = 8080) -> None:
+    server = WalletServer(wallet)
+    await server.start(host, port)
+    print(f"Сервер запущен: http://{server.address[0]}:{server.address[1]}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
@@ -0,0 +1,1107 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+from itertools import islice
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки файлов не поддерживаются, запись остаётся атомарной
+    fcntl = None
+
+from amounts import normalize_amount, to_kopecks
+from indexes import contains_words, date_ordinal, id_order, tokenize
+from instrumentation import NULL_STATS
+from serialization import JSONDecodeError, dumps, loads
+
+Entries = Dict[str, Dict[str, str]]
+
+
+# Изменяемой записи нет. Остаётся ValueError, чтобы вызывающий код мог не различать ошибки изменения.
+class EntryNotFoundError(ValueError):
+
+    def __init__(self, entry_id: str):
+        super().__init__(f"Запись с ID {entry_id} не найдена.")
+        self.entry_id = entry_id
+
+
+# Сумма в копейках для итогов хранилища; None - строка не разбирается или не помещается в INTEGER SQLite.
+def kopecks_or_none(amount: str) -> Optional[int]:
+    try:
+        kopecks = to_kopecks(amount)
+    except (TypeError, ValueError):
+        return None
+    return kopecks if -(1 << 63) <= kopecks < (1 << 63) else None
+
+
+# Атомарная запись файла: содержимое пишется во временный файл в том же каталоге,
+# сбрасывается на диск (fsync, если sync) и подменяет исходный файл через os.replace.
+# При сбое посреди записи исходный файл остаётся целым.
+def atomic_write(file_path: str, write: Callable, mode: str = 'w', encoding: str = None, sync: bool = True) -> None:
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_path) + '.', suffix='.tmp')
+    try:
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        with open(fd, mode, encoding=encoding) as file:
+            write(file)
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Базовый класс хранилища записей кошелька.
+# Хранилище отвечает только за формат файла: загрузку записей и сохранение изменений.
+# Для согласованной работы нескольких процессов и потоков хранилище даёт блокировку lock():
+# чтение файла выполняется под разделяемой блокировкой, изменение - под исключительной.
+class Storage:
+
+    # Хранилище с собственными запросами (например, SQLite): Wallet передаёт ему баланс, поиск и изменения
+    # вместо работы с записями в памяти.
+    queryable = False
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # Тип контейнера записей в памяти: dict или совместимое отображение (например, columns.EntryColumns).
+        self.entries_factory = dict
+        # Блокировка берётся на отдельном файле: сам файл данных подменяется через os.replace.
+        self.lock_path = file_path + '.lock'
+        # Состояние блокировки у каждого потока своё: дескриптор файла блокировки, глубина вложенности и режим.
+        self._lock_state = threading.local()
+        # Замеры чтения, разбора и записи (instrumentation.Stats); по умолчанию выключены.
+        self.stats = NULL_STATS
+
+    # Блокировка файла данных (fcntl.flock). Повторный вход в том же потоке не блокирует;
+    # внутри разделяемой блокировки нельзя запросить исключительную.
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        state = self._lock_state
+        depth = getattr(state, 'depth', 0)
+        if depth:
+            if exclusive and not state.exclusive:
+                raise RuntimeError("Нельзя получить исключительную блокировку внутри разделяемой.")
+            state.depth += 1
+            try:
+                yield
+            finally:
+                state.depth -= 1
+            return
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            state.depth, state.exclusive = 1, exclusive
+            try:
+                yield
+            finally:
+                state.depth = 0
+        finally:
+            os.close(fd)
+
+    def initialize(self) -> None:
+        raise NotImplementedError
+
+    def load(self) -> Entries:
+        raise NotImplementedError
+
+    # Отпечаток файла на диске (mtime, размер, inode): по нему Wallet понимает, что файл изменился.
+    def signature(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.file_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    # data - словарь записей, в который новая запись уже добавлена.
+    def add(self, data: Entries, entry_id: str, entry_data: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    # data - словарь записей, в который все новые записи уже добавлены.
+    def add_many(self, data: Entries, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        raise NotImplementedError
+
+    # data - словарь записей, в котором поля записи уже изменены.
+    def edit(self, data: Entries, entry_id: str, fields: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    # Сохранение группы изменений одной записью в файл (отложенная запись Wallet).
+    # records - операции в формате журнала ({"op": "add", ...}, {"op": "edit", ...}), data - записи с уже применёнными операциями.
+    def write_batch(self, data: Entries, records: List[Dict]) -> None:
+        raise NotImplementedError
+
+    # Сброс прочитанного состояния: следующий вызов load() прочитает файл целиком.
+    def forget(self) -> None:
+        pass
+
+
+# Исходный формат: весь кошелёк - один JSON-объект, каждое изменение перезаписывает файл целиком.
+# Файл записывается компактно; pretty = True - с отступами, для чтения человеком. Читаются оба вида.
+class JsonStorage(Storage):
+
+    pretty = False
+
+    def initialize(self) -> None:
+        with self.lock(exclusive=True):
+            if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+                atomic_write(self.file_path, lambda file: file.write('{}'))
+
+    def load(self) -> Entries:
+        with self.stats.timer("io_read"):
+            with open(self.file_path, 'rb') as file:
+                content = file.read()
+        self.stats.add("bytes_read", len(content))
+        with self.stats.timer("parse"):
+            try:
+                return loads(content)
+            except (UnicodeDecodeError, JSONDecodeError):
+                raise ValueError("Некорректный формат файла JSON.")
+
+    def add(self, data: Entries, entry_id: str, entry_data: Dict[str, str]) -> None:
+        self.save(data)
+
+    def add_many(self, data: Entries, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        self.save(data)
+
+    def edit(self, data: Entries, entry_id: str, fields: Dict[str, str]) -> None:
+        self.save(data)
+
+    def write_batch(self, data: Entries, records: List[Dict]) -> None:
+        self.save(data)
+
+    def save(self, data: Entries) -> None:
+        if not isinstance(data, dict):
+            data = dict(data.items())
+        with self.stats.timer("io_write"):
+            content = dumps(data, self.pretty)
+            atomic_write(self.file_path, lambda file: file.write(content), mode='wb')
+        self.stats.add("bytes_written", len(content))
+
+
+# Журнал в формате JSON Lines: каждая строка - одна операция.
+#   {"op": "snapshot", "data": {...}} - полный снимок записей (результат сжатия или импорта)
+#   {"op": "add", "id": "1", "entry": {...}} - добавление записи
+#   {"op": "edit", "id": "1", "fields": {...}} - изменение полей записи
+# Добавление дописывает одну строку в конец файла, поэтому его стоимость не зависит от размера кошелька.
+class JournalStorage(Storage):
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._data: Entries = self.entries_factory()
+        # Позиция в файле, до которой журнал уже прочитан, и inode файла.
+        # Если файл не подменили (compact), при следующей загрузке дочитывается только хвост.
+        self._offset: int = 0
+        self._inode: int = -1
+
+    def initialize(self) -> None:
+        with self.lock(exclusive=True):
+            if not os.path.exists(self.file_path):
+                open(self.file_path, 'a').close()
+
+    def load(self) -> Entries:
+        stat = os.stat(self.file_path)
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._data = self.entries_factory()
+            self._offset = 0
+            self._inode = stat.st_ino
+
+        if stat.st_size > self._offset:
+            with self.stats.timer("io_read"):
+                with open(self.file_path, 'rb') as file:
+                    file.seek(self._offset)
+                    chunk = file.read()
+            self.stats.add("bytes_read", len(chunk))
+            with self.stats.timer("parse"):
+                lines = chunk.split(b'\n')
+                # Недописанная последняя строка (запись ещё идёт) будет прочитана в следующий раз.
+                self._offset += len(chunk) - len(lines.pop())
+                for line in lines:
+                    if line.strip():
+                        self._apply(self._data, self._decode(line))
+
+        return self._data
+
+    def add(self, data: Entries, entry_id: str, entry_data: Dict[str, str]) -> None:
+        self._append([{"op": "add", "id": entry_id, "entry": entry_data}], data)
+
+    def add_many(self, data: Entries, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        self._append([{"op": "add", "id": entry_id, "entry": entry_data} for entry_id, entry_data in entries], data)
+
+    def edit(self, data: Entries, entry_id: str, fields: Dict[str, str]) -> None:
+        self._append([{"op": "edit", "id": entry_id, "fields": fields}], data)
+
+    def write_batch(self, data: Entries, records: List[Dict]) -> None:
+        self._append(records, data)
+
+    def forget(self) -> None:
+        self._inode = -1
+
+    # Сжатие журнала: все операции сворачиваются в один снимок.
+    # Новый файл пишется рядом и атомарно подменяет старый.
+    def compact(self) -> None:
+        # Проверка до блокировки, чтобы не оставить файл блокировки рядом с несуществующим журналом.
+        if not os.path.exists(self.file_path):
+            raise ValueError(f"Файл журнала {self.file_path} не найден.")
+        with self.lock(exclusive=True):
+            data = self.load()
+            self.write_snapshot(self.file_path, data)
+            self._inode = os.stat(self.file_path).st_ino
+            self._offset = os.path.getsize(self.file_path)
+
+    @staticmethod
+    def write_snapshot(file_path: str, data: Entries) -> None:
+        if not isinstance(data, dict):
+            data = dict(data.items())
+        line = dumps({"op": "snapshot", "data": data}) + b'\n'
+        atomic_write(file_path, lambda file: file.write(line), mode='wb')
+
+    # Все строки дописываются одним вызовом write и сбрасываются на диск; вызывается под исключительной блокировкой.
+    def _append(self, records: List[Dict], data: Entries) -> None:
+        chunk = b''.join(dumps(record) + b'\n' for record in records)
+        with self.stats.timer("io_write"), open(self.file_path, 'r+b') as file:
+            position = self._truncate_torn_tail(file)
+            file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        self.stats.add("bytes_written", len(chunk))
+        # Если журнал был прочитан до конца, свои строки уже учтены в data и перечитывать их не нужно.
+        if data is self._data and position == self._offset:
+            self._offset += len(chunk)
+
+    # Под исключительной блокировкой недописанная последняя строка может остаться только от прерванной записи:
+    # она отрезается до конца последней целой строки, иначе новые строки склеились бы с ней. Возвращает длину файла.
+    @staticmethod
+    def _truncate_torn_tail(file: BinaryIO) -> int:
+        end = file.seek(0, os.SEEK_END)
+        if end == 0:
+            return end
+        file.seek(end - 1)
+        if file.read(1) == b'\n':
+            return end
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        file.truncate(position)
+        file.seek(position)
+        return position
+
+    @staticmethod
+    def _decode(line: bytes) -> Dict:
+        try:
+            return loads(line)
+        except (UnicodeDecodeError, JSONDecodeError):
+            raise ValueError("Некорректный формат файла журнала.")
+
+    @staticmethod
+    def _apply(data: Entries, record: Dict) -> None:
+        op = record.get("op")
+        if op == "add":
+            data[record["id"]] = record["entry"]
+        elif op == "edit":
+            entry = dict(data.get(record["id"], {}))
+            entry.update(record["fields"])
+            data[record["id"]] = entry
+        elif op == "snapshot":
+            data.clear()
+            data.update(record["data"])
+        else:
+            raise ValueError(f"Неизвестная операция журнала: {op}")
+
+
+# Соответствие полей записи и столбцов таблицы SQLite.
+SQLITE_COLUMNS = {
+    "Дата": "date",
+    "Категория": "category",
+    "Сумма": "amount",
+    "Описание": "description",
+}
+
+
+# Хранение в локальной базе SQLite (режим WAL) с индексами по дате, категории и сумме.
+# Баланс считается агрегатом SQL, поиск - запросом WHERE с параметрами, изменения - отдельными
+# командами INSERT/UPDATE без перезаписи всего файла. Согласованность между процессами обеспечивает SQLite.
+# Кроме исходных строковых значений в таблице хранятся разобранные номер дня (date_ordinal) и сумма
+# в целых копейках (amount_kopecks) - для диапазонных запросов и точных агрегатов; seq - числовое значение ID.
+# Слова описаний (indexes.tokenize) хранятся в таблице entry_tokens - для поиска по тексту.
+class SqliteStorage(Storage):
+
+    queryable = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            id TEXT PRIMARY KEY,
+            seq INTEGER,
+            date TEXT NOT NULL,
+            date_ordinal INTEGER,
+            category TEXT NOT NULL,
+            amount TEXT NOT NULL,
+            amount_kopecks INTEGER,
+            description TEXT NOT NULL
+        );
+    """
+    TEXT_SCHEMA = """
+        CREATE TABLE entry_tokens (
+            token TEXT NOT NULL,
+            id TEXT NOT NULL,
+            PRIMARY KEY (token, id)
+        ) WITHOUT ROWID;
+        CREATE INDEX entry_tokens_id ON entry_tokens (id);
+    """
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS entries_seq ON entries (seq);
+        CREATE INDEX IF NOT EXISTS entries_date ON entries (date);
+        CREATE INDEX IF NOT EXISTS entries_date_ordinal ON entries (date_ordinal);
+        CREATE INDEX IF NOT EXISTS entries_category ON entries (category);
+        CREATE INDEX IF NOT EXISTS entries_amount_kopecks ON entries (amount_kopecks);
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # Доступ из нескольких потоков согласуется блокировкой Wallet.
+            self._connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        return self._connection
+
+    def initialize(self) -> None:
+        self.connection.executescript(self.SCHEMA)
+        self._migrate_amounts()
+        self._create_text_index()
+        self.connection.executescript(self.INDEXES)
+
+    # Базы прежнего формата хранили сумму числом с плавающей точкой (amount_value):
+    # добавляется столбец amount_kopecks и заполняется разбором строк сумм. Выполняется один раз.
+    def _migrate_amounts(self) -> None:
+        if self._has_column("amount_kopecks"):
+            return
+        with self._transaction() as connection:
+            # Пока ждали блокировку записи, столбец мог добавить другой процесс.
+            if self._has_column("amount_kopecks"):
+                return
+            connection.execute("ALTER TABLE entries ADD COLUMN amount_kopecks INTEGER")
+            rows = connection.execute("SELECT rowid, amount FROM entries").fetchall()
+            connection.executemany(
+                "UPDATE entries SET amount_kopecks = ? WHERE rowid = ?",
+                ((kopecks_or_none(amount), rowid) for rowid, amount in rows),
+            )
+
+    # Таблица слов описаний; в базе прежнего формата заполняется по уже сохранённым записям. Выполняется один раз.
+    def _create_text_index(self) -> None:
+        if self._has_table("entry_tokens"):
+            return
+        with self._transaction() as connection:
+            if self._has_table("entry_tokens"):
+                return
+            for statement in self.TEXT_SCHEMA.split(';'):
+                if statement.strip():
+                    connection.execute(statement)
+            rows = connection.execute("SELECT id, description FROM entries").fetchall()
+            self._index_tokens(connection, rows)
+
+    def _has_table(self, name: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    @staticmethod
+    def _index_tokens(connection: sqlite3.Connection, rows: Iterable[Tuple[str, str]]) -> None:
+        connection.executemany(
+            "INSERT OR IGNORE INTO entry_tokens (token, id) VALUES (?, ?)",
+            ((token, entry_id) for entry_id, description in rows for token in tokenize(description)),
+        )
+
+    def _has_column(self, name: str) -> bool:
+        return any(row[1] == name for row in self.connection.execute("PRAGMA table_info(entries)"))
+
+    # Блокировки и транзакции обеспечивает сама SQLite.
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        yield
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # Отпечаток базы: PRAGMA data_version меняется при изменениях из других соединений,
+    # total_changes - при изменениях через это соединение. Время изменения файла в режиме WAL не подходит.
+    def signature(self) -> Tuple[int, int, int]:
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self.connection.total_changes, 0
+
+    # Открытие транзакции для группы изменений (отложенная запись Wallet): изменения видны этому соединению сразу,
+    # другим - после commit(). Пока транзакция открыта, другие процессы не могут писать в базу.
+    def begin(self) -> None:
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+
+    # Возвращает ID, изменённые при сохранении (см. ShardedStorage.commit): в SQLite их нет,
+    # транзакция группы с begin() не даёт писать другим процессам.
+    def commit(self) -> Dict[str, str]:
+        if self.connection.in_transaction:
+            self.connection.execute("COMMIT")
+        return {}
+
+    # Транзакция одного изменения. Внутри открытой группы (begin) изменение выполняется в точке сохранения:
+    # при ошибке откатывается только оно.
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self.connection
+        if connection.in_transaction:
+            connection.execute("SAVEPOINT operation")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK TO operation")
+                connection.execute("RELEASE operation")
+                raise
+            connection.execute("RELEASE operation")
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _row(entry_id: str, entry: Dict[str, str]) -> Tuple:
+        date_str = entry.get("Дата", "")
+        amount = entry.get("Сумма", "")
+        try:
+            ordinal = date_ordinal(date_str)
+        except (AttributeError, TypeError, ValueError):
+            ordinal = None
+        seq = int(entry_id) if entry_id.isdigit() else None
+        return (entry_id, seq, date_str, ordinal, entry.get("Категория", ""), amount, kopecks_or_none(amount),
+                entry.get("Описание", ""))
+
+    @staticmethod
+    def _entry(row: Tuple) -> Dict[str, str]:
+        return {"Дата": row[0], "Категория": row[1], "Сумма": row[2], "Описание": row[3]}
+
+    def load(self) -> Entries:
+        data = self.entries_factory()
+        # Строки читаются из базы по мере перебора, поэтому чтение и сборка записей замеряются вместе.
+        with self.stats.timer("io_read"):
+            rows = self.connection.execute("SELECT id, date, category, amount, description FROM entries ORDER BY rowid")
+            for row in rows:
+                data[row[0]] = self._entry(row[1:])
+        return data
+
+    # Добавление записей одной транзакцией; ID выделяются после наибольшего числового ID. Возвращает список ID.
+    def insert(self, entries: List[Dict[str, str]]) -> List[str]:
+        with self._transaction() as connection:
+            last_id = connection.execute("SELECT COALESCE(MAX(seq), 0) FROM entries").fetchone()[0]
+            ids = [str(last_id + number) for number in range(1, len(entries) + 1)]
+            connection.executemany(
+                "INSERT INTO entries (id, seq, date, date_ordinal, category, amount, amount_kopecks, description) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._row(entry_id, entry) for entry_id, entry in zip(ids, entries)),
+            )
+            self._index_tokens(connection, ((entry_id, entry.get("Описание", "")) for entry_id, entry in zip(ids, entries)))
+        return ids
+
+    def update(self, entry_id: str, fields: Dict[str, str]) -> None:
+        for key in fields:
+            if key not in SQLITE_COLUMNS:
+                raise ValueError(f"Поле '{key}' не найдено в записи.")
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT date, category, amount, description FROM entries WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                raise EntryNotFoundError(entry_id)
+            entry = self._entry(row)
+            entry.update(fields)
+            connection.execute(
+                "UPDATE entries SET date = ?, date_ordinal = ?, category = ?, amount = ?, amount_kopecks = ?, "
+                "description = ? WHERE id = ?",
+                (*self._row(entry_id, entry)[2:], entry_id),
+            )
+            if entry["Описание"] != row[3]:
+                connection.execute("DELETE FROM entry_tokens WHERE id = ?", (entry_id,))
+                self._index_tokens(connection, [(entry_id, entry["Описание"])])
+
+    # Итоги не хранятся отдельно от записей, а считаются агрегатом, поэтому расхождения нет.
+    def verify_totals(self) -> Tuple[int, int]:
+        return 0, 0
+
+    # Баланс, доходы и расходы в копейках: целочисленная сумма SQL, без ошибок округления.
+    def balance(self) -> Tuple[int, int, int]:
+        income, expense = self.connection.execute(
+            "SELECT COALESCE(SUM(CASE WHEN category = 'Доход' THEN amount_kopecks END), 0), "
+            "COALESCE(SUM(CASE WHEN category = 'Расход' THEN amount_kopecks END), 0) FROM entries"
+        ).fetchone()
+        return income - expense, income, expense
+
+    # Поиск по точному совпадению полей. Поле, которого нет в записях, ничему не соответствует.
+    # text - слова описания: каждое слово запроса должно совпасть с началом одного из слов (как в textindex.TextIndex).
+    def search(self, criteria: Dict[str, str], limit: Optional[int] = None, offset: int = 0,
+               text: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        if any(key not in SQLITE_COLUMNS for key in criteria):
+            return iter(())
+        conditions = [f"{SQLITE_COLUMNS[key]} = ?" for key in criteria]
+        parameters = list(criteria.values())
+        if text is not None:
+            tokens = tokenize(text)
+            if not tokens:
+                return iter(())
+            for token in tokens:
+                # Слова с началом token - диапазон [token, token + наибольший символ) по первичному ключу.
+                conditions.append("id IN (SELECT id FROM entry_tokens WHERE token >= ? AND token < ?)")
+                parameters.extend((token, token + '\U0010ffff'))
+        return self._select(conditions, parameters, "rowid", limit, offset)
+
+    # Поиск по диапазонам номеров дней и сумм в копейках (границы включаются), результаты упорядочены по дате.
+    def search_range(self, date_from: Optional[int] = None, date_to: Optional[int] = None,
+                     min_sum: Optional[int] = None, max_sum: Optional[int] = None,
+                     category: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        conditions = ["date_ordinal IS NOT NULL"]
+        parameters = []
+        for condition, value in (("date_ordinal >= ?", date_from), ("date_ordinal <= ?", date_to),
+                                 ("amount_kopecks >= ?", min_sum), ("amount_kopecks <= ?", max_sum),
+                                 ("category = ?", category)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        return self._select(conditions, parameters, "date_ordinal, rowid")
+
+    def _select(self, conditions: List[str], parameters: List, order: str,
+                limit: Optional[int] = None, offset: int = 0) -> Iterator[Tuple[str, Dict[str, str]]]:
+        query = "SELECT id, date, category, amount, description FROM entries"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        rows = self.connection.execute(query, (*parameters, -1 if limit is None else limit, offset))
+        return ((row[0], self._entry(row[1:])) for row in rows)
+
+
+# Каталог с записями по месяцам: один JSON-файл на месяц по полю "Дата" ("2024-01.json"), записи с датой
+# не в формате дд-мм-гггг - в "other.json". Рядом лежит небольшой манифест manifest.json: наибольший выданный ID
+# и по каждому месяцу итоги доходов и расходов в копейках, число записей, границы числовых ID, отпечаток файла
+# и слова описаний с числом записей, в которых они встречаются.
+# Баланс считается по манифесту, поиск с датой открывает один месяц, поиск по словам - только месяцы, где есть
+# все слова запроса, добавление перезаписывает только файл своего месяца и манифест: цена операций зависит
+# от размера месяца, а не всей истории.
+# Файлы месяцев записываются раньше манифеста. Если отпечаток файла не совпадает с манифестом (сбой между
+# записями), итоги этого месяца пересчитываются по файлу.
+class ShardedStorage(Storage):
+
+    queryable = True
+    pretty = False
+
+    MANIFEST = "manifest.json"
+    OTHER_SHARD = "other"
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self.manifest_path = os.path.join(file_path, self.MANIFEST)
+        # Прочитанный манифест и его отпечаток, загруженные месяцы с отпечатками файлов.
+        self._manifest_data: Optional[Dict] = None
+        self._manifest_signature: Optional[Tuple[int, int, int]] = None
+        self._shards: Dict[str, Tuple[Optional[Tuple[int, int, int]], Entries]] = {}
+        # Изменённые в памяти, но ещё не записанные месяцы.
+        self._dirty: Set[str] = set()
+        # Открытая группа изменений (begin): операции для повторного применения и счётчик изменений в памяти.
+        self._batch: Optional[List[Dict]] = None
+        self._changes = 0
+
+    def initialize(self) -> None:
+        os.makedirs(self.file_path, exist_ok=True)
+        with self.lock(exclusive=True):
+            if not os.path.exists(self.manifest_path):
+                self._write_manifest({"last_id": 0, "shards": {}})
+
+    # Отпечаток манифеста (меняется при каждой записи) и число изменений, ещё не записанных на диск.
+    def signature(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.manifest_path)
+        return stat.st_mtime_ns, stat.st_ino, self._changes
+
+    def forget(self) -> None:
+        self._manifest_data = None
+        self._manifest_signature = None
+        self._shards = {}
+        self._dirty = set()
+
+    # Месяц записи по дате в формате дд-мм-гггг ("2024-01"); ключи месяцев сортируются по времени.
+    @staticmethod
+    def shard_key(date_str: str) -> str:
+        try:
+            ordinal = date_ordinal(date_str)
+        except (AttributeError, TypeError, ValueError):
+            return ShardedStorage.OTHER_SHARD
+        return ShardedStorage._month_key(ordinal)
+
+    @staticmethod
+    def _month_key(ordinal: int) -> str:
+        day = date.fromordinal(ordinal)
+        return f"{day.year:04d}-{day.month:02d}"
+
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.file_path, key + '.json')
+
+    # Итоги месяца: пустые или посчитанные по записям.
+    @classmethod
+    def _describe(cls, entries: Entries, signature: Optional[Tuple[int, int, int]] = None) -> Dict:
+        meta = {"income": 0, "expense": 0, "count": 0, "min_id": None, "max_id": None, "other_ids": False,
+                "signature": None if signature is None else list(signature), "words": {}}
+        for entry_id, entry in entries.items():
+            cls._count(meta, entry_id, entry, 1)
+        return meta
+
+    # Учёт записи в итогах месяца (sign = 1 - добавление, -1 - удаление). Границы ID при удалении не сужаются.
+    # Манифест прежней версии без слов месяца дополняется ими при пересчёте итогов (verify_totals).
+    @staticmethod
+    def _count(meta: Dict, entry_id: str, entry: Dict[str, str], sign: int) -> None:
+        kopecks = kopecks_or_none(entry.get("Сумма"))
+        if kopecks is not None:
+            if entry.get("Категория") == "Доход":
+                meta["income"] += sign * kopecks
+            elif entry.get("Категория") == "Расход":
+                meta["expense"] += sign * kopecks
+        meta["count"] += sign
+        words = meta.get("words")
+        if words is not None and isinstance(entry.get("Описание"), str):
+            for word in tokenize(entry["Описание"]):
+                count = words.get(word, 0) + sign
+                if count > 0:
+                    words[word] = count
+                else:
+                    words.pop(word, None)
+        if sign < 0:
+            return
+        if entry_id.isascii() and entry_id.isdigit():
+            number = int(entry_id)
+            meta["min_id"] = number if meta["min_id"] is None else min(meta["min_id"], number)
+            meta["max_id"] = number if meta["max_id"] is None else max(meta["max_id"], number)
+        else:
+            meta["other_ids"] = True
+
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_json(self, path: str) -> Tuple[Tuple[int, int, int], Dict]:
+        with self.stats.timer("io_read"):
+            with open(path, 'rb') as file:
+                signature = self._file_signature(os.fstat(file.fileno()))
+                content = file.read()
+        self.stats.add("bytes_read", len(content))
+        with self.stats.timer("parse"):
+            try:
+                return signature, loads(content)
+            except (UnicodeDecodeError, JSONDecodeError):
+                raise ValueError(f"Некорректный формат файла JSON: {path}")
+
+    def _write_json(self, path: str, value: Dict) -> Tuple[int, int, int]:
+        with self.stats.timer("io_write"):
+            content = dumps(value, self.pretty)
+            atomic_write(path, lambda file: file.write(content), mode='wb')
+        self.stats.add("bytes_written", len(content))
+        return self._file_signature(os.stat(path))
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        self._manifest_signature = self._write_json(self.manifest_path, manifest)
+        self._manifest_data = manifest
+
+    # Манифест; вызывается под блокировкой. В открытой группе изменений - манифест в памяти с несохранёнными изменениями.
+    # При каждом чтении манифеста с диска и перед изменением (check) он сверяется с файлами месяцев.
+    def _manifest(self, check: bool = False) -> Dict:
+        if self._batch:
+            return self._manifest_data
+
+        signature = self._file_signature(os.stat(self.manifest_path))
+        if signature != self._manifest_signature:
+            self._manifest_signature, self._manifest_data = self._read_json(self.manifest_path)
+        elif not check:
+            return self._manifest_data
+        manifest = self._manifest_data
+
+        on_disk = {
+            item.name[:-len('.json')]: self._file_signature(item.stat())
+            for item in os.scandir(self.file_path)
+            if item.name.endswith('.json') and item.name != self.MANIFEST
+        }
+        shards = manifest["shards"]
+        for key in set(shards) | set(on_disk):
+            if key not in on_disk:
+                del shards[key]
+            elif key not in shards or tuple(shards[key]["signature"] or ()) != on_disk[key]:
+                file_signature, entries = self._read_json(self._shard_path(key))
+                shards[key] = self._describe(entries, file_signature)
+                self._shards[key] = (file_signature, entries)
+                manifest["last_id"] = max(manifest["last_id"], shards[key]["max_id"] or 0)
+        return manifest
+
+    # Записи месяца: из памяти, если файл не менялся, иначе - чтение файла.
+    def _shard(self, manifest: Dict, key: str) -> Entries:
+        cached = self._shards.get(key)
+        if key in self._dirty:
+            return cached[1]
+        meta = manifest["shards"].get(key)
+        signature = None if meta is None or meta["signature"] is None else tuple(meta["signature"])
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        entries = {} if signature is None else self._read_json(self._shard_path(key))[1]
+        self._shards[key] = (signature, entries)
+        return entries
+
+    def _add_to(self, manifest: Dict, key: str, entry_id: str, entry: Dict[str, str]) -> None:
+        self._shard(manifest, key)[entry_id] = entry
+        self._count(manifest["shards"].setdefault(key, self._describe({})), entry_id, entry, 1)
+        self._dirty.add(key)
+
+    def _remove_from(self, manifest: Dict, key: str, entry_id: str) -> None:
+        entry = self._shard(manifest, key).pop(entry_id)
+        self._count(manifest["shards"][key], entry_id, entry, -1)
+        self._dirty.add(key)
+
+    # Запись изменённых месяцев, затем манифеста. Опустевший месяц удаляется.
+    def _write_dirty(self, manifest: Dict) -> None:
+        shards = manifest["shards"]
+        for key in sorted(self._dirty):
+            entries = self._shards[key][1]
+            signature = None
+            if entries:
+                signature = self._write_json(self._shard_path(key), entries)
+                shards[key]["signature"] = list(signature)
+            else:
+                shards.pop(key, None)
+                if os.path.exists(self._shard_path(key)):
+                    os.remove(self._shard_path(key))
+            self._shards[key] = (signature, entries)
+        self._dirty = set()
+        self._write_manifest(manifest)
+
+    # Чтение: под разделяемой блокировкой (в открытой группе изменений - из памяти).
+    @contextmanager
+    def _reading(self) -> Iterator[Dict]:
+        with self.lock():
+            yield self._manifest()
+
+    # Изменение: под исключительной блокировкой с записью изменённых месяцев и манифеста.
+    # В открытой группе изменений операция применяется в памяти и запоминается для commit().
+    @contextmanager
+    def _changing(self, record: Dict) -> Iterator[Dict]:
+        if self._batch is not None:
+            with self.lock():
+                manifest = self._manifest(check=True)
+            yield manifest
+            self._batch.append(record)
+            self._changes += 1
+            return
+        with self.lock(exclusive=True):
+            manifest = self._manifest(check=True)
+            try:
+                yield manifest
+                self._write_dirty(manifest)
+            except BaseException:
+                self.forget()
+                raise
+
+    # Группа изменений (отложенная запись Wallet): изменения видны этому объекту сразу, на диск попадают в commit().
+    # Файлы не блокируются на время группы; если другой процесс тем временем изменил каталог, при commit()
+    # записи перечитываются и операции группы применяются заново (добавленные записи получают следующие свободные ID).
+    def begin(self) -> None:
+        if self._batch is None:
+            self._batch = []
+
+    # Возвращает ID добавленных в группе записей, изменённые при повторном применении: выданный ID -> окончательный.
+    def commit(self) -> Dict[str, str]:
+        if self._batch is None:
+            return {}
+        records, self._batch = self._batch, None
+        if not records:
+            return {}
+        renumbered: Dict[str, str] = {}
+        with self.lock(exclusive=True):
+            try:
+                if self._file_signature(os.stat(self.manifest_path)) != self._manifest_signature:
+                    self.forget()
+                    manifest = self._manifest(check=True)
+                    for record in records:
+                        renumbered.update(self._apply(manifest, record, renumbered))
+                self._write_dirty(self._manifest_data)
+            except BaseException:
+                # Изменения группы остаются и будут применены заново следующим commit().
+                self.forget()
+                self._batch = records
+                raise
+        return renumbered
+
+    # Повторное применение операции группы. Изменение записи, добавленной в той же группе, применяется к её новому ID.
+    # Возвращает изменённые ID добавленных записей.
+    def _apply(self, manifest: Dict, record: Dict, renumbered: Dict[str, str]) -> Dict[str, str]:
+        if record["op"] == "add":
+            ids = self._insert(manifest, record["entries"])
+            return {old: new for old, new in zip(record["ids"], ids) if old != new}
+        self._update(manifest, renumbered.get(record["id"], record["id"]), record["fields"])
+        return {}
+
+    def load(self) -> Entries:
+        with self._reading() as manifest:
+            shards = [self._shard(manifest, key) for key in sorted(manifest["shards"])]
+        data = self.entries_factory()
+        for entry_id, entry in sorted((item for shard in shards for item in shard.items()),
+                                      key=lambda item: id_order(item[0])):
+            data[entry_id] = entry
+        return data
+
+    # Добавление записей; ID выделяются после наибольшего выданного ID. Возвращает список ID.
+    def insert(self, entries: List[Dict[str, str]]) -> List[str]:
+        record = {"op": "add", "entries": entries}
+        with self._changing(record) as manifest:
+            record["ids"] = self._insert(manifest, entries)
+            return record["ids"]
+
+    def _insert(self, manifest: Dict, entries: List[Dict[str, str]]) -> List[str]:
+        ids = []
+        for entry in entries:
+            manifest["last_id"] += 1
+            entry_id = str(manifest["last_id"])
+            self._add_to(manifest, self.shard_key(entry.get("Дата")), entry_id, entry)
+            ids.append(entry_id)
+        return ids
+
+    # Изменение полей записи; при смене месяца запись переносится в файл нового месяца.
+    def update(self, entry_id: str, fields: Dict[str, str]) -> None:
+        with self._changing({"op": "edit", "id": entry_id, "fields": fields}) as manifest:
+            self._update(manifest, entry_id, fields)
+
+    def _update(self, manifest: Dict, entry_id: str, fields: Dict[str, str]) -> None:
+        key = self._locate(manifest, entry_id)
+        if key is None:
+            raise EntryNotFoundError(entry_id)
+        old_entry = self._shard(manifest, key)[entry_id]
+        for field in fields:
+            if field not in old_entry:
+                raise ValueError(f"Поле '{field}' не найдено в записи.")
+        entry = dict(old_entry)
+        entry.update(fields)
+        self._remove_from(manifest, key, entry_id)
+        self._add_to(manifest, self.shard_key(entry.get("Дата")), entry_id, entry)
+
+    # Месяц, в котором лежит запись: открываются только месяцы, в границы ID которых она попадает.
+    def _locate(self, manifest: Dict, entry_id: str) -> Optional[str]:
+        number = int(entry_id) if entry_id.isascii() and entry_id.isdigit() else None
+        for key, meta in sorted(manifest["shards"].items()):
+            if number is None:
+                if not meta["other_ids"]:
+                    continue
+            elif meta["min_id"] is None or not meta["min_id"] <= number <= meta["max_id"]:
+                continue
+            if entry_id in self._shard(manifest, key):
+                return key
+        return None
+
+    # Баланс, доходы и расходы в копейках - сумма итогов месяцев из манифеста.
+    def balance(self) -> Tuple[int, int, int]:
+        with self._reading() as manifest:
+            income = sum(meta["income"] for meta in manifest["shards"].values())
+            expense = sum(meta["expense"] for meta in manifest["shards"].values())
+        return income - expense, income, expense
+
+    # Пересчёт итогов месяцев по записям. Возвращает расхождение (манифест минус записи) в копейках.
+    def verify_totals(self) -> Tuple[int, int]:
+        with self.lock(exclusive=True):
+            manifest = self._manifest(check=True)
+            income_drift = expense_drift = 0
+            changed = False
+            for key, meta in list(manifest["shards"].items()):
+                actual = self._describe(self._shard(manifest, key), meta["signature"])
+                income_drift += meta["income"] - actual["income"]
+                expense_drift += meta["expense"] - actual["expense"]
+                changed = changed or meta.get("words") != actual["words"]
+                manifest["shards"][key] = actual
+            if income_drift or expense_drift or changed:
+                self._write_manifest(manifest)
+        return income_drift, expense_drift
+
+    # Перебор записей месяцев по порядку (внутри месяца - в порядке добавления); файлы читаются по мере перебора.
+    def _scan(self, keys: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        if keys is None:
+            with self._reading() as manifest:
+                keys = sorted(manifest["shards"])
+        for key in keys:
+            with self._reading() as manifest:
+                if key not in manifest["shards"]:
+                    continue
+                shard = self._shard(manifest, key)
+            yield from shard.items()
+
+    # Поиск по точному совпадению полей; при условии на дату открывается только её месяц.
+    # text - слова описания, как в textindex.TextIndex: открываются только месяцы, в словах которых есть начало
+    # каждого слова запроса, записи этих месяцев проверяются перебором.
+    def search(self, criteria: Dict[str, str], limit: Optional[int] = None, offset: int = 0,
+               text: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        query = None
+        if text is not None:
+            query = tokenize(text)
+            if not query:
+                return iter(())
+        keys = [self.shard_key(criteria["Дата"])] if "Дата" in criteria else None
+        if query is not None:
+            with self._reading() as manifest:
+                shards = manifest["shards"]
+                keys = [key for key in (sorted(shards) if keys is None else keys)
+                        if key in shards and self._may_contain(shards[key], query)]
+        matches = (
+            (entry_id, entry) for entry_id, entry in self._scan(keys)
+            if all(key in entry and entry[key] == value for key, value in criteria.items())
+            and (query is None or contains_words(query, entry.get("Описание")))
+        )
+        return islice(matches, offset, None if limit is None else offset + limit)
+
+    # Есть ли среди слов месяца начало каждого слова запроса. Месяц без слов в манифесте (манифест прежней версии)
+    # проверяется перебором.
+    @staticmethod
+    def _may_contain(meta: Dict, query: List[str]) -> bool:
+        words = meta.get("words")
+        return words is None or all(any(word.startswith(token) for word in words) for token in query)
+
+    # Поиск по диапазонам номеров дней и сумм в копейках; открываются только месяцы из диапазона дат.
+    def search_range(self, date_from: Optional[int] = None, date_to: Optional[int] = None,
+                     min_sum: Optional[int] = None, max_sum: Optional[int] = None,
+                     category: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, str]]]:
+        first = "" if date_from is None else self._month_key(date_from)
+        last = "9999-99" if date_to is None else self._month_key(date_to)
+        with self._reading() as manifest:
+            keys = [key for key in sorted(manifest["shards"]) if key != self.OTHER_SHARD and first <= key <= last]
+
+        found = []
+        for entry_id, entry in self._scan(keys):
+            ordinal = date_ordinal(entry["Дата"])
+            kopecks = kopecks_or_none(entry.get("Сумма"))
+            if ((date_from is None or ordinal >= date_from) and (date_to is None or ordinal <= date_to)
+                    and (min_sum is None or (kopecks is not None and kopecks >= min_sum))
+                    and (max_sum is None or (kopecks is not None and kopecks <= max_sum))
+                    and (category is None or entry.get("Категория") == category)):
+                found.append((ordinal, id_order(entry_id), entry_id, entry))
+        found.sort(key=lambda item: item[:2])
+        return ((entry_id, entry) for _, _, entry_id, entry in found)
+
+    # Замена всех записей (перенос из data.json, преобразование сумм): записи раскладываются по месяцам заново.
+    def save(self, data: Entries) -> None:
+        with self.lock(exclusive=True):
+            manifest = {"last_id": 0, "shards": {}}
+            existing = [item.name[:-len('.json')] for item in os.scandir(self.file_path)
+                        if item.name.endswith('.json') and item.name != self.MANIFEST]
+            self.forget()
+            for key in existing:
+                self._shards[key] = (None, {})
+                self._dirty.add(key)
+            for entry_id, entry in data.items():
+                self._add_to(manifest, self.shard_key(entry.get("Дата")), entry_id, entry)
+            manifest["last_id"] = max((meta["max_id"] or 0 for meta in manifest["shards"].values()), default=0)
+            self._write_dirty(manifest)
+
+
+STORAGE_BACKENDS = {
+    "json": JsonStorage,
+    "journal": JournalStorage,
+    "sqlite": SqliteStorage,
+    "sharded": ShardedStorage,
+}
+
+
+def create_storage(file_path: str, backend: str) -> Storage:
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Неизвестный тип хранилища: {backend}")
+    return STORAGE_BACKENDS[backend](file_path)
+
+
+# Одноразовый перенос существующего data.json в журнал: весь файл становится одним снимком.
+def import_json_to_journal(json_path: str, journal_path: str) -> int:
+    data = JsonStorage(json_path).load()
+    JournalStorage.write_snapshot(journal_path, data)
+    return len(data)
+
+
+# Одноразовый перенос существующего data.json в базу SQLite с сохранением ID записей.
+def import_json_to_sqlite(json_path: str, db_path: str) -> int:
+    data = JsonStorage(json_path).load()
+    storage = SqliteStorage(db_path)
+    storage.initialize()
+    try:
+        with storage._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries (id, seq, date, date_ordinal, category, amount, amount_kopecks, description) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (storage._row(entry_id, entry) for entry_id, entry in data.items()),
+            )
+            connection.executemany("DELETE FROM entry_tokens WHERE id = ?", ((entry_id,) for entry_id in data))
+            storage._index_tokens(connection, ((entry_id, entry.get("Описание", "")) for entry_id, entry in data.items()))
+    finally:
+        storage.close()
+    return len(data)
+
+
+# Одноразовый перенос существующего data.json в каталог по месяцам с сохранением ID записей.
+def import_json_to_shards(json_path: str, shards_path: str) -> int:
+    data = JsonStorage(json_path).load()
+    storage = ShardedStorage(shards_path)
+    storage.initialize()
+    storage.save(data)
+    return len(data)
+
+
+# Приведение сумм в записях к каноническому виду в копейках ("100.005" -> "100.01", "1e-07" -> "0.0").
+# Одноразовое преобразование файлов, созданных до перехода на копейки; суммы, которые не разбираются, не меняются.
+# Возвращает число изменённых записей.
+def convert_amounts(file_path: str, backend: str) -> int:
+    storage = create_storage(file_path, backend)
+    storage.initialize()
+    if isinstance(storage, SqliteStorage):
+        try:
+            with storage._transaction() as connection:
+                rows = connection.execute("SELECT id, amount FROM entries").fetchall()
+                changed = _normalized_amounts(rows)
+                connection.executemany(
+                    "UPDATE entries SET amount = ?, amount_kopecks = ? WHERE id = ?",
+                    ((amount, to_kopecks(amount), entry_id) for entry_id, amount in changed),
+                )
+        finally:
+            storage.close()
+        return len(changed)
+
+    with storage.lock(exclusive=True):
+        data = storage.load()
+        changed = _normalized_amounts((entry_id, entry.get("Сумма")) for entry_id, entry in data.items())
+        if changed:
+            for entry_id, amount in changed:
+                data[entry_id]["Сумма"] = amount
+            if isinstance(storage, JournalStorage):
+                JournalStorage.write_snapshot(file_path, data)
+            else:
+                storage.save(data)
+    return len(changed)
+
+
+def _normalized_amounts(amounts: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    changed = []
+    for entry_id, amount in amounts:
+        try:
+            normalized = normalize_amount(amount)
+        except (TypeError, ValueError):
+            continue
+        if normalized != amount:
+            changed.append((entry_id, normalized))
+    return changed
@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import pytest
+from main import Wallet, main
+from amounts import bound_to_kopecks, format_kopecks, normalize_amount, to_kopecks
+from storage import convert_amounts
+from totals import Totals
+from conftest import entry
+
+
+class TestKopecks:
+
+    @pytest.mark.parametrize("amount, kopecks", [
+        ("100.0", 10000), ("0.1", 10), ("100.25", 10025), ("-5.5", -550), ("7", 700),
+        ("1e-07", 0), ("1.5e3", 150000), ("100.005", 10001), ("0.004", 0), (12.34, 1234),
+    ])
+    def test_to_kopecks(self, amount, kopecks):
+        assert to_kopecks(amount) == kopecks
+
+    @pytest.mark.parametrize("kopecks, text", [(10000, "100.0"), (10050, "100.5"), (10025, "100.25"),
+                                               (5, "0.05"), (-550, "-5.5"), (0, "0.0")])
+    def test_format_kopecks(self, kopecks, text):
+        assert format_kopecks(kopecks) == text
+
+    def test_format_matches_float_strings(self):
+        for kopecks in range(0, 100000, 7):
+            assert format_kopecks(kopecks) == str(kopecks / 100)
+
+    @pytest.mark.parametrize("amount", ["abc", "nan", "inf", ""])
+    def test_invalid_amount(self, amount):
+        with pytest.raises(ValueError):
+            to_kopecks(amount)
+
+    def test_bounds_round_inward(self):
+        assert bound_to_kopecks(10.001, upper=False) == 1001
+        assert bound_to_kopecks(10.009, upper=True) == 1000
+        assert normalize_amount("1e-07") == "0.0"
+
+
+class TestExactTotals:
+
+    def test_many_small_amounts_sum_exactly(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entries([entry(amount="0.1", category="Доход") for _ in range(1000)]
+                           + [entry(amount="0.2") for _ in range(500)])
+
+        assert wallet.get_balance_kopecks() == (0, 10000, 10000)
+        assert wallet.get_balance() == (0.0, 100.0, 100.0)
+        assert wallet.verify_balance() == (0, 0)
+
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_report_sums_exactly(self, tmp_path, columnar):
+
+        Wallet(str(tmp_path / 'data.json')).add_entries([entry(amount="0.1", category="Доход") for _ in range(10)]
+                                                        + [entry(amount="0.3")])
+        wallet = Wallet(str(tmp_path / 'data.json'), columnar=columnar)
+
+        assert wallet.period_report("month") == [("01-2024", 1.0, 0.3, 0.7)]
+
+    def test_range_bounds_in_kopecks(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entries([entry(amount=amount, category="Доход") for amount in ("0.1", "0.3", "0.7")])
+
+        assert list(wallet.search_range(min_sum=0.3, max_sum=0.7)) == ["2", "3"]
+        assert list(wallet.search_range(min_sum=0.299, max_sum=0.301)) == ["2"]
+
+    def test_float_sidecar_is_ignored(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry(entry(amount="100.0", category="Доход"))
+        signature = wallet.storage.signature()
+        with open(Totals.sidecar_path(wallet.file_path), 'w') as file:
+            json.dump({"signature": list(signature), "income": 999.0, "expense": 0.0}, file)
+
+        assert Totals.load(wallet.file_path, signature) is None
+        assert Wallet(wallet.file_path).get_balance() == (100.0, 100.0, 0)
+
+
+class TestConvertAmounts:
+
+    def test_converts_legacy_amounts(self, backend_path):
+
+        backend, file_path = backend_path
+        Wallet(file_path, backend=backend).add_entries(
+            [entry(amount="100.005", category="Доход"), entry(amount="1e-07", category="Доход"), entry(amount="5.5")])
+
+        assert convert_amounts(file_path, backend) == 2
+        entries = Wallet(file_path, backend=backend).load_entries()
+        assert [item["Сумма"] for item in entries.values()] == ["100.01", "0.0", "5.5"]
+        assert convert_amounts(file_path, backend) == 0
+
+    def test_command(self, tmp_path, capsys):
+
+        file_path = str(tmp_path / 'data.json')
+        Wallet(file_path).add_entry(entry(amount="2.999", category="Доход"))
+
+        main(["--file", file_path, "convert-amounts"])
+
+        assert "Преобразовано записей: 1" in capsys.readouterr().out
+        assert Wallet(file_path).load_entries()["1"]["Сумма"] == "3.0"
+
+    def test_sqlite_migrates_float_column(self, tmp_path):
+
+        db_path = str(tmp_path / 'data.db')
+        connection = sqlite3.connect(db_path)
+        connection.executescript("""
+            CREATE TABLE entries (id TEXT PRIMARY KEY, seq INTEGER, date TEXT, date_ordinal INTEGER,
+                                  category TEXT, amount TEXT, amount_value REAL, description TEXT);
+            INSERT INTO entries VALUES ('1', 1, '01-01-2024', 738886, 'Доход', '0.1', 0.1, '');
+            INSERT INTO entries VALUES ('2', 2, '02-01-2024', 738887, 'Доход', '0.2', 0.2, '');
+        """)
+        connection.commit()
+        connection.close()
+
+        wallet = Wallet(db_path, backend="sqlite")
+
+        assert wallet.get_balance_kopecks() == (30, 30, 0)
+        assert list(wallet.search_range(min_sum=0.2)) == ["2"]
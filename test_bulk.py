@@ -0,0 +1,139 @@
+import json
+import pytest
+from main import Wallet, main, print_results
+from bulk import read_entries
+
+
+class TestReadEntries:
+
+    def test_read_csv(self, tmp_path):
+
+        path = tmp_path / 'rows.csv'
+        path.write_text("Дата,Категория,Сумма,Описание\n01-01-2024,Доход,100,Зарплата\n02-01-2024,Расход,20.5,\n", encoding='utf-8')
+
+        assert list(read_entries(str(path))) == [
+            {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"},
+            {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.5", "Описание": ""},
+        ]
+
+    def test_read_jsonl(self, tmp_path):
+
+        path = tmp_path / 'rows.jsonl'
+        path.write_text(json.dumps({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "7", "Описание": "зп"}, ensure_ascii=False) + "\n", encoding='utf-8')
+
+        assert list(read_entries(str(path))) == [{"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "7.0", "Описание": "зп"}]
+
+    @pytest.mark.parametrize("description", [7, ["a"], {"a": 1}])
+    def test_jsonl_description_must_be_string(self, tmp_path, description):
+
+        path = tmp_path / 'rows.jsonl'
+        rows = [{"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "7", "Описание": "зп"},
+                {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "1", "Описание": description}]
+        path.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows), encoding='utf-8')
+        wallet = Wallet(str(tmp_path / 'data.json'))
+
+        with pytest.raises(ValueError, match="Строка 2: Описание должно быть строкой."):
+            wallet.add_entries(read_entries(str(path)))
+        assert wallet.search_entry() == {}
+
+    @pytest.mark.parametrize("row, message", [
+        ("01/01/2024,Доход,100,x", "Дата должна быть в формате дд-мм-гггг"),
+        ("01-01-2024,доход,100,x", "Некорректная категория"),
+        ("01-01-2024,Доход,-1,x", "Значение не может быть отрицательным."),
+        ("01-01-2024,Доход,abc,x", "Значение должно быть числом"),
+    ])
+    def test_invalid_row(self, tmp_path, row, message):
+
+        path = tmp_path / 'rows.csv'
+        path.write_text("Дата,Категория,Сумма,Описание\n01-01-2024,Доход,1,ok\n" + row + "\n", encoding='utf-8')
+
+        with pytest.raises(ValueError, match=f"Строка 3: {message}"):
+            list(read_entries(str(path)))
+
+
+class TestAddEntries:
+
+    def test_add_entries_single_write(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+
+        entry_ids = wallet.add_entries({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": f"{i}.0", "Описание": ""} for i in range(1, 4))
+
+        with open(wallet.file_path, 'r') as file:
+            data = json.load(file)
+
+        assert entry_ids == ["2", "3", "4"]
+        assert list(data) == ["1", "2", "3", "4"]
+        assert wallet.get_balance() == (94.0, 100.0, 6.0)
+        assert list(wallet.search_entry(Сумма="3.0")) == ["4"]
+
+    def test_invalid_row_writes_nothing(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        path = tmp_path / 'rows.csv'
+        path.write_text("Дата,Категория,Сумма,Описание\n01-01-2024,Доход,1,ok\n01-01-2024,Доход,x,bad\n", encoding='utf-8')
+
+        with pytest.raises(ValueError):
+            wallet.add_entries(read_entries(str(path)))
+
+        assert wallet.search_entry() == {}
+
+    def test_import_command(self, tmp_path, capsys):
+
+        data_path = str(tmp_path / 'data.jsonl')
+        path = tmp_path / 'rows.csv'
+        path.write_text("Дата,Категория,Сумма,Описание\n01-01-2024,Доход,10,a\n02-01-2024,Расход,4,b\n", encoding='utf-8')
+
+        main(["--file", data_path, "--backend", "journal", "import", str(path)])
+
+        assert "Загружено записей: 2" in capsys.readouterr().out
+        assert Wallet(data_path, backend="journal").get_balance() == (6.0, 10.0, 4.0)
+
+    def test_command_errors(self, tmp_path, capsys):
+
+        data_path = str(tmp_path / 'data.json')
+        path = tmp_path / 'rows.csv'
+        path.write_text("Дата,Категория,Сумма,Описание\n01-01-2024,Доход,x,bad\n", encoding='utf-8')
+
+        for command in (["import", str(path)], ["import", str(tmp_path / 'rows.xml')],
+                        ["import", str(tmp_path / 'missing.csv')], ["export", str(tmp_path / 'out.xml')]):
+            with pytest.raises(SystemExit) as exit_info:
+                main(["--file", data_path, *command])
+            assert exit_info.value.code == 1
+            assert capsys.readouterr().err.startswith("Ошибка: ")
+
+        assert Wallet(data_path).search_entry() == {}
+
+
+class TestStreaming:
+
+    @pytest.fixture
+    def wallet(self, tmp_path):
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entries(
+            {"Дата": "01-01-2024", "Категория": "Расход" if i % 2 else "Доход", "Сумма": f"{i}.0", "Описание": f"запись {i}"}
+            for i in range(1, 11)
+        )
+        return wallet
+
+    def test_iter_entries_pagination(self, wallet):
+
+        page = list(wallet.iter_entries(limit=2, offset=1, Категория="Расход"))
+
+        assert [entry_id for entry_id, _ in page] == ["3", "5"]
+        assert list(wallet.iter_entries(limit=3)) == list(wallet.search_entry().items())[:3]
+
+    def test_export_roundtrip(self, wallet, tmp_path):
+
+        for name in ('out.csv', 'out.jsonl'):
+            target = str(tmp_path / name)
+            main(["--file", wallet.file_path, "export", target, "--where", "Категория=Расход"])
+
+            assert list(read_entries(target)) == list(wallet.search_entry(Категория="Расход").values())
+
+    def test_print_results_stream(self, wallet, capsys):
+
+        print_results(wallet.iter_entries(limit=1))
+
+        assert capsys.readouterr().out == "\n\n1: \n    Дата: 01-01-2024\n    Категория: Расход\n    Сумма: 1.0\n    Описание: запись 1\n \n"
@@ -0,0 +1,77 @@
+import json
+import random
+import tracemalloc
+import pytest
+from main import Wallet
+from columns import EntryColumns
+from conftest import IN_MEMORY_BACKENDS
+
+
+def make_entries(count, seed=1):
+    rng = random.Random(seed)
+    return {
+        str(i): {
+            "Дата": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2024",
+            "Категория": rng.choice(["Доход", "Расход"]),
+            "Сумма": str(float(rng.randint(1, 10000)) / 4),
+            "Описание": rng.choice(["Зарплата", "Покупки", "Кафе", "Транспорт"]),
+        }
+        for i in range(1, count + 1)
+    }
+
+
+class TestEntryColumns:
+
+    def test_lossless_roundtrip(self):
+
+        data = make_entries(50)
+        data["51"] = {"Дата": "1-01-2024", "Категория": "Подарок", "Сумма": "100", "Описание": "нестандартная"}
+        data["x"] = {"Дата": "01-01-2024", "Сумма": 5, "Комментарий": "другие поля"}
+
+        columns = EntryColumns(data)
+
+        assert len(columns) == len(data)
+        assert dict(columns.items()) == data
+        assert json.dumps(dict(columns.items()), ensure_ascii=False) == json.dumps(data, ensure_ascii=False)
+
+    def test_search_matches_dict(self, tmp_path):
+
+        data = make_entries(300)
+        path = tmp_path / 'data.json'
+        path.write_text(json.dumps(data, ensure_ascii=False))
+        plain = Wallet(str(path))
+        columnar = Wallet(str(path), columnar=True)
+
+        for kwargs in ({"Категория": "Расход"}, {"Описание": "Кафе", "Категория": "Доход"},
+                       {"Сумма": data["7"]["Сумма"]}, {"Дата": data["3"]["Дата"]}, {"Поле": "x"}):
+            assert columnar.search_entry(**kwargs) == plain.search_entry(**kwargs)
+        assert columnar.get_balance() == plain.get_balance()
+
+    def test_columnar_wallet_add_and_edit(self, tmp_path):
+
+        for backend, name in IN_MEMORY_BACKENDS:
+            wallet = Wallet(str(tmp_path / name), backend=backend, columnar=True)
+            wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+            wallet.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"})
+            wallet.edit_entry("2", Категория="Доход")
+
+            assert wallet.verify_balance() == (0, 0)
+            assert wallet.get_balance() == (120.0, 120.0, 0)
+            assert Wallet(wallet.file_path, backend=backend).search_entry(Категория="Доход") == wallet.search_entry(Категория="Доход")
+
+    def test_memory_reduction(self):
+
+        raw = json.dumps(make_entries(20000), ensure_ascii=False)
+
+        tracemalloc.start()
+        data = json.loads(raw)
+        dict_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        columns = EntryColumns(json.loads(raw))
+        columns_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        assert len(columns) == len(data)
+        assert columns_size * 3 < dict_size
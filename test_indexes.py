@@ -0,0 +1,117 @@
+import random
+import pytest
+from main import Wallet
+from indexes import SortedIndex
+
+
+# Поиск полным проходом - эталон, с которым сравниваются результаты поиска по индексам.
+def scan(data, **kwargs):
+    return {
+        entry_id: entry for entry_id, entry in data.items()
+        if all(key in entry and entry[key] == value for key, value in kwargs.items())
+    }
+
+
+@pytest.fixture
+def filled_wallet(tmp_path):
+    wallet = Wallet(str(tmp_path / 'data.json'))
+    rng = random.Random(1)
+    for _ in range(200):
+        wallet.add_entry({
+            "Дата": f"{rng.randint(1, 5):02d}-01-2024",
+            "Категория": rng.choice(["Доход", "Расход"]),
+            "Сумма": str(float(rng.randint(1, 10))),
+            "Описание": rng.choice(["Зарплата", "Покупки"]),
+        })
+    return wallet
+
+
+class TestIndexedSearch:
+
+    @pytest.mark.parametrize("kwargs", [
+        {"Дата": "03-01-2024"},
+        {"Категория": "Расход", "Дата": "02-01-2024"},
+        {"Сумма": "5.0", "Категория": "Доход"},
+        {"Сумма": "5"},
+        {"Описание": "Покупки", "Дата": "01-01-2024"},
+        {"Описание": "Зарплата"},
+        {"Дата": "31-12-1999"},
+    ])
+    def test_matches_full_scan(self, filled_wallet, kwargs):
+
+        assert filled_wallet.search_entry(**kwargs) == scan(filled_wallet.load_entries(), **kwargs)
+
+    def test_indexes_follow_edits(self, filled_wallet):
+
+        filled_wallet.search_entry(Дата="01-01-2024")
+        filled_wallet.edit_entry("1", Дата="31-12-1999", Сумма="99.0")
+        filled_wallet.add_entry({"Дата": "31-12-1999", "Категория": "Доход", "Сумма": "99.0", "Описание": "Бонус"})
+
+        results = filled_wallet.search_entry(Дата="31-12-1999", Сумма="99.0")
+
+        assert list(results) == ["1", "201"]
+        for kwargs in ({"Дата": "01-01-2024"}, {"Категория": "Доход", "Сумма": "99.0"}):
+            assert filled_wallet.search_entry(**kwargs) == scan(filled_wallet.load_entries(), **kwargs)
+
+
+    def test_pages_after_edit_match_fresh_load(self, filled_wallet):
+
+        filled_wallet.search_entry(Дата="01-01-2024")
+        edited = next(iter(filled_wallet.search_entry(Дата="02-01-2024")))
+        filled_wallet.edit_entry(edited, Дата="01-01-2024", Сумма="7.0")
+        fresh = Wallet(filled_wallet.file_path)
+
+        for kwargs in ({"Дата": "01-01-2024"}, {"Сумма": "7.0"}, {"Дата": "01-01-2024", "Категория": "Доход"}):
+            for offset in (0, 3):
+                page = list(filled_wallet.iter_entries(limit=3, offset=offset, **kwargs))
+                assert page == list(fresh.iter_entries(limit=3, offset=offset, **kwargs))
+        assert list(filled_wallet.search_range(date_to="01-01-2024")) == list(fresh.search_range(date_to="01-01-2024"))
+
+
+class TestSortedIndex:
+
+    def test_range_and_remove(self):
+
+        index = SortedIndex("Сумма", float)
+        index.build({"1": {"Сумма": "3.0"}, "2": {"Сумма": "1.0"}, "3": {"Сумма": "2.0"}, "4": {"Сумма": "abc"}})
+
+        assert index.range(1.5, 3.0) == ["3", "1"]
+        assert index.lookup("abc") == ["4"]
+
+        index.remove("3", {"Сумма": "2.0"})
+        assert index.range() == ["2", "1"]
+
+
+class TestSearchRange:
+
+    def test_matches_full_scan(self, filled_wallet):
+
+        data = filled_wallet.load_entries()
+        expected = {
+            entry_id: entry for entry_id, entry in data.items()
+            if "02-01-2024" <= entry["Дата"] <= "04-01-2024" and 3 <= float(entry["Сумма"]) <= 6
+            and entry["Категория"] == "Расход"
+        }
+
+        results = filled_wallet.search_range(date_from="02-01-2024", date_to="04-01-2024",
+                                             min_sum=3, max_sum=6, category="Расход")
+
+        assert results == expected
+        dates = [entry["Дата"] for entry in results.values()]
+        assert dates == sorted(dates)
+
+    def test_dates_compare_as_dates(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "31-12-2023", "Категория": "Доход", "Сумма": "1.0", "Описание": ""})
+        wallet.add_entry({"Дата": "1-01-2024", "Категория": "Доход", "Сумма": "2.0", "Описание": ""})
+        wallet.add_entry({"Дата": "15-02-2024", "Категория": "Расход", "Сумма": "3.0", "Описание": ""})
+
+        assert list(wallet.search_range(date_from="01-01-2024", date_to="31-01-2024")) == ["2"]
+        assert list(wallet.search_range(max_sum=2.5)) == ["1", "2"]
+        assert list(wallet.search_range(date_to="31-01-2024", min_sum=1.5)) == ["2"]
+
+    def test_invalid_date(self, filled_wallet):
+
+        with pytest.raises(ValueError):
+            filled_wallet.search_range(date_from="2024-01-01")
@@ -0,0 +1,54 @@
+import json
+import pstats
+from main import Wallet, main
+
+
+ENTRY = {"Дата": "01-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"}
+
+
+class TestWalletStats:
+
+    def test_disabled_by_default(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry(ENTRY)
+
+        assert wallet.stats() == {"enabled": False}
+        assert "add_entry" not in vars(wallet)
+
+    def test_counts_calls_bytes_and_scans(self, tmp_path):
+
+        file_path = tmp_path / 'data.json'
+        file_path.write_text(json.dumps({str(number): ENTRY for number in range(1, 11)}, ensure_ascii=False))
+        initial_size = len(file_path.read_bytes())
+        wallet = Wallet(str(file_path), instrument=True)
+
+        wallet.search_entry(Описание="Покупки")
+        wallet.add_entry(ENTRY)
+        stats = wallet.stats()
+
+        assert stats["calls"]["search_entry"] == 1
+        assert stats["calls"]["add_entry"] == 1
+        assert stats["bytes_read"] == initial_size
+        assert stats["bytes_written"] == len(file_path.read_bytes())
+        assert stats["entries_scanned"] == 10
+        assert set(stats["phases"]) == {"io_read", "parse", "io_write", "compute"}
+        assert stats["phases"]["io_write"] > 0
+
+    def test_reset(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.jsonl'), backend="journal", instrument=True)
+        wallet.add_entry(ENTRY)
+
+        assert wallet.stats(reset=True)["bytes_written"] > 0
+        assert wallet.stats()["calls"] == {}
+
+    def test_profile_flag(self, tmp_path, monkeypatch, capsys):
+
+        profile_path = str(tmp_path / 'session.prof')
+        inputs = ["1", "5"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        main(["--file", str(tmp_path / 'data.json'), "--profile", profile_path])
+
+        assert '"get_balance": 1' in capsys.readouterr().err
+        assert pstats.Stats(profile_path).total_calls > 0
@@ -1,8 +1,10 @@
 import os
 import json
+import threading
 import pytest
 from main import (
     Wallet,
+    main,
     get_date_input,
     get_category_input,
     get_entry_data_for_add_entry,
@@ -10,6 +12,7 @@ from main import (
     get_kwargs_for_search_entry,
     get_summ_input
 )
+from conftest import IN_MEMORY_BACKENDS
 
 @pytest.fixture(scope='class')
 def test_data_file():
@@ -24,7 +27,9 @@ def test_data_file():
 
     yield 'test_data.json'
     
-    os.remove('test_data.json')
+    for suffix in ('', '.totals', '.lock'):
+        if os.path.exists('test_data.json' + suffix):
+            os.remove('test_data.json' + suffix)
 
 @pytest.fixture(scope='class')
 def wallet(test_data_file):
@@ -88,6 +93,27 @@ class TestInputFunctions:
         assert "Значение не может быть отрицательным." in out_str_error.out
         assert result == '80.7'
 
+    @pytest.mark.parametrize("value", ['-0.001', '-0.004', '-1e-9'])
+    def test_small_negative_sum_input(self, monkeypatch, capsys, value):
+        input_values = [value, '80.7']
+        monkeypatch.setattr('builtins.input', lambda _: input_values.pop(0))
+        result = get_summ_input()
+        assert "Значение не может быть отрицательным." in capsys.readouterr().out
+        assert result == '80.7'
+
+    def test_rounded_sum_input(self, monkeypatch, capsys):
+        input_values = ['80.123']
+        monkeypatch.setattr('builtins.input', lambda _: input_values.pop(0))
+        result = get_summ_input()
+        assert "Сумма округлена до копеек: 80.12" in capsys.readouterr().out
+        assert result == '80.12'
+
+    def test_sum_input_without_rounding_is_silent(self, monkeypatch, capsys):
+        input_values = ['80.10']
+        monkeypatch.setattr('builtins.input', lambda _: input_values.pop(0))
+        assert get_summ_input() == '80.1'
+        assert capsys.readouterr().out == ''
+
 @pytest.mark.usefixtures("wallet")
 class TestGetBalance:
 
@@ -240,3 +266,195 @@ class TestGetKwargsForSearchEntry:
         kwargs = get_kwargs_for_search_entry()
 
         assert kwargs == {'Дата': '02-01-2024', 'Категория':'Расход'}
+
+class TestEntryCache:
+
+    def test_repeated_reads_hit_cache(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        misses = wallet.cache_misses
+
+        wallet.get_balance()
+        wallet.search_entry(Категория="Доход")
+        wallet.get_balance()
+
+        assert wallet.cache_misses == misses
+        assert wallet.cache_hits >= 3
+
+    def test_external_change_invalidates_cache(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        assert wallet.get_balance() == (100.0, 100.0, 0)
+
+        other = Wallet(wallet.file_path)
+        other.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"})
+        misses = wallet.cache_misses
+
+        assert list(wallet.search_entry(Категория="Расход")) == ["2"]
+        assert wallet.cache_misses == misses + 1
+        assert wallet.get_balance() == (80.0, 100.0, 20.0)
+
+
+class TestRunningTotals:
+
+    def test_totals_follow_add_and_edit(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        wallet.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"})
+
+        wallet.edit_entry("2", Категория="Доход", Сумма="30.0")
+
+        assert wallet.get_balance() == (130.0, 130.0, 0)
+        assert wallet.verify_balance() == (0, 0)
+
+    def test_cold_start_uses_sidecar(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+
+        cold = Wallet(wallet.file_path)
+        assert cold.get_balance() == (100.0, 100.0, 0)
+        assert cold.cache_misses == 0
+
+    def test_verify_reports_drift(self, tmp_path):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        wallet._totals.income_kopecks = 9000
+
+        assert wallet.verify_balance() == (-10.0, 0)
+        assert wallet.get_balance() == (100.0, 100.0, 0)
+
+
+ENTRY = {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": ""}
+
+
+class TestWriteBehind:
+
+    def test_batch_reads_own_writes_and_flushes_once(self, backend_path):
+
+        backend, file_path = backend_path
+        wallet = Wallet(file_path, backend=backend)
+        with wallet.batch():
+            for number in range(5):
+                wallet.add_entry(dict(ENTRY, Описание=str(number)))
+            wallet.edit_entry("5", Сумма="10.0")
+
+            assert wallet.get_balance() == (14.0, 14.0, 0)
+            assert list(wallet.search_entry(Описание="4")) == ["5"]
+            assert Wallet(file_path, backend=backend).get_balance() == (0, 0, 0)
+
+        assert len(Wallet(file_path, backend=backend).load_entries()) == 5
+        assert Wallet(file_path, backend=backend).get_balance() == (14.0, 14.0, 0)
+
+    def test_flush_every(self, backend_path):
+
+        backend, file_path = backend_path
+        wallet = Wallet(file_path, backend=backend, flush_every=3)
+        for _ in range(4):
+            wallet.add_entry(ENTRY)
+
+        assert len(Wallet(file_path, backend=backend).load_entries()) == 3
+        wallet.flush()
+        assert len(Wallet(file_path, backend=backend).load_entries()) == 4
+
+    def test_flush_interval(self, backend_path):
+
+        backend, file_path = backend_path
+        wallet = Wallet(file_path, backend=backend, flush_interval=0.01)
+        wallet.add_entry(ENTRY)
+        wallet._flush_timer.join()
+
+        assert len(Wallet(file_path, backend=backend).load_entries()) == 1
+
+    def test_context_manager_flushes(self, backend_path):
+
+        backend, file_path = backend_path
+        with Wallet(file_path, backend=backend, flush_every=100) as wallet:
+            wallet.add_entries([ENTRY] * 3)
+
+        assert list(Wallet(file_path, backend=backend).load_entries()) == ["1", "2", "3"]
+
+    def test_failed_edit_keeps_buffer(self, backend_path):
+
+        backend, file_path = backend_path
+        wallet = Wallet(file_path, backend=backend, flush_every=100)
+        wallet.add_entry(ENTRY)
+        with pytest.raises(ValueError):
+            wallet.edit_entry("10", Сумма="2.0")
+        wallet.flush()
+
+        assert list(Wallet(file_path, backend=backend).load_entries()) == ["1"]
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_failed_add_keeps_memory_and_buffer_in_step(self, tmp_path, backend, name):
+
+        file_path = str(tmp_path / name)
+        wallet = Wallet(file_path, backend=backend, flush_every=100)
+        wallet.add_entry(ENTRY)
+        with pytest.raises(ValueError):
+            wallet.add_entries([ENTRY, dict(ENTRY, Сумма="abc")])
+        with pytest.raises(ValueError):
+            wallet.add_entry(dict(ENTRY, Сумма="abc"))
+        wallet.add_entry(ENTRY)
+        wallet.flush()
+
+        assert list(wallet.load_entries()) == ["1", "2"]
+        assert Wallet(file_path, backend=backend).load_entries() == wallet.load_entries()
+        assert wallet.get_balance() == (2.0, 2.0, 0)
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_external_write_before_flush(self, tmp_path, backend, name):
+
+        file_path = str(tmp_path / name)
+        wallet = Wallet(file_path, backend=backend, flush_every=100)
+        wallet.add_entry(dict(ENTRY, Описание="своя"))
+        wallet.edit_entry("1", Сумма="5.0")
+        Wallet(file_path, backend=backend).add_entry(dict(ENTRY, Описание="чужая"))
+        wallet.flush()
+
+        data = Wallet(file_path, backend=backend).load_entries()
+        assert data == {"1": dict(ENTRY, Описание="чужая"), "2": dict(ENTRY, Описание="своя", Сумма="5.0")}
+        assert wallet.load_entries() == data
+        assert wallet.renumbered == {"1": "2"}
+        assert wallet.verify_balance() == (0, 0)
+
+    def test_main_flushes_on_exit(self, tmp_path, monkeypatch):
+
+        file_path = str(tmp_path / 'data.json')
+        inputs = ["2", "01-01-2024", "Доход", "100", "Зарплата", "5"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        main(["--file", file_path, "--flush-interval", "60000"])
+
+        assert Wallet(file_path).get_balance() == (100.0, 100.0, 0)
+
+
+class TestThreadedReads:
+
+    def test_reads_during_writes_from_other_thread(self, tmp_path):
+
+        file_path = str(tmp_path / 'data.jsonl')
+        wallet = Wallet(file_path, backend="journal")
+        wallet.add_entries(dict(ENTRY, Описание=str(number)) for number in range(20000))
+        errors = []
+
+        def write():
+            try:
+                for _ in range(200):
+                    wallet.add_entry(dict(ENTRY, Описание="новая"))
+            except Exception as error:
+                errors.append(error)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while writer.is_alive():
+            wallet.search_entry(Описание="новая")
+            wallet.search_range(min_sum=0.5)
+            wallet.get_balance()
+        writer.join()
+
+        assert errors == []
+        assert len(wallet.search_entry(Описание="новая")) == 200
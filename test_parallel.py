@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import pytest
+import parallel
+from main import Wallet
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from wallet_bench import generate_entries, write_wallet
+
+pytestmark = pytest.mark.skipif(parallel.CONTEXT is None, reason="fork недоступен")
+
+
+@pytest.fixture
+def file_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "MIN_ENTRIES", 100)
+    return write_wallet(str(tmp_path), "json", generate_entries(2000))
+
+
+class TestSplit:
+
+    @pytest.mark.parametrize("count, parts", [(10, 3), (2, 4), (0, 2), (9, 3)])
+    def test_covers_all(self, count, parts):
+        bounds = parallel.split(count, parts)
+
+        assert [index for start, stop in bounds for index in range(start, stop)] == list(range(count))
+
+
+class TestParallelScan:
+
+    @pytest.mark.parametrize("criteria", [{"Описание": "Кафе"}, {"Описание": "Кафе", "Категория": "Расход"},
+                                          {"Описание": "нет такого"}, {"Поле": "1"}])
+    def test_search_matches_serial(self, file_path, criteria):
+        serial = Wallet(file_path).search_entry(**criteria)
+        wallet = Wallet(file_path, workers=3)
+        assert parallel.enabled(wallet.load_entries(), wallet.workers)
+
+        assert list(wallet.search_entry(**criteria).items()) == list(serial.items())
+        assert list(wallet.iter_entries(limit=5, offset=2, **criteria)) == list(serial.items())[2:7]
+
+    def test_totals_match_serial(self, file_path):
+        serial = Wallet(file_path)
+        wallet = Wallet(file_path, workers=4)
+
+        assert wallet.get_balance_kopecks() == serial._count_totals(serial.load_entries()).balance_kopecks()
+        assert wallet.verify_balance() == (0, 0)
+
+    def test_invalid_amount_raises(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(parallel, "MIN_ENTRIES", 100)
+        data = generate_entries(500)
+        data["300"]["Сумма"] = "abc"
+        wallet = Wallet(write_wallet(str(tmp_path), "json", data), workers=2)
+
+        with pytest.raises(ValueError):
+            wallet.get_balance()
+
+    def test_small_wallet_stays_serial(self, tmp_path, monkeypatch):
+        def forbidden(*args):
+            raise AssertionError("запущены процессы")
+
+        monkeypatch.setattr(parallel, "_run", forbidden)
+        wallet = Wallet(str(tmp_path / 'data.json'), workers=4)
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": "Кафе"})
+
+        assert list(wallet.search_entry(Описание="Кафе")) == ["1"]
+
+    def test_other_threads_keep_it_serial(self, file_path, monkeypatch):
+        def forbidden(*args):
+            raise AssertionError("запущены процессы")
+
+        monkeypatch.setattr(parallel, "_run", forbidden)
+        serial = Wallet(file_path).search_entry(Описание="Кафе")
+        wallet = Wallet(file_path, workers=4)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(wallet.search_entry(Описание="Кафе")))
+        thread.start()
+        thread.join()
+
+        assert results == [serial]
@@ -0,0 +1,67 @@
+import json
+import pytest
+from main import Wallet, main
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "columnar"])
+def wallet(request, tmp_path):
+    data = {
+        "1": {"Дата": "31-12-2023", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"},
+        "2": {"Дата": "01-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"},
+        "3": {"Дата": "15-01-2024", "Категория": "Доход", "Сумма": "50.0", "Описание": "Премия"},
+        "4": {"Дата": "1-02-2024", "Категория": "Расход", "Сумма": "10.0", "Описание": "Кафе"},
+        "5": {"Дата": "01-01-2024", "Категория": "Расход", "Сумма": "5.0", "Описание": "Транспорт"},
+    }
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps(data, ensure_ascii=False))
+    return Wallet(str(path), columnar=request.param)
+
+
+class TestPeriodReport:
+
+    def test_month(self, wallet):
+
+        assert wallet.period_report("month") == [
+            ("12-2023", 100.0, 0.0, 100.0),
+            ("01-2024", 50.0, 25.0, 25.0),
+            ("02-2024", 0.0, 10.0, -10.0),
+        ]
+
+    def test_day_and_year(self, wallet):
+
+        assert wallet.period_report("day")[1] == ("01-01-2024", 0.0, 25.0, -25.0)
+        assert wallet.period_report("year") == [("2023", 100.0, 0.0, 100.0), ("2024", 50.0, 35.0, 15.0)]
+
+    def test_running_balance(self, wallet):
+
+        assert wallet.running_balance() == [
+            ("31-12-2023", 100.0),
+            ("01-01-2024", 75.0),
+            ("15-01-2024", 125.0),
+            ("01-02-2024", 115.0),
+        ]
+        assert wallet.running_balance()[-1][1] == wallet.get_balance()[0]
+
+    def test_unknown_period(self, wallet):
+
+        with pytest.raises(ValueError):
+            wallet.period_report("week")
+
+    def test_report_command(self, wallet, capsys):
+
+        main(["--file", wallet.file_path, "report", "--period", "year"])
+
+        out = capsys.readouterr().out
+        assert "2024" in out and "15.00" in out
+
+    def test_menu_report(self, wallet, monkeypatch, capsys):
+
+        inputs = ["6", "год", "5"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        main(["--file", wallet.file_path])
+
+        out = capsys.readouterr().out
+        assert "5. Выйти" in out and "6. Отчёт по периодам" in out
+        assert "2024" in out and "15.00" in out
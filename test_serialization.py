@@ -0,0 +1,59 @@
+import json
+import pytest
+import serialization
+from main import Wallet, main
+from storage import JsonStorage
+
+
+# Исходный data.json из репозитория: кириллические ключи, суммы строками, даты без ведущего нуля.
+with open('data.json', 'r', encoding='utf-8') as file:
+    ORIGINAL = json.load(file)
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return request.param
+
+
+class TestSerialization:
+
+    def test_round_trip(self, backend):
+
+        assert serialization.loads(serialization.dumps(ORIGINAL)) == ORIGINAL
+        assert list(serialization.loads(serialization.dumps(ORIGINAL))["1"]) == ["Дата", "Категория", "Сумма", "Описание"]
+
+    def test_compact_output_is_the_same_for_both_backends(self, backend):
+
+        content = serialization.dumps(ORIGINAL)
+
+        assert content == json.dumps(ORIGINAL, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        assert "Зарплата".encode('utf-8') in content
+
+    def test_pretty_matches_original_format(self, backend):
+
+        assert serialization.dumps(ORIGINAL, pretty=True).decode('utf-8') == json.dumps(ORIGINAL, indent=4, ensure_ascii=False)
+
+    def test_storage_reads_pretty_and_writes_compact(self, tmp_path, backend):
+
+        file_path = tmp_path / 'data.json'
+        file_path.write_text(json.dumps(ORIGINAL, indent=4, ensure_ascii=False), encoding='utf-8')
+        storage = JsonStorage(str(file_path))
+        storage.save(storage.load())
+
+        assert '\n' not in file_path.read_text(encoding='utf-8')
+        assert JsonStorage(str(file_path)).load() == ORIGINAL
+
+    def test_pretty_flag(self, tmp_path, monkeypatch):
+
+        file_path = str(tmp_path / 'data.json')
+        inputs = ["2", "01-01-2024", "Доход", "100", "Зарплата", "5"]
+        monkeypatch.setattr('builtins.input', lambda _: inputs.pop(0))
+        main(["--file", file_path, "--pretty"])
+
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+        assert content == json.dumps(Wallet(file_path).load_entries(), indent=4, ensure_ascii=False)
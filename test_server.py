@@ -0,0 +1,197 @@
+import time
+import asyncio
+from urllib.parse import urlencode
+import pytest
+from main import Wallet
+from server import WalletClient, WalletServer
+from conftest import IN_MEMORY_BACKENDS
+
+
+ENTRY = {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100", "Описание": "Зарплата"}
+
+
+# Запуск сервера на свободном порту, выполнение сценария клиентом и остановка сервера.
+def run_with_server(wallet, scenario):
+
+    async def run():
+        server = WalletServer(wallet)
+        await server.start(port=0)
+        client = WalletClient(*server.address)
+        try:
+            return await scenario(server, client)
+        finally:
+            await client.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+class TestWalletServer:
+
+    def test_add_and_balance(self, wallet):
+
+        async def scenario(server, client):
+            assert await client.request("POST", "/entries", ENTRY) == (201, {"id": "1"})
+            return await client.request("GET", "/balance")
+
+        assert run_with_server(wallet, scenario) == (200, {"balance": 100.0, "income": 100.0, "expense": 0})
+        assert wallet.load_entries()["1"]["Сумма"] == "100.0"
+
+    def test_search_and_edit(self, wallet):
+
+        async def scenario(server, client):
+            await client.request("POST", "/entries", ENTRY)
+            await client.request("POST", "/entries", dict(ENTRY, Категория="Расход", Сумма="30"))
+            status, body = await client.request("PATCH", "/entries/2", {"Сумма": "40"})
+            assert (status, body) == (200, {"id": "2"})
+            return await client.request("GET", "/entries?" + urlencode({"Категория": "Расход", "limit": 5}))
+
+        status, body = run_with_server(wallet, scenario)
+
+        assert status == 200
+        assert body == {"entries": {"2": {"Дата": "01-01-2024", "Категория": "Расход", "Сумма": "40.0", "Описание": "Зарплата"}}}
+
+    def test_errors(self, wallet):
+
+        async def scenario(server, client):
+            return [
+                await client.request("POST", "/entries", dict(ENTRY, Сумма="-1")),
+                await client.request("POST", "/entries", dict(ENTRY, Описание=7)),
+                await client.request("PATCH", "/entries/10", {"Сумма": "1"}),
+                await client.request("GET", "/entries?limit=x"),
+                await client.request("GET", "/unknown"),
+                await client.request("DELETE", "/balance"),
+            ]
+
+        statuses = [status for status, _ in run_with_server(wallet, scenario)]
+
+        assert statuses == [400, 400, 404, 400, 404, 405]
+
+    def test_utf8_query(self, wallet):
+
+        async def scenario(server, client):
+            await client.request("POST", "/entries", ENTRY)
+            await client.request("POST", "/entries", dict(ENTRY, Категория="Расход", Сумма="30"))
+            reader, writer = await asyncio.open_connection(*server.address)
+            writer.write(b"GET /entries?text=\xff HTTP/1.1\r\n\r\n")
+            status_line = await reader.readline()
+            writer.close()
+            return [
+                await client.request("GET", "/entries?Категория=Расход"),
+                await client.request("GET", "/entries?Категория=%FF"),
+                status_line,
+            ]
+
+        found, invalid, raw = run_with_server(wallet, scenario)
+
+        assert found == (200, {"entries": {"2": dict(ENTRY, Категория="Расход", Сумма="30.0")}})
+        assert invalid[0] == 400
+        assert raw.startswith(b"HTTP/1.1 400 ")
+
+    def test_patch_value_types(self, wallet):
+
+        async def scenario(server, client):
+            await client.request("POST", "/entries", ENTRY)
+            return [
+                await client.request("PATCH", "/entries/1", {"Дата": 123}),
+                await client.request("PATCH", "/entries/1", {"Дата": ["01-01-2024"]}),
+                await client.request("PATCH", "/entries/1", {"Описание": 7}),
+                await client.request("PATCH", "/entries/1", {"Категория": None}),
+                await client.request("PATCH", "/entries/1", {"Сумма": True}),
+                await client.request("PATCH", "/entries/1", {"Описание": "Аванс", "Сумма": 50}),
+            ]
+
+        responses = run_with_server(wallet, scenario)
+
+        assert [status for status, _ in responses] == [400, 400, 400, 400, 400, 200]
+        assert responses[0][1] == {"error": "Дата должна быть в формате дд-мм-гггг"}
+        assert wallet.search_entry() == {"1": dict(ENTRY, Сумма="50.0", Описание="Аванс")}
+
+    def test_unexpected_error_returns_500(self, wallet, monkeypatch, capsys):
+
+        def broken():
+            raise RuntimeError("сбой")
+
+        monkeypatch.setattr(wallet, "get_balance", broken)
+
+        async def scenario(server, client):
+            return [await client.request("GET", "/balance"), await client.request("GET", "/entries")]
+
+        assert run_with_server(wallet, scenario) == [(500, {"error": "Внутренняя ошибка сервера."}),
+                                                     (200, {"entries": {}})]
+        assert "RuntimeError: сбой" in capsys.readouterr().err
+
+    def test_concurrent_adds_are_grouped(self, wallet):
+
+        async def scenario(server, client):
+            clients = [WalletClient(*server.address) for _ in range(20)]
+            responses = await asyncio.gather(*(
+                other.request("POST", "/entries", dict(ENTRY, Описание=str(number)))
+                for number, other in enumerate(clients)
+            ))
+            for other in clients:
+                await other.close()
+            return responses, server.flushes
+
+        responses, flushes = run_with_server(wallet, scenario)
+
+        assert sorted((body["id"] for _, body in responses), key=int) == [str(number) for number in range(1, 21)]
+        assert flushes < 20
+        assert wallet.get_balance() == (2000.0, 2000.0, 0)
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_concurrent_edits_are_saved_together(self, tmp_path, backend, name):
+
+        wallet = Wallet(str(tmp_path / name), backend=backend)
+        wallet.add_entries([dict(ENTRY, Сумма="1.0")] * 10)
+        writes = []
+        for method in ("add", "add_many", "edit", "write_batch"):
+            original = getattr(wallet.storage, method)
+            setattr(wallet.storage, method, lambda *args, original=original: writes.append(1) or original(*args))
+
+        async def scenario(server, client):
+            clients = [WalletClient(*server.address) for _ in range(10)]
+            responses = await asyncio.gather(*(
+                other.request("PATCH", f"/entries/{number}", {"Сумма": "2"})
+                for number, other in enumerate(clients, 1)
+            ))
+            for other in clients:
+                await other.close()
+            return responses, server.flushes
+
+        responses, flushes = run_with_server(wallet, scenario)
+
+        assert [status for status, _ in responses] == [200] * 10
+        assert len(writes) == flushes < 10
+        assert Wallet(wallet.file_path, backend=backend).get_balance() == (20.0, 20.0, 0)
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_read_does_not_wait_for_slow_write(self, tmp_path, backend, name):
+
+        wallet = Wallet(str(tmp_path / name), backend=backend)
+        write_batch = wallet.storage.write_batch
+
+        def slow_write_batch(*args):
+            time.sleep(1)
+            write_batch(*args)
+
+        wallet.storage.write_batch = slow_write_batch
+
+        async def scenario(server, client):
+            reader = WalletClient(*server.address)
+            writing = asyncio.create_task(client.request("POST", "/entries", ENTRY))
+            await asyncio.sleep(0.2)
+            started = time.perf_counter()
+            balance = await reader.request("GET", "/balance")
+            elapsed = time.perf_counter() - started
+            written = writing.done()
+            await writing
+            await reader.close()
+            return balance, elapsed, written
+
+        balance, elapsed, written = run_with_server(wallet, scenario)
+
+        assert not written
+        assert elapsed < 0.5
+        assert balance == (200, {"balance": 100.0, "income": 100.0, "expense": 0})
+        assert Wallet(wallet.file_path, backend=backend).get_balance() == (100.0, 100.0, 0)
@@ -0,0 +1,190 @@
+import os
+import json
+import pytest
+from main import Wallet, main
+from storage import ShardedStorage
+from conftest import entry
+
+
+ENTRIES = [
+    entry("05-01-2024", "100.0", "Доход", "Зарплата"),
+    entry("20-01-2024", "30.0"),
+    entry("03-02-2024", "0.1"),
+    entry("15-02-2024", "0.2"),
+    entry("abc", "5.0", "Доход"),
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    wallet_path = str(tmp_path / 'data')
+    Wallet(wallet_path, backend="sharded").add_entries(ENTRIES)
+    return wallet_path
+
+
+# Пути файлов, прочитанных и записанных хранилищем.
+@pytest.fixture
+def opened(monkeypatch):
+    paths = {"read": [], "written": []}
+    read_json, write_json = ShardedStorage._read_json, ShardedStorage._write_json
+
+    def reading(self, path):
+        paths["read"].append(os.path.basename(path))
+        return read_json(self, path)
+
+    def writing(self, path, value):
+        paths["written"].append(os.path.basename(path))
+        return write_json(self, path, value)
+
+    monkeypatch.setattr(ShardedStorage, "_read_json", reading)
+    monkeypatch.setattr(ShardedStorage, "_write_json", writing)
+    return paths
+
+
+class TestLayout:
+
+    def test_files_and_manifest(self, path):
+        assert sorted(os.listdir(path)) == ["2024-01.json", "2024-02.json", "manifest.json", "other.json"]
+        with open(os.path.join(path, "manifest.json")) as file:
+            manifest = json.load(file)
+        assert manifest["last_id"] == 5
+        assert manifest["shards"]["2024-02"]["expense"] == 30
+        assert manifest["shards"]["2024-01"]["min_id"] == 1 and manifest["shards"]["2024-01"]["max_id"] == 2
+
+    def test_load_keeps_id_order(self, path):
+        assert list(Wallet(path, backend="sharded").load_entries()) == ["1", "2", "3", "4", "5"]
+
+
+class TestLazyShards:
+
+    def test_balance_reads_only_manifest(self, path, opened):
+        assert Wallet(path, backend="sharded").get_balance() == (74.7, 105.0, 30.3)
+        assert opened["read"] == ["manifest.json"]
+
+    def test_date_search_reads_one_month(self, path, opened):
+        result = Wallet(path, backend="sharded").search_entry(Дата="03-02-2024")
+
+        assert result == {"3": ENTRIES[2]}
+        assert opened["read"] == ["manifest.json", "2024-02.json"]
+
+    def test_add_writes_own_month(self, path, opened):
+        Wallet(path, backend="sharded").add_entry(entry("10-02-2024"))
+
+        assert opened["read"] == ["manifest.json", "2024-02.json"]
+        assert opened["written"] == ["2024-02.json", "manifest.json"]
+
+    def test_range_reads_months_in_range(self, path, opened):
+        wallet = Wallet(path, backend="sharded")
+
+        assert list(wallet.search_range(date_from="01-02-2024", max_sum=0.15)) == ["3"]
+        assert list(wallet.search_range(min_sum=10, max_sum=50)) == ["2"]
+        assert "2024-01.json" not in opened["read"][:2]
+
+    def test_text_search_reads_months_with_words(self, path, opened):
+        wallet = Wallet(path, backend="sharded")
+
+        assert wallet.search_entry(text="зарп") == {"1": ENTRIES[0]}
+        assert opened["read"] == ["manifest.json", "2024-01.json"]
+        assert wallet.search_entry(text="аванс") == {}
+        assert opened["read"] == ["manifest.json", "2024-01.json"]
+
+    def test_words_follow_edits(self, path):
+        wallet = Wallet(path, backend="sharded")
+
+        wallet.edit_entry("1", Описание="Аванс", Дата="05-02-2024")
+
+        with open(os.path.join(path, "manifest.json")) as file:
+            shards = json.load(file)["shards"]
+        assert shards["2024-01"]["words"] == {}
+        assert shards["2024-02"]["words"] == {"аванс": 1}
+        assert list(Wallet(path, backend="sharded").search_entry(text="аванс")) == ["1"]
+
+    def test_manifest_without_words(self, path):
+        manifest_path = os.path.join(path, "manifest.json")
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        for meta in manifest["shards"].values():
+            del meta["words"]
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file)
+
+        wallet = Wallet(path, backend="sharded")
+        assert list(wallet.search_entry(text="зарплата")) == ["1"]
+        assert wallet.verify_balance() == (0, 0)
+        with open(manifest_path) as file:
+            assert json.load(file)["shards"]["2024-01"]["words"] == {"зарплата": 1}
+
+
+class TestShardedEdit:
+
+    def test_edit_moves_entry_between_months(self, path):
+        wallet = Wallet(path, backend="sharded")
+
+        wallet.edit_entry("2", Дата="01-03-2024", Сумма="40.0")
+
+        cold = Wallet(path, backend="sharded")
+        assert cold.search_entry(Дата="01-03-2024") == {"2": entry("01-03-2024", "40.0")}
+        assert cold.get_balance() == (64.7, 105.0, 40.3)
+        assert cold.verify_balance() == (0, 0)
+
+    def test_edit_errors(self, path):
+        wallet = Wallet(path, backend="sharded")
+
+        with pytest.raises(ValueError):
+            wallet.edit_entry("42", Сумма="1.0")
+        with pytest.raises(ValueError):
+            wallet.edit_entry("1", Поле="1.0")
+
+
+class TestRecovery:
+
+    def test_shard_written_without_manifest(self, path):
+        shard_path = os.path.join(path, "2024-02.json")
+        with open(shard_path) as file:
+            shard = json.load(file)
+        shard["9"] = entry("28-02-2024", "1.0", "Доход")
+        with open(shard_path, 'w') as file:
+            json.dump(shard, file, ensure_ascii=False)
+
+        wallet = Wallet(path, backend="sharded")
+        assert wallet.get_balance() == (75.7, 106.0, 30.3)
+        assert wallet.add_entries([entry("01-04-2024")]) == ["10"]
+
+    def test_verify_reports_drift(self, path):
+        manifest_path = os.path.join(path, "manifest.json")
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        manifest["shards"]["2024-01"]["income"] += 500
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file)
+
+        wallet = Wallet(path, backend="sharded")
+        assert wallet.verify_balance() == (5.0, 0)
+        assert wallet.get_balance() == (74.7, 105.0, 30.3)
+
+    def test_external_write_during_batch(self, path):
+        wallet = Wallet(path, backend="sharded")
+
+        with wallet.batch():
+            wallet.add_entry(entry("01-01-2024", "1.0", "Доход"))
+            wallet.edit_entry("6", Описание="своя")
+            Wallet(path, backend="sharded").add_entry(entry("02-01-2024", "2.0", "Доход"))
+
+        entries = Wallet(path, backend="sharded").load_entries()
+        assert entries["6"] == entry("02-01-2024", "2.0", "Доход")
+        assert entries["7"] == entry("01-01-2024", "1.0", "Доход", "своя")
+        assert wallet.renumbered == {"6": "7"}
+
+
+class TestMigrateToShards:
+
+    def test_migrate(self, tmp_path, capsys):
+        source = str(tmp_path / 'data.json')
+        Wallet(source).add_entries(ENTRIES)
+
+        main(["migrate", source, str(tmp_path / 'data'), "--to", "sharded"])
+
+        assert "Перенесено записей: 5" in capsys.readouterr().out
+        wallet = Wallet(str(tmp_path / 'data'), backend="sharded")
+        assert wallet.load_entries() == Wallet(source).load_entries()
+        assert wallet.get_balance() == (74.7, 105.0, 30.3)
@@ -0,0 +1,75 @@
+import json
+import pytest
+from main import Wallet, main
+
+
+DATA = {
+    "1": {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"},
+    "2": {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"},
+    "3": {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "10.0", "Описание": "Ещё покупки"}
+}
+
+
+# Те же проверки методов Wallet, что и в test_main.py, для хранилища SQLite.
+@pytest.fixture
+def wallet(tmp_path):
+    json_path = tmp_path / 'data.json'
+    json_path.write_text(json.dumps(DATA, ensure_ascii=False))
+    main(["migrate", str(json_path), str(tmp_path / 'data.db'), "--to", "sqlite"])
+    return Wallet(str(tmp_path / 'data.db'), backend="sqlite")
+
+
+class TestSqliteWallet:
+
+    def test_migrated_entries(self, wallet):
+
+        assert wallet.load_entries() == DATA
+
+    def test_get_balance(self, wallet):
+
+        assert wallet.get_balance() == (70.0, 100.0, 30.0)
+
+    def test_add_valid_entry(self, wallet):
+
+        entry_data = {"Дата": "12-05-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"}
+        wallet.add_entry(entry_data)
+
+        assert wallet.search_entry(Дата="12-05-2024") == {"4": entry_data}
+        assert wallet.get_balance() == (170.0, 200.0, 30.0)
+
+    def test_edit_existing_entry(self, wallet):
+
+        new_data = {"Дата": "03-01-2024", "Категория": "Расход", "Сумма": "150.0", "Описание": "Бонус"}
+        wallet.edit_entry("1", **new_data)
+
+        assert wallet.load_entries()["1"] == new_data
+        assert wallet.get_balance() == (-180.0, 0, 180.0)
+
+    def test_edit_errors(self, wallet):
+
+        with pytest.raises(ValueError):
+            wallet.edit_entry("10", Дата="04-01-2024")
+        with pytest.raises(ValueError):
+            wallet.edit_entry("1", Поле="04-01-2024")
+
+    def test_search_entry(self, wallet):
+
+        results = wallet.search_entry(Категория="Расход", Дата="02-01-2024")
+
+        assert list(results) == ["2", "3"]
+        assert results["2"]["Сумма"] == "20.0"
+        assert wallet.search_entry(Категория="Неизвестная категория") == {}
+        assert wallet.search_entry(Поле="x") == {}
+        assert list(wallet.iter_entries(limit=1, offset=1)) == [("2", results["2"])]
+
+    def test_search_range(self, wallet):
+
+        assert list(wallet.search_range(date_from="02-01-2024", min_sum=15)) == ["2"]
+
+    def test_add_entries_and_other_connection(self, wallet):
+
+        other = Wallet(wallet.file_path, backend="sqlite")
+        other.add_entries([{"Дата": "05-01-2024", "Категория": "Доход", "Сумма": "5.0", "Описание": ""}] * 3)
+
+        assert list(wallet.search_entry(Дата="05-01-2024")) == ["4", "5", "6"]
+        assert len(wallet.load_entries()) == 6
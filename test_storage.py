@@ -0,0 +1,172 @@
+import os
+import json
+import multiprocessing
+import pytest
+from main import Wallet, main
+from storage import JournalStorage, import_json_to_journal
+from conftest import IN_MEMORY_BACKENDS
+
+
+@pytest.fixture
+def journal_wallet(tmp_path):
+    return Wallet(str(tmp_path / 'data.jsonl'), backend="journal")
+
+
+class TestJournalStorage:
+
+    def test_add_appends_one_line(self, journal_wallet):
+
+        entry_data = {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"}
+        journal_wallet.add_entry(entry_data)
+        journal_wallet.add_entry(entry_data)
+
+        with open(journal_wallet.file_path, 'r') as file:
+            lines = [json.loads(line) for line in file]
+
+        assert len(lines) == 2
+        assert lines[1] == {"op": "add", "id": "2", "entry": entry_data}
+
+    def test_edit_writes_delta(self, journal_wallet):
+
+        journal_wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        journal_wallet.edit_entry("1", Сумма="150.0")
+
+        with open(journal_wallet.file_path, 'r') as file:
+            lines = [json.loads(line) for line in file]
+
+        assert lines[-1] == {"op": "edit", "id": "1", "fields": {"Сумма": "150.0"}}
+        assert journal_wallet.get_balance() == (150.0, 150.0, 0)
+
+    def test_reload_from_other_instance(self, journal_wallet):
+
+        journal_wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        other = Wallet(journal_wallet.file_path, backend="journal")
+        other.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"})
+
+        assert journal_wallet.get_balance() == (80.0, 100.0, 20.0)
+        assert list(journal_wallet.search_entry(Категория="Расход")) == ["2"]
+
+    def test_compact(self, journal_wallet):
+
+        journal_wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        journal_wallet.edit_entry("1", Описание="Премия")
+        main(["compact", journal_wallet.file_path])
+
+        with open(journal_wallet.file_path, 'r') as file:
+            lines = [json.loads(line) for line in file]
+
+        assert lines == [{"op": "snapshot", "data": {"1": {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Премия"}}}]
+        assert journal_wallet.search_entry(Описание="Премия") == {"1": lines[0]["data"]["1"]}
+
+    def test_compact_missing_file(self, tmp_path, capsys):
+
+        with pytest.raises(SystemExit) as exit_info:
+            main(["compact", str(tmp_path / 'missing.jsonl')])
+
+        assert exit_info.value.code == 1
+        assert "не найден" in capsys.readouterr().err
+        assert list(tmp_path.iterdir()) == []
+
+    def test_import_json(self, tmp_path):
+
+        data = {
+            "1": {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"},
+            "2": {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": "Покупки"},
+        }
+        json_path = tmp_path / 'data.json'
+        json_path.write_text(json.dumps(data, ensure_ascii=False))
+
+        assert import_json_to_journal(str(json_path), str(tmp_path / 'data.jsonl')) == 2
+        assert JournalStorage(str(tmp_path / 'data.jsonl')).load() == data
+
+    def test_unknown_backend(self, tmp_path):
+
+        with pytest.raises(ValueError):
+            Wallet(str(tmp_path / 'data.json'), backend="unknown")
+
+
+def add_entries_in_process(file_path, backend, count):
+    wallet = Wallet(file_path, backend=backend)
+    for number in range(count):
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": f"{os.getpid()}-{number}"})
+
+
+class TestConcurrentWrites:
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_parallel_writers_lose_nothing(self, tmp_path, backend, name):
+
+        file_path = str(tmp_path / name)
+        Wallet(file_path, backend=backend)
+        processes = [multiprocessing.Process(target=add_entries_in_process, args=(file_path, backend, 20)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        data = Wallet(file_path, backend=backend).load_entries()
+
+        assert all(process.exitcode == 0 for process in processes)
+        assert sorted(data, key=int) == [str(number) for number in range(1, 81)]
+        assert len({entry["Описание"] for entry in data.values()}) == 80
+        assert Wallet(file_path, backend=backend).get_balance() == (80.0, 80.0, 0)
+
+    def test_ids_are_monotonic(self, tmp_path):
+
+        file_path = tmp_path / 'data.json'
+        file_path.write_text(json.dumps({"1": {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": ""},
+                                         "5": {"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": ""}}))
+        wallet = Wallet(str(file_path))
+        wallet.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "1.0", "Описание": ""})
+
+        assert list(wallet.load_entries()) == ["1", "5", "6"]
+
+    def test_failed_write_keeps_file(self, tmp_path, monkeypatch):
+
+        wallet = Wallet(str(tmp_path / 'data.json'))
+        wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "1.0", "Описание": ""})
+        before = (tmp_path / 'data.json').read_text()
+
+        def broken_fsync(fd):
+            raise OSError("диск заполнен")
+        monkeypatch.setattr(os, 'fsync', broken_fsync)
+
+        with pytest.raises(OSError):
+            wallet.add_entry({"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "1.0", "Описание": ""})
+
+        monkeypatch.undo()
+        assert (tmp_path / 'data.json').read_text() == before
+        assert list(wallet.load_entries()) == ["1"]
+        assert [path.name for path in tmp_path.iterdir() if path.suffix == '.tmp'] == []
+
+
+class TestJournalTail:
+
+    def test_incomplete_line_is_read_later(self, journal_wallet):
+
+        journal_wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        line = json.dumps({"op": "add", "id": "2", "entry": {"Дата": "02-01-2024", "Категория": "Расход", "Сумма": "20.0", "Описание": ""}}, ensure_ascii=False)
+        with open(journal_wallet.file_path, 'a') as file:
+            file.write(line[:10])
+
+        assert list(JournalStorage(journal_wallet.file_path).load()) == ["1"]
+
+        storage = JournalStorage(journal_wallet.file_path)
+        storage.load()
+        with open(journal_wallet.file_path, 'a') as file:
+            file.write(line[10:] + '\n')
+
+        assert list(storage.load()) == ["1", "2"]
+
+    def test_torn_line_is_cut_before_append(self, journal_wallet):
+
+        journal_wallet.add_entry({"Дата": "01-01-2024", "Категория": "Доход", "Сумма": "100.0", "Описание": "Зарплата"})
+        with open(journal_wallet.file_path, 'a') as file:
+            file.write('{"op": "add", "id": "2", "entr')
+
+        journal_wallet.add_entry({"Дата": "03-01-2024", "Категория": "Расход", "Сумма": "30.0", "Описание": "Кафе"})
+
+        reloaded = Wallet(journal_wallet.file_path, backend="journal")
+        assert [entry["Описание"] for entry in reloaded.load_entries().values()] == ["Зарплата", "Кафе"]
+        with open(journal_wallet.file_path, 'rb') as file:
+            assert file.read().endswith(b'\n')
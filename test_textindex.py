@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import pytest
+from main import Wallet, get_kwargs_for_search_entry
+from indexes import tokenize
+from textindex import TextIndex
+from conftest import IN_MEMORY_BACKENDS, entry
+
+
+ENTRIES = [
+    entry(category="Доход", description="Зарплата"),
+    entry(description="Покупки в магазине"),
+    entry("02-01-2024", description="Ещё покупки"),
+    entry(category="Доход", description="ПОКУПКА ёлки"),
+    entry(description="Кафе"),
+]
+
+
+@pytest.fixture
+def wallet(wallet):
+    wallet.add_entries(ENTRIES)
+    return wallet
+
+
+class TestTokenize:
+
+    def test_lowercase_and_yo(self):
+        assert tokenize("Ещё ПОКУПКИ, ещё!") == ["еще", "покупки"]
+
+    def test_empty(self):
+        assert tokenize(" - ") == []
+
+
+class TestTextSearch:
+
+    def test_prefix_and_case(self, wallet):
+        assert list(wallet.search_entry(text="покуп")) == ["2", "3", "4"]
+        assert list(wallet.search_entry(text="ЕЛКИ")) == ["4"]
+
+    def test_all_words_must_match(self, wallet):
+        assert list(wallet.search_entry(text="покупки ещё")) == ["3"]
+        assert wallet.search_entry(text="покупки кафе") == {}
+        assert wallet.search_entry(text="!") == {}
+
+    def test_combines_with_fields(self, wallet):
+        assert list(wallet.search_entry(text="покуп", Категория="Расход")) == ["2", "3"]
+        assert list(wallet.search_entry(text="покуп", Дата="02-01-2024")) == ["3"]
+        assert list(wallet.iter_entries(text="покуп", limit=1, offset=1)) == [("3", ENTRIES[2])]
+
+    def test_follows_add_and_edit(self, wallet):
+        wallet.search_entry(text="кафе")
+
+        wallet.add_entry(entry(description="Кафе у дома"))
+        wallet.edit_entry("5", Описание="Ресторан")
+
+        assert list(wallet.search_entry(text="кафе")) == ["6"]
+        assert list(wallet.search_entry(text="ресторан")) == ["5"]
+
+    def test_columnar(self, tmp_path):
+        Wallet(str(tmp_path / 'data.json')).add_entries(ENTRIES)
+        wallet = Wallet(str(tmp_path / 'data.json'), columnar=True)
+
+        assert wallet.search_entry(text="покуп", Категория="Доход") == {"4": ENTRIES[3]}
+
+
+class TestSidecar:
+
+    def test_cold_start_loads_sidecar(self, tmp_path, monkeypatch):
+        file_path = str(tmp_path / 'data.json')
+        with Wallet(file_path) as wallet:
+            wallet.add_entries(ENTRIES)
+            wallet.search_entry(text="кафе")
+            wallet.add_entry(entry(description="Кафе у дома"))
+
+        def rebuild(data):
+            raise AssertionError("индекс построен заново")
+
+        monkeypatch.setattr(TextIndex, "from_entries", rebuild)
+        assert list(Wallet(file_path).search_entry(text="кафе")) == ["5", "6"]
+
+    @pytest.mark.parametrize("backend, name", IN_MEMORY_BACKENDS)
+    def test_writes_do_not_rewrite_sidecar(self, tmp_path, monkeypatch, backend, name):
+        file_path = str(tmp_path / name)
+        wallet = Wallet(file_path, backend=backend)
+        wallet.add_entries(ENTRIES)
+        saves = []
+        save = TextIndex.save
+        monkeypatch.setattr(TextIndex, "save", lambda index, *args: saves.append(args) or save(index, *args))
+        wallet.search_entry(text="кафе")
+        assert len(saves) == 1
+
+        wallet.add_entry(entry(description="Кафе у дома"))
+        wallet.edit_entry("1", Описание="Аванс")
+
+        assert len(saves) == 1
+        assert not os.path.exists(TextIndex.sidecar_path(file_path))
+
+        wallet.flush()
+        assert len(saves) == 2
+        monkeypatch.setattr(TextIndex, "from_entries", lambda data: pytest.fail("индекс построен заново"))
+        assert list(Wallet(file_path, backend=backend).search_entry(text="аванс")) == ["1"]
+        assert list(Wallet(file_path, backend=backend).search_entry(text="кафе")) == ["5", "6"]
+
+    def test_stale_sidecar_is_rebuilt(self, tmp_path):
+        file_path = str(tmp_path / 'data.jsonl')
+        wallet = Wallet(file_path, backend="journal")
+        wallet.add_entries(ENTRIES)
+        wallet.search_entry(text="кафе")
+
+        Wallet(file_path, backend="journal").add_entry(entry(description="Кафе у дома"))
+
+        assert list(Wallet(file_path, backend="journal").search_entry(text="кафе")) == ["5", "6"]
+        assert list(wallet.search_entry(text="кафе")) == ["5", "6"]
+
+    def test_sqlite_backfills_tokens(self, tmp_path):
+        db_path = str(tmp_path / 'data.db')
+        Wallet(db_path, backend="sqlite").add_entries(ENTRIES)
+        connection = sqlite3.connect(db_path)
+        connection.execute("DROP TABLE entry_tokens")
+        connection.commit()
+        connection.close()
+
+        assert list(Wallet(db_path, backend="sqlite").search_entry(text="покупки")) == ["2", "3"]
+
+
+class TestTextSearchInput:
+
+    def test_text_field(self, monkeypatch):
+        input_values = ['Категория Текст', 'Расход', 'покупки']
+        monkeypatch.setattr('builtins.input', lambda _: input_values.pop(0))
+
+        assert get_kwargs_for_search_entry() == {'Категория': 'Расход', 'text': 'покупки'}
@@ -0,0 +1,114 @@
+import os
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from indexes import Entries, id_order, tokenize
+from storage import atomic_write
+from serialization import JSONDecodeError, dumps, loads
+
+
+# Полнотекстовый индекс по описанию: слово -> ID записей, в описании которых оно встречается.
+# Слова приводятся к нижнему регистру (см. indexes.tokenize). Слово запроса совпадает с началом слова описания:
+# "покуп" находит "Покупки" и "покупка"; несколько слов запроса должны встретиться в одном описании.
+# Как и итоги, индекс поддерживается в памяти при добавлении и редактировании записей и хранится в файле-спутнике
+# с отпечатком файла данных: при совпадении отпечатка он не строится заново при запуске. В отличие от итогов,
+# файл-спутник большой и не перезаписывается при каждом изменении (см. Wallet.flush).
+class TextIndex:
+
+    field = "Описание"
+
+    def __init__(self, postings: Optional[Dict[str, Dict[str, None]]] = None):
+        self._postings: Dict[str, Dict[str, None]] = postings if postings is not None else {}
+        # Отсортированный словарь слов для поиска по началу слова; строится при первом поиске после появления новых слов.
+        self._words: Optional[List[str]] = None
+
+    @classmethod
+    def from_entries(cls, data: Entries) -> "TextIndex":
+        index = cls()
+        for entry_id, entry in data.items():
+            index.add(entry_id, entry)
+        return index
+
+    def _tokens(self, entry: Dict[str, str]) -> List[str]:
+        value = entry.get(self.field)
+        return tokenize(value) if isinstance(value, str) else []
+
+    def add(self, entry_id: str, entry: Dict[str, str]) -> None:
+        for token in self._tokens(entry):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                self._words = None
+            posting[entry_id] = None
+
+    def remove(self, entry_id: str, entry: Dict[str, str]) -> None:
+        for token in self._tokens(entry):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(entry_id, None)
+                if not posting:
+                    del self._postings[token]
+                    self._words = None
+
+    def update(self, entry_id: str, old_entry: Dict[str, str], new_entry: Dict[str, str]) -> None:
+        if old_entry.get(self.field) != new_entry.get(self.field):
+            self.remove(entry_id, old_entry)
+            self.add(entry_id, new_entry)
+
+    # Слова словаря, начинающиеся с prefix: двоичный поиск по отсортированному словарю.
+    def _completions(self, prefix: str) -> List[str]:
+        if self._words is None:
+            self._words = sorted(self._postings)
+        words = self._words
+        position = bisect_left(words, prefix)
+        found = []
+        while position < len(words) and words[position].startswith(prefix):
+            found.append(words[position])
+            position += 1
+        return found
+
+    # ID записей, в описании которых есть все слова запроса (каждое - как начало слова).
+    # Запрос без слов ничему не соответствует.
+    def matches(self, text: str) -> Set[str]:
+        matches: Optional[Set[str]] = None
+        for token in tokenize(text):
+            ids: Set[str] = set()
+            for word in self._completions(token):
+                ids.update(self._postings[word])
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                break
+        return matches or set()
+
+    # То же в порядке ID.
+    def search(self, text: str) -> List[str]:
+        return sorted(self.matches(text), key=id_order)
+
+    @staticmethod
+    def sidecar_path(file_path: str) -> str:
+        return file_path + '.text'
+
+    # Чтение индекса из файла-спутника. None, если файла нет или он записан для другой версии файла данных.
+    @classmethod
+    def load(cls, file_path: str, signature: Tuple[int, int, int]) -> Optional["TextIndex"]:
+        try:
+            with open(cls.sidecar_path(file_path), 'rb') as file:
+                stored = loads(file.read())
+        except (OSError, UnicodeDecodeError, JSONDecodeError):
+            return None
+        if tuple(stored.get("signature", ())) != tuple(signature):
+            return None
+        return cls({token: dict.fromkeys(ids) for token, ids in stored["postings"].items()})
+
+    # Индекс восстанавливается пересчётом, поэтому файл-спутник не сбрасывается на диск принудительно.
+    def save(self, file_path: str, signature: Tuple[int, int, int]) -> None:
+        stored = {"signature": list(signature), "postings": {token: list(ids) for token, ids in self._postings.items()}}
+        atomic_write(self.sidecar_path(file_path), lambda file: file.write(dumps(stored)), mode='wb', sync=False)
+
+    # Удаление файла-спутника, который отстал от индекса в памяти: до следующего сохранения он не должен использоваться.
+    @classmethod
+    def discard(cls, file_path: str) -> None:
+        try:
+            os.remove(cls.sidecar_path(file_path))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from amounts import to_kopecks
+from storage import atomic_write
+from serialization import JSONDecodeError, dumps, loads
+
+
+# Итоги по доходам и расходам, которые поддерживаются приращениями при добавлении и редактировании записей.
+# Хранятся в целых копейках, поэтому не накапливают ошибку округления.
+# Сохраняются в файл-спутник рядом с файлом данных вместе с отпечатком файла данных:
+# если отпечаток совпадает, баланс доступен без чтения всех записей.
+class Totals:
+
+    def __init__(self, income_kopecks: int = 0, expense_kopecks: int = 0):
+        self.income_kopecks = income_kopecks
+        self.expense_kopecks = expense_kopecks
+
+    @property
+    def income(self) -> float:
+        return self.income_kopecks / 100
+
+    @property
+    def expense(self) -> float:
+        return self.expense_kopecks / 100
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, str]]) -> "Totals":
+        totals = cls()
+        for entry in entries:
+            totals.add(entry)
+        return totals
+
+    def add(self, entry: Dict[str, str]) -> None:
+        self._apply(entry, 1)
+
+    def remove(self, entry: Dict[str, str]) -> None:
+        self._apply(entry, -1)
+
+    # Прибавление итогов другой группы записей.
+    def merge(self, other: "Totals") -> None:
+        self.income_kopecks += other.income_kopecks
+        self.expense_kopecks += other.expense_kopecks
+
+    def _apply(self, entry: Dict[str, str], sign: int) -> None:
+        if entry["Категория"] == "Доход":
+            self.income_kopecks += sign * to_kopecks(entry["Сумма"])
+        elif entry["Категория"] == "Расход":
+            self.expense_kopecks += sign * to_kopecks(entry["Сумма"])
+
+    # Кортеж в копейках: общий баланс, сумма доходов, сумма расходов.
+    def balance_kopecks(self) -> Tuple[int, int, int]:
+        return self.income_kopecks - self.expense_kopecks, self.income_kopecks, self.expense_kopecks
+
+    # Кортеж в рублях: общий баланс, сумма доходов, сумма расходов.
+    def balance(self) -> Tuple[float, float, float]:
+        return tuple(kopecks / 100 for kopecks in self.balance_kopecks())
+
+    @staticmethod
+    def sidecar_path(file_path: str) -> str:
+        return file_path + '.totals'
+
+    # Чтение итогов из файла-спутника. None, если файла нет или он записан для другой версии файла данных.
+    # Файлы прежнего формата (итоги в рублях числами с плавающей точкой) не используются: итоги пересчитываются.
+    @classmethod
+    def load(cls, file_path: str, signature: Tuple[int, int, int]) -> Optional["Totals"]:
+        try:
+            with open(cls.sidecar_path(file_path), 'rb') as file:
+                stored = loads(file.read())
+        except (OSError, UnicodeDecodeError, JSONDecodeError):
+            return None
+        if tuple(stored.get("signature", ())) != tuple(signature) or stored.get("unit") != "kopecks":
+            return None
+        return cls(stored["income"], stored["expense"])
+
+    # Итоги восстанавливаются пересчётом, поэтому файл-спутник не сбрасывается на диск принудительно.
+    def save(self, file_path: str, signature: Tuple[int, int, int]) -> None:
+        stored = {"signature": list(signature), "unit": "kopecks",
+                  "income": self.income_kopecks, "expense": self.expense_kopecks}
+        atomic_write(self.sidecar_path(file_path), lambda file: file.write(dumps(stored)), mode='wb', sync=False)
@@ -0,0 +1,97 @@
+from typing import Dict
+from datetime import datetime
+from functools import lru_cache
+
+from decimal import Decimal
+
+from amounts import decimal_to_kopecks, format_kopecks, parse_amount
+
+DATE_FORMAT_ERROR = "Дата должна быть в формате дд-мм-гггг"
+EMPTY_DATE_ERROR = "Дата не может быть пустой."
+CATEGORY_ERROR = "Некорректная категория. Введите 'Доход' или 'Расход'."
+SUMM_ERROR = "Значение должно быть числом"
+NEGATIVE_SUMM_ERROR = "Значение не может быть отрицательным."
+DESCRIPTION_ERROR = "Описание должно быть строкой."
+FIELD_TYPE_ERROR = "Значение поля '{}' должно быть строкой."
+SUMM_ROUNDED_MESSAGE = "Сумма округлена до копеек: {}"
+
+# Проверки значений полей без ввода с клавиатуры.
+# Используются функциями ввода в main.py и при пакетном импорте; при ошибке выбрасывают ValueError с текстом для пользователя.
+
+
+# Разбор strptime медленный, а различных дат в кошельке немного, поэтому результат проверки кэшируется.
+@lru_cache(maxsize=4096)
+def validate_date(date_str: str) -> str:
+    if not date_str:
+        raise ValueError(EMPTY_DATE_ERROR)
+    try:
+        datetime.strptime(date_str, '%d-%m-%Y')
+    except ValueError:
+        raise ValueError(DATE_FORMAT_ERROR)
+    return date_str
+
+
+def validate_category(category: str) -> str:
+    if category not in ("Доход", "Расход"):
+        raise ValueError(CATEGORY_ERROR)
+    return category
+
+
+# Сумма округляется до копейки и хранится строкой в формате amounts.format_kopecks: "100" -> "100.0".
+# Знак проверяется до округления: "-0.001" - отрицательное значение, а не ноль.
+def validate_summ(value: str) -> str:
+    try:
+        amount = parse_amount(value)
+        kopecks = decimal_to_kopecks(amount)
+    except (TypeError, ValueError):
+        raise ValueError(SUMM_ERROR)
+    if amount < 0:
+        raise ValueError(NEGATIVE_SUMM_ERROR)
+    return format_kopecks(kopecks)
+
+
+# Округлила ли validate_summ введённое значение value до summ (больше двух знаков после точки).
+def summ_rounded(value: str, summ: str) -> bool:
+    return parse_amount(value) != Decimal(summ)
+
+
+# Описание необязательно (пустое, если не указано), но должно быть строкой: значения полей записи - строки.
+def validate_description(description: str) -> str:
+    if description is None:
+        return ""
+    if not isinstance(description, str):
+        raise ValueError(DESCRIPTION_ERROR)
+    return description
+
+
+# Проверка записи целиком: возвращает запись с полями в стандартном порядке.
+def validate_entry(row: Dict[str, str]) -> Dict[str, str]:
+    date_str = row.get("Дата")
+    if date_str is not None and not isinstance(date_str, str):
+        raise ValueError(DATE_FORMAT_ERROR)
+    return {
+        "Дата": validate_date(date_str),
+        "Категория": validate_category(row.get("Категория")),
+        "Сумма": validate_summ(row.get("Сумма")),
+        "Описание": validate_description(row.get("Описание")),
+    }
+
+
+# Проверка изменяемых полей записи (edit_entry, PATCH в HTTP API): те же проверки, что в validate_entry,
+# значения остальных полей - строки.
+def validate_fields(fields: Dict[str, str]) -> Dict[str, str]:
+    validated = {}
+    for key, value in fields.items():
+        if key == "Сумма":
+            validated[key] = validate_summ(value)
+        elif key == "Описание":
+            validated[key] = validate_description(value)
+        elif not isinstance(value, str):
+            raise ValueError(DATE_FORMAT_ERROR if key == "Дата" else FIELD_TYPE_ERROR.format(key))
+        elif key == "Дата":
+            validated[key] = validate_date(value)
+        elif key == "Категория":
+            validated[key] = validate_category(value)
+        else:
+            validated[key] = value
+    return validated